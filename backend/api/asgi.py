@@ -13,11 +13,12 @@ django.setup()
 
 # Importa as rotas do websocket após configurar o Django
 from apps.accounts.routing import websocket_urlpatterns
+from apps.chats.routing import websocket_urlpatterns as chat_websocket_urlpatterns
 from apps.accounts.middleware import TokenAuthMiddleware
 
 application = ProtocolTypeRouter({
     "http": get_asgi_application(),
     "websocket": TokenAuthMiddleware(
-        URLRouter(websocket_urlpatterns)
+        URLRouter(websocket_urlpatterns + chat_websocket_urlpatterns)
     ),
 })
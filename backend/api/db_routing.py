@@ -0,0 +1,118 @@
+"""
+Roteamento de leituras para réplicas.
+
+Escritas vão sempre para ``default`` (primário). Leituras vão para uma das
+réplicas configuradas, exceto quando a requisição está "fixada" no
+primário: requisições de escrita e, por ``DATABASE_STICKY_SECONDS``, as
+requisições seguintes do mesmo usuário, para que ele leia o que acabou de
+gravar.
+
+A janela fica no cache ``DATABASE_STICKY_CACHE``; com réplicas e mais de
+um worker ele precisa ser compartilhado (Redis). A verificação
+``api.W001`` avisa quando o cache configurado é a memória local.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.permissions import SAFE_METHODS
+
+PRIMARY = 'default'
+
+_pinned = ContextVar('db_pinned_to_primary', default=False)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != PRIMARY]
+
+
+def sticky_key(user_id):
+    return f'db:sticky:{user_id}'
+
+
+def sticky_cache():
+    return caches[getattr(settings, 'DATABASE_STICKY_CACHE', 'default')]
+
+
+@checks.register(checks.Tags.caches)
+def check_sticky_cache(app_configs=None, **kwargs):
+    if replica_aliases() and isinstance(sticky_cache(), LocMemCache):
+        return [checks.Warning(
+            'DATABASE_STICKY_CACHE aponta para um cache em memória local: após uma '
+            'escrita, as leituras no primário só são garantidas no mesmo worker.',
+            hint='Use um cache compartilhado (ex.: Redis) em DATABASE_STICKY_CACHE.',
+            id='api.W001',
+        )]
+    return []
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if not replicas or _pinned.get():
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primário e réplicas têm os mesmos dados
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Fixa no primário as requisições de escrita e as do usuário que gravou
+    há menos de ``DATABASE_STICKY_SECONDS``.
+
+    O usuário é obtido do token JWT do cabeçalho (sem consultar o banco),
+    pois a autenticação do DRF só acontece dentro da view.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sticky_seconds = getattr(settings, 'DATABASE_STICKY_SECONDS', 5)
+
+    def __call__(self, request):
+        if not replica_aliases():
+            return self.get_response(request)
+
+        user_id = self.get_user_id(request)
+        is_write = request.method not in SAFE_METHODS
+        pinned = is_write or (user_id is not None and sticky_cache().get(sticky_key(user_id)) is not None)
+
+        token = _pinned.set(pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+
+        if is_write and user_id is not None and response.status_code < 400:
+            sticky_cache().set(sticky_key(user_id), 1, self.sticky_seconds)
+        return response
+
+    @staticmethod
+    def get_user_id(request):
+        from rest_framework.exceptions import AuthenticationFailed
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+        from rest_framework_simplejwt.exceptions import TokenError
+        from rest_framework_simplejwt.settings import api_settings
+
+        authentication = JWTAuthentication()
+        header = authentication.get_header(request)
+        if header is None:
+            return None
+        try:
+            raw_token = authentication.get_raw_token(header)
+            if raw_token is None:
+                return None
+            token = authentication.get_validated_token(raw_token)
+        except (AuthenticationFailed, TokenError):
+            return None
+        return token.get(api_settings.USER_ID_CLAIM)
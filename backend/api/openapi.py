@@ -0,0 +1,20 @@
+"""
+Gerador do schema OpenAPI (``SPECTACULAR_SETTINGS['DEFAULT_GENERATOR_CLASS']``).
+
+Importa o drf-spectacular no topo: só deve ser carregado pela view
+``api.schema.schema``.
+"""
+from drf_spectacular.generators import SchemaGenerator as BaseSchemaGenerator
+from drf_spectacular.openapi import AutoSchema
+
+from api.schema import LazyAutoSchema
+
+
+class SchemaGenerator(BaseSchemaGenerator):
+    """Troca o ``LazyAutoSchema`` das views pelo ``AutoSchema`` do drf-spectacular."""
+
+    def create_view(self, callback, method, request=None):
+        view = super().create_view(callback, method, request)
+        if isinstance(view.schema, LazyAutoSchema):
+            view.schema = AutoSchema()
+        return view
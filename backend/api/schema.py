@@ -0,0 +1,26 @@
+"""
+Schema OpenAPI sob demanda.
+
+O ``@api_view`` do DRF resolve o ``DEFAULT_SCHEMA_CLASS`` ao decorar a
+view, ou seja, ao importar o URLconf: com o ``AutoSchema`` do
+drf-spectacular isso carregava o pacote (e as dependências dele) em todo
+worker novo. ``LazyAutoSchema`` só marca a view; o ``AutoSchema`` real é
+instalado pelo ``SchemaGenerator`` de ``api.openapi``, importado na
+primeira requisição a ``api/v1/schema/``.
+"""
+from rest_framework.schemas.inspectors import ViewInspector
+
+_schema_view = None
+
+
+class LazyAutoSchema(ViewInspector):
+    """Marcador trocado pelo ``AutoSchema`` do drf-spectacular na geração do schema."""
+
+
+def schema(request, *args, **kwargs):
+    """``SpectacularAPIView`` importada e instanciada na primeira chamada."""
+    global _schema_view
+    if _schema_view is None:
+        from drf_spectacular.views import SpectacularAPIView
+        _schema_view = SpectacularAPIView.as_view()
+    return _schema_view(request, *args, **kwargs)
@@ -10,9 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
+from dotenv import load_dotenv
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,6 +46,10 @@ INSTALLED_APPS = [
     'corsheaders',
     'channels',
     'apps.accounts',
+    'apps.chats',
+    'apps.companies',
+    'apps.contacts',
+    'apps.groups',
 ]
 
 MIDDLEWARE = [
@@ -51,6 +58,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.db_routing.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'apps.accounts.middleware.UserActivityMiddleware',
@@ -81,13 +89,61 @@ ASGI_APPLICATION = 'api.asgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Configurável por variáveis de ambiente (ou arquivo .env):
+#   DB_ENGINE, DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+#   DB_CONN_MAX_AGE          conexões persistentes (segundos) de cada alias
+#   DB_POOL                  '1' ativa o pool nativo do PostgreSQL (psycopg 3)
+#   DB_REPLICAS              réplicas de leitura separadas por vírgula: hosts
+#                            (PostgreSQL/MySQL) ou arquivos (SQLite)
+#   DB_REPLICA_CONN_MAX_AGE  conexões persistentes das réplicas
+#   DB_STICKY_SECONDS        janela de leitura no primário após uma escrita
+#   DB_STICKY_CACHE          alias em CACHES dessa janela (compartilhado entre workers)
+load_dotenv(BASE_DIR / '.env')
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'django.db.backends.sqlite3')
+
+
+def database_config(conn_max_age, **overrides):
+    config = {
+        'ENGINE': DB_ENGINE,
+        'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        'USER': os.environ.get('DB_USER', ''),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', ''),
+        'PORT': os.environ.get('DB_PORT', ''),
+        'CONN_MAX_AGE': conn_max_age,
+        'CONN_HEALTH_CHECKS': conn_max_age != 0,
     }
+    if DB_ENGINE == 'django.db.backends.postgresql' and os.environ.get('DB_POOL') == '1':
+        # O pool substitui as conexões persistentes
+        config['OPTIONS'] = {'pool': True}
+        config['CONN_MAX_AGE'] = 0
+        config['CONN_HEALTH_CHECKS'] = False
+    config.update(overrides)
+    return config
+
+
+DATABASES = {
+    'default': database_config(int(os.environ.get('DB_CONN_MAX_AGE', 0))),
 }
 
+for index, replica in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1):
+    location = {'NAME': replica.strip()} if 'sqlite' in DB_ENGINE else {'HOST': replica.strip()}
+    DATABASES[f'replica_{index}'] = database_config(
+        int(os.environ.get('DB_REPLICA_CONN_MAX_AGE', os.environ.get('DB_CONN_MAX_AGE', 0))),
+        # Nos testes as réplicas espelham o banco de teste do primário
+        TEST={'MIRROR': 'default'},
+        **location,
+    )
+
+DATABASE_ROUTERS = ['api.db_routing.PrimaryReplicaRouter']
+
+# Após uma escrita, as leituras do mesmo usuário ficam no primário por N segundos.
+# A marca fica em CACHES[DATABASE_STICKY_CACHE]: com mais de um worker precisa
+# ser um cache compartilhado (Redis), senão só vale no worker que recebeu a escrita
+DATABASE_STICKY_SECONDS = int(os.environ.get('DB_STICKY_SECONDS', 5))
+DATABASE_STICKY_CACHE = os.environ.get('DB_STICKY_CACHE', 'default')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -141,7 +197,18 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # orjson (requerimentos.txt); sem ele, o json da biblioteca padrão
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.accounts.jsoncodec.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'apps.accounts.jsoncodec.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # O drf-spectacular só é importado ao gerar o schema (api/schema.py)
+    'DEFAULT_SCHEMA_CLASS': 'api.schema.LazyAutoSchema',
 }
 
 # API settings
@@ -191,6 +258,18 @@ SPECTACULAR_SETTINGS = {
     'TITLE': 'DX Atendimento API',
     'DESCRIPTION': 'API para sistema de atendimento',
     'VERSION': '1.0.0',
+    'DEFAULT_GENERATOR_CLASS': 'api.openapi.SchemaGenerator',
+}
+
+# Cache (respostas de usuários). Com mais de um worker use o Redis:
+# 'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+# 'LOCATION': 'redis://127.0.0.1:6379/1',
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
 }
 
 # Channels
@@ -201,4 +280,147 @@ CHANNEL_LAYERS = {
             "hosts": [('127.0.0.1', 6379)],
         },
     },
-}
\ No newline at end of file
+}
+
+# Presença (online/offline) dos usuários
+# BACKEND: 'memory' (por processo) ou 'redis' (compartilhado entre workers)
+PRESENCE = {
+    'BACKEND': 'memory',
+    'REDIS_URL': 'redis://127.0.0.1:6379/0',
+    'FLUSH_INTERVAL': 5,  # segundos entre gravações em lote no banco
+    'FLUSH_BATCH_SIZE': 500,
+    'BROADCAST_TICK': 0.5,  # segundos entre frames de broadcast agregados
+    'OFFLINE_GRACE': 3,  # tolerância (s) antes de marcar offline após desconectar
+    'INACTIVE_THRESHOLD': 300,  # segundos sem atividade até a varredura marcar offline
+    'SWEEP_INTERVAL': 60,  # varredura dentro do processo; 0 desativa (use o comando)
+    'SWEEP_CHUNK_SIZE': 500,
+}
+
+# Cache token -> usuário do handshake WebSocket (TokenAuthMiddleware)
+# Alterações de usuário chegam aos outros workers pela geração em CACHES[CACHE]:
+# só com um cache compartilhado (Redis); com a memória local, após o TTL
+WS_AUTH_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 300,  # segundos; nunca excede a expiração do token
+    'CACHE': 'default',
+}
+
+# Subprotocolo msgpack dos WebSockets (apps.accounts.wsprotocol); JSON é o padrão
+WS_PROTOCOL = {
+    'MSGPACK': True,  # aceita 'dx.msgpack.v1' quando o cliente pede
+    'BATCH_WINDOW': 0.05,  # segundos para juntar eventos em um frame binário
+    'MAX_BATCH': 100,
+}
+
+# WebSocket de conversas (apps.chats.consumers)
+CHAT_WS = {
+    'BATCH_WINDOW': 0.05,  # segundos para juntar uma rajada de mensagens em um frame
+    'MAX_BATCH': 100,  # mensagens por frame
+    'MAX_QUEUE': 500,  # pendentes por conexão; acima disso descarta e pede resync
+    'MAX_SUBSCRIPTIONS': 50,  # conversas abertas por conexão
+}
+
+# Webhook do WhatsApp (apps.chats.whatsapp / apps.chats.ingestion)
+WHATSAPP = {
+    'APP_SECRET': os.environ.get('WHATSAPP_APP_SECRET', ''),  # assinatura X-Hub-Signature-256
+    'VERIFY_TOKEN': os.environ.get('WHATSAPP_VERIFY_TOKEN', ''),  # verificação do webhook (GET)
+    'QUEUE_SIZE': 10000,  # mensagens pendentes; acima disso o webhook responde 503
+    'BATCH_SIZE': 200,  # mensagens gravadas por lote
+    'BATCH_WINDOW': 0.1,  # segundos esperando o lote encher
+    'SEEN_SIZE': 100000,  # ids recentes em memória para descartar reenvios
+    'WORKERS': 1,  # threads consumidoras por processo
+    'RETRIES': 3,  # novas tentativas de um lote com erro de banco
+    # Lotes que esgotaram as tentativas (replay: manage.py replay_whatsapp_dead_letter)
+    'DEAD_LETTER': os.environ.get('WHATSAPP_DEAD_LETTER', str(BASE_DIR / 'whatsapp-dead-letter.jsonl')),
+}
+
+# Distribuição de atendimentos entre atendentes online (apps.chats.dispatch)
+DISPATCH = {
+    'ENABLED': True,
+    'MAX_LOAD': 5,  # atendimentos em andamento por atendente
+    'TICK': 0.5,  # segundos entre rodadas de atribuição e gravação em lote
+    'BATCH_SIZE': 500,  # atribuições por UPDATE
+    'RELOAD_INTERVAL': 30,  # segundos entre releituras da fila, da carga e dos atendentes online
+}
+
+# Protocolos de atendimento (apps.chats.protocolo)
+# BACKEND: 'db' (tabela de sequência) ou 'redis' (INCRBY); cada worker reserva BLOCK_SIZE números por vez
+PROTOCOLO = {
+    'BACKEND': 'db',
+    'REDIS_URL': 'redis://127.0.0.1:6379/0',
+    'BLOCK_SIZE': 100,
+    'FORMAT': '{date:%Y%m%d}{number:06d}',  # ex.: 20261018000042
+    'MAX_NUMBER': 999999,  # atendimentos por dia; alargar junto com o FORMAT
+}
+
+# Métricas (Prometheus) e logging
+METRICS = {
+    'ALLOWED_IPS': ('127.0.0.1', '::1'),  # quem pode acessar /metrics/
+    'LOG_SAMPLE_RATE': 0.01,  # fração das mensagens de alto volume registradas
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {
+            'format': '{asctime} {levelname} {name} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
+    },
+    'loggers': {
+        'apps': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+# Criação de usuários em lote (accounts/bulk-create/)
+ACCOUNTS_BULK_CREATE = {
+    'CHUNK_SIZE': 500,
+    'MAX_ROWS': 10000,
+    'HASH_WORKERS': None,  # processos para hash de senha; None = nº de CPUs
+}
+
+# Importação de empresas em streaming (empresas/import/)
+COMPANIES_IMPORT = {
+    'CHUNK_SIZE': 1000,  # linhas validadas e gravadas por bloco
+    'MAX_ERRORS': 100,  # erros detalhados na resposta
+}
+
+# Contatos: telefones em E.164, cache da ingestão e importação/exportação
+CONTACTS = {
+    'DEFAULT_COUNTRY_CODE': '55',  # para números no formato nacional
+    'PHONE_CACHE_SIZE': 100000,  # telefones no LRU telefone -> contato (por processo)
+    'IMPORT_CHUNK_SIZE': 1000,
+    'IMPORT_MAX_ERRORS': 100,
+    'EXPORT_CHUNK_SIZE': 2000,  # linhas por leitura do cursor
+    'CACHE': 'default',  # geração do cache de telefones; Redis com mais de um worker
+}
+
+# Auditoria: histórico de alterações gravado em lote
+AUDIT = {
+    'FLUSH_INTERVAL': 1,  # segundos entre gravações; 0 = grava no commit
+    'BATCH_SIZE': 500,
+    'MAX_BUFFER': 10000,  # acima disso grava sem esperar a thread
+    'MAX_RETRIES': 5,  # falhas de um lote antes de desviá-lo para o DEAD_LETTER
+    'DEAD_LETTER': os.environ.get('AUDIT_DEAD_LETTER', str(BASE_DIR / 'audit-dead-letter.jsonl')),
+}
+
+# Cache das respostas de leitura de usuários (listagem, me/, status/)
+RESPONSE_CACHE = {
+    'ENABLED': True,
+    'CACHE': 'default',  # alias em CACHES
+    'TIMEOUT': 300,  # segundos; os sinais de User invalidam antes
+    'STATUS_TIMEOUT': 2,  # status/: atraso máximo de last_activity
+}
+
+# Os testes rodam sem as threads de gravação em background (api.test_runner)
+TEST_RUNNER = 'api.test_runner.TestRunner'
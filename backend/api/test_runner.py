@@ -0,0 +1,27 @@
+"""
+Runner dos testes (``TEST_RUNNER``).
+
+Desliga as threads de gravação em background: a presença, o dispatcher e
+a auditoria são gravados pelos próprios testes (``flush_presence``,
+``Dispatcher``) ou no commit, em vez de por threads que sobreviveriam ao
+banco de teste. Fica fora de ``settings.py`` para que as configurações
+de produção não dependam de como o processo foi iniciado.
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._background = override_settings(
+            PRESENCE={**settings.PRESENCE, 'FLUSH_INTERVAL': 0},
+            DISPATCH={**settings.DISPATCH, 'TICK': 0},
+            AUDIT={**settings.AUDIT, 'FLUSH_INTERVAL': 0},
+        )
+        self._background.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._background.disable()
+        super().teardown_test_environment(**kwargs)
@@ -16,10 +16,18 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from apps.accounts.views import metrics
+from api.schema import schema
 
 app_name = 'api'
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/accounts/', include('apps.accounts.urls')),
+    path('api/v1/chats/', include('apps.chats.urls')),
+    path('api/v1/empresas/', include('apps.companies.urls')),
+    path('api/v1/contatos/', include('apps.contacts.urls')),
+    path('api/v1/grupos/', include('apps.groups.urls')),
+    path('api/v1/schema/', schema, name='schema'),
+    path('metrics/', metrics, name='metrics'),
 ]
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.accounts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        # Registra a verificação do cache da janela de leitura no primário
+        from api import db_routing  # noqa: F401
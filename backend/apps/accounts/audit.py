@@ -0,0 +1,327 @@
+"""
+Auditoria dos cadastros (empresas, contatos, grupos).
+
+Duas partes:
+
+* ``usuario_cadastro``/``usuario_alteracao`` (``models.AuditModel``) são
+  preenchidos pelas views (``AuditViewMixin``) e expostos como
+  ``{id, nome}`` (``serializers.AuditSerializerMixin``). Os usuários da
+  página inteira são buscados com um único ``in_bulk`` e guardados na
+  requisição, então uma listagem custa o mesmo número de consultas com 1
+  ou 200 linhas.
+* ``AuditLog`` recebe uma entrada por alteração. As entradas entram em
+  um buffer após o commit (alterações desfeitas não são registradas) e
+  são gravadas em lote por uma thread a cada ``FLUSH_INTERVAL``. Com
+  ``FLUSH_INTERVAL`` 0 são gravadas no próprio commit.
+
+Um lote que não grava volta para a fila de novas tentativas; depois de
+``MAX_RETRIES`` falhas, ou quando as pendências passam de ``MAX_BUFFER``,
+as entradas mais antigas vão para o arquivo ``DEAD_LETTER`` (JSON Lines)
+em vez de crescer na memória. Nada disso levanta exceção no caminho do
+commit. ``manage.py replay_audit_dead_letter`` grava de novo o que
+estiver no arquivo.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import router, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .deadletter import DeadLetterFile
+from .flusher import PeriodicFlusher
+from .metrics import registry
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'FLUSH_INTERVAL': 1,  # segundos entre gravações do buffer; 0 = grava no commit
+    'BATCH_SIZE': 500,  # entradas por INSERT
+    'MAX_BUFFER': 10000,  # acima disso grava no chamador, sem esperar a thread
+    'MAX_RETRIES': 5,  # falhas de um lote antes de ir para o DEAD_LETTER
+    'DEAD_LETTER': 'audit-dead-letter.jsonl',  # entradas que não puderam ser gravadas
+}
+
+AUDIT_USER_FIELDS = ('usuario_cadastro_id', 'usuario_alteracao_id')
+# Mantidos pelo banco/auditoria; não entram no histórico de alterações
+IGNORED_FIELDS = {'id', 'created_at', 'updated_at', *AUDIT_USER_FIELDS}
+
+audit_log_entries_total = registry.counter(
+    'audit_log_entries_total', 'Entradas do histórico de auditoria gravadas')
+audit_log_dead_letter_total = registry.counter(
+    'audit_log_dead_letter_total', 'Entradas de auditoria desviadas por resultado', ['result'])
+
+
+def audit_setting(name):
+    return getattr(settings, 'AUDIT', {}).get(name, DEFAULTS[name])
+
+
+# Histórico de alterações
+
+def snapshot(instance):
+    """Valores dos campos auditados (``attname`` -> valor)."""
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if field.attname not in IGNORED_FIELDS
+    }
+
+
+def diff(before, after):
+    """``{campo: [antes, depois]}`` dos campos que mudaram (``{}`` = registro inexistente)."""
+    names = after.keys() if after else before.keys()
+    return {
+        name: [before.get(name), after.get(name)]
+        for name in names
+        if before.get(name) != after.get(name)
+    }
+
+
+def audit_entry(instance, action, user, changes):
+    return AuditLog(
+        content_type=ContentType.objects.get_for_model(instance),
+        object_id=instance.pk,
+        action=action,
+        usuario_id=getattr(user, 'pk', user),
+        changes=changes,
+        created_at=timezone.now(),
+    )
+
+
+class AuditDeadLetterFile(DeadLetterFile):
+    """Entradas de auditoria que não puderam ser gravadas."""
+    fields = ('content_type_id', 'object_id', 'action', 'usuario_id', 'changes', 'created_at')
+
+    def encode(self, entry):
+        return {field: getattr(entry, field) for field in self.fields}
+
+    def decode(self, data):
+        data['created_at'] = parse_datetime(data['created_at'])
+        return AuditLog(**{field: data[field] for field in self.fields})
+
+
+class AuditLogWriter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._retries = []  # (falhas, entradas), do lote mais antigo ao mais novo
+
+    def __len__(self):
+        return len(self._buffer) + sum(len(entries) for _, entries in self._retries)
+
+    def add(self, entries):
+        with self._lock:
+            self._buffer.extend(entries)
+            overflow = len(self._buffer) >= audit_setting('MAX_BUFFER')
+        if overflow:
+            self.flush()
+
+    def flush(self):
+        """
+        Grava as novas tentativas e o buffer, nessa ordem; retorna quantas
+        entradas foram gravadas. Não levanta: o que falha volta para as
+        novas tentativas ou vai para o ``DEAD_LETTER``.
+        """
+        with self._lock:
+            retries, self._retries = self._retries, []
+            if self._buffer:
+                retries.append((0, self._buffer))
+                self._buffer = []
+        written = 0
+        failed = []
+        for failures, entries in retries:
+            try:
+                AuditLog.objects.db_manager(router.db_for_write(AuditLog)).bulk_create(
+                    entries, batch_size=audit_setting('BATCH_SIZE'))
+            except Exception:
+                logger.exception('Erro ao gravar %d entradas de auditoria', len(entries))
+                failed.append((failures + 1, entries))
+                continue
+            written += len(entries)
+        audit_log_entries_total.inc(written)
+        if failed:
+            self.retry_later(failed)
+        return written
+
+    def retry_later(self, failed):
+        """Guarda os lotes para a próxima gravação, desviando os que esgotaram as tentativas."""
+        aside = []
+        with self._lock:
+            # Lotes que chegaram durante a gravação ficam depois dos que falharam
+            queue = failed + self._retries
+            pending = sum(len(entries) for _, entries in queue) + len(self._buffer)
+            self._retries = []
+            for failures, entries in queue:
+                if failures >= audit_setting('MAX_RETRIES') or pending > audit_setting('MAX_BUFFER'):
+                    aside.extend(entries)
+                    pending -= len(entries)
+                else:
+                    self._retries.append((failures, entries))
+        if aside:
+            self.dead_letter(aside)
+
+    def dead_letter(self, entries):
+        dead_letter = get_dead_letter()
+        try:
+            dead_letter.write(entries)
+        except Exception:
+            logger.exception('Entradas de auditoria perdidas: %s', ''.join(dead_letter.lines(entries)))
+            audit_log_dead_letter_total.inc(len(entries), result='lost')
+            return
+        logger.error('%d entradas de auditoria desviadas para %s', len(entries), dead_letter.path)
+        audit_log_dead_letter_total.inc(len(entries), result='dead_letter')
+
+
+class AuditLogFlusher(PeriodicFlusher):
+    """Thread daemon que grava o buffer de auditoria a cada ``interval`` segundos."""
+    logger = logger
+    discarded_message = 'Banco alterado desde o início do flusher; auditoria pendente descartada'
+
+    def __init__(self, writer, interval):
+        super().__init__(interval, name='audit-log-flusher')
+        self.writer = writer
+
+    def get_model(self):
+        return AuditLog
+
+    def flush(self):
+        try:
+            self.writer.flush()
+        except Exception:
+            logger.exception('Erro ao gravar o histórico de auditoria')
+
+
+def replay_dead_letter(batch_size=None):
+    """
+    Grava de novo as entradas do arquivo de dead letter. Retorna
+    ``(gravadas, com erro)``; os lotes que falham de novo voltam para o
+    arquivo.
+    """
+    dead_letter = get_dead_letter()
+    batch_size = batch_size or audit_setting('BATCH_SIZE')
+    entries = dead_letter.claim()
+    written = failed = 0
+    for start in range(0, len(entries), batch_size):
+        batch = entries[start:start + batch_size]
+        try:
+            AuditLog.objects.db_manager(router.db_for_write(AuditLog)).bulk_create(batch)
+        except Exception as exc:
+            logger.exception('Erro ao regravar %d entradas de auditoria', len(batch))
+            dead_letter.write(batch, repr(exc))
+            failed += len(batch)
+            continue
+        written += len(batch)
+    audit_log_entries_total.inc(written)
+    dead_letter.release()
+    return written, failed
+
+
+_writer = None
+_writer_lock = threading.Lock()
+_dead_letters = {}
+
+
+def get_audit_writer():
+    """Retorna o writer do processo, iniciando a thread na primeira chamada."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                writer = AuditLogWriter()
+                if audit_setting('FLUSH_INTERVAL'):
+                    AuditLogFlusher(writer, audit_setting('FLUSH_INTERVAL')).start()
+                _writer = writer
+    return _writer
+
+
+def get_dead_letter():
+    path = str(audit_setting('DEAD_LETTER'))
+    with _writer_lock:
+        if path not in _dead_letters:
+            _dead_letters[path] = AuditDeadLetterFile(path)
+        return _dead_letters[path]
+
+
+def log_changes(entries, using=None):
+    """Registra as entradas após o commit da transação atual."""
+    if not entries:
+        return
+
+    def add():
+        # Roda no on_commit: um erro aqui interromperia os demais callbacks
+        try:
+            writer = get_audit_writer()
+            writer.add(entries)
+            if not audit_setting('FLUSH_INTERVAL'):
+                writer.flush()
+        except Exception:
+            logger.exception('Erro ao registrar %d entradas de auditoria', len(entries))
+
+    transaction.on_commit(add, using=using)
+
+
+@registry.add_collector
+def collect_audit_stats():
+    if _writer is None:
+        return []
+    return [('audit_log_buffered', 'Entradas de auditoria aguardando gravação', len(_writer))]
+
+
+# Usuários de auditoria nas respostas
+
+def audit_users(context):
+    """Cache ``{user_id: {id, nome}}`` da requisição (ou do contexto do serializer)."""
+    request = context.get('request')
+    if request is None:
+        return context.setdefault('_audit_users', {})
+    cache = getattr(request, '_audit_users', None)
+    if cache is None:
+        cache = request._audit_users = {}
+    return cache
+
+
+def prefetch_audit_users(context, instances):
+    """Resolve com um único ``in_bulk`` os usuários de auditoria ainda fora do cache."""
+    cache = audit_users(context)
+    ids = {
+        user_id
+        for instance in instances
+        for user_id in (getattr(instance, name, None) for name in AUDIT_USER_FIELDS)
+        if user_id is not None and user_id not in cache
+    }
+    if not ids:
+        return
+    users = get_user_model().objects.only('id', 'nome').in_bulk(ids)
+    for user_id in ids:
+        user = users.get(user_id)
+        cache[user_id] = {'id': user.id, 'nome': user.nome} if user is not None else None
+
+
+class AuditViewMixin:
+    """
+    Para views genéricas do DRF: preenche ``usuario_cadastro``/
+    ``usuario_alteracao`` e registra cadastro, alteração e exclusão no
+    histórico.
+    """
+
+    def perform_create(self, serializer):
+        user = self.request.user
+        instance = serializer.save(usuario_cadastro=user, usuario_alteracao=user)
+        log_changes([audit_entry(instance, AuditLog.Action.CREATE, user, diff({}, snapshot(instance)))])
+
+    def perform_update(self, serializer):
+        user = self.request.user
+        before = snapshot(serializer.instance)
+        instance = serializer.save(usuario_alteracao=user)
+        changes = diff(before, snapshot(instance))
+        if changes:
+            log_changes([audit_entry(instance, AuditLog.Action.UPDATE, user, changes)])
+
+    def perform_destroy(self, instance):
+        entry = audit_entry(instance, AuditLog.Action.DELETE, self.request.user, diff(snapshot(instance), {}))
+        super().perform_destroy(instance)
+        log_changes([entry])
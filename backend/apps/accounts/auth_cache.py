@@ -0,0 +1,146 @@
+"""
+Cache de resolução token JWT -> usuário para o handshake do WebSocket.
+
+Guarda um snapshot do usuário por token já validado, limitado em tamanho
+(LRU) e em tempo (TTL, nunca além da expiração do próprio token).
+
+Os sinais de ``User`` descartam as entradas do usuário no próprio
+processo e, após o commit, incrementam a geração do usuário no cache do
+Django (``WS_AUTH_CACHE['CACHE']``). Cada entrada guarda a geração em que
+foi criada e um acerto só vale se ela ainda for a atual, então um usuário
+desativado ou removido em um worker deixa de autenticar nos outros. Isso
+exige um cache compartilhado (Redis); com a memória local, os outros
+workers só percebem a mudança após o ``TTL``.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .generations import aget_generation, bump_generation
+from .metrics import registry
+
+DEFAULTS = {
+    'MAX_SIZE': 10000,
+    'TTL': 300,
+    'CACHE': 'default',  # alias em CACHES das gerações por usuário
+}
+
+
+def auth_cache_setting(name):
+    return getattr(settings, 'WS_AUTH_CACHE', {}).get(name, DEFAULTS[name])
+
+
+def _generation_key(user_id):
+    return f'ws_auth:gen:{user_id}'
+
+
+async def user_generation(user_id):
+    """Geração atual do usuário no cache compartilhado."""
+    return await aget_generation(caches[auth_cache_setting('CACHE')], _generation_key(user_id))
+
+
+def bump_user_generation(user_id):
+    """Invalida em todos os workers as entradas do usuário."""
+    bump_generation(caches[auth_cache_setting('CACHE')], _generation_key(user_id))
+
+
+class TokenUserCache:
+    def __init__(self, max_size=None, ttl=None):
+        self.max_size = max_size if max_size is not None else auth_cache_setting('MAX_SIZE')
+        self.ttl = ttl if ttl is not None else auth_cache_setting('TTL')
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # token -> (user, expira_em, geracao)
+        self._by_user = {}  # user_id -> tokens
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get(self, token):
+        """
+        Retorna uma cópia do usuário em cache ou ``None``. A entrada é
+        descartada se a geração do usuário mudou desde que foi gravada.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    self._discard(token)
+                self.misses += 1
+                return None
+        user, _, generation = entry
+        if await user_generation(user.id) != generation:
+            with self._lock:
+                if self._entries.get(token) is entry:
+                    self._discard(token)
+                self.stale += 1
+                self.misses += 1
+            return None
+        with self._lock:
+            if token in self._entries:
+                self._entries.move_to_end(token)
+            self.hits += 1
+        # Cada conexão recebe a sua cópia para não compartilhar estado
+        return copy.copy(user)
+
+    def set(self, token, user, token_exp, generation):
+        """Grava o usuário lido sob ``generation`` (obtida antes da leitura)."""
+        expires_at = min(time.time() + self.ttl, token_exp)
+        with self._lock:
+            if token in self._entries:
+                self._discard(token)
+            self._entries[token] = (user, expires_at, generation)
+            self._by_user.setdefault(user.id, set()).add(token)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for token in self._by_user.pop(user_id, ()):
+                self._entries.pop(token, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'stale': self.stale,
+            'hit_ratio': self.hits / total if total else 0.0,
+        }
+
+    def _discard(self, token):
+        user = self._entries.pop(token)[0]
+        tokens = self._by_user.get(user.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[user.id]
+
+
+token_user_cache = TokenUserCache()
+
+
+@registry.add_collector
+def collect_token_cache_stats():
+    return [
+        (f'ws_auth_cache_{name}', f'Cache token -> usuário: {name}', value)
+        for name, value in token_user_cache.stats().items()
+    ]
@@ -0,0 +1,106 @@
+"""
+Utilitários compartilhados pelos comandos de benchmark (``bench_*``).
+
+Os benchmarks rodam em um banco de teste descartável, reportam percentis
+e podem salvar/comparar um baseline em JSON para detectar regressões.
+"""
+import json
+import math
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+BASELINE_DIR = Path(settings.BASE_DIR) / 'benchmarks'
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summarize(samples):
+    """Resume amostras em segundos como p50/p99/max em milissegundos."""
+    return {
+        'count': len(samples),
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'max_ms': round(max(samples) * 1000, 3) if samples else 0.0,
+    }
+
+
+@contextmanager
+def bench_database():
+    """Cria um banco de teste descartável e o remove ao final."""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+class QueryCounter:
+    """Conta comandos SQL por tipo em todas as conexões (inclusive de threads)."""
+
+    def __init__(self):
+        self.counts = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        kind = sql.lstrip().split(None, 1)[0].upper() if sql else ''
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        return execute(sql, params, many, context)
+
+    @property
+    def writes(self):
+        return sum(self.counts.get(kind, 0) for kind in ('INSERT', 'UPDATE', 'DELETE'))
+
+    def _install(self, sender, connection, **kwargs):
+        connection.execute_wrappers.append(self)
+
+    def __enter__(self):
+        connection.execute_wrappers.append(self)
+        connection_created.connect(self._install)
+        return self
+
+    def __exit__(self, *exc):
+        connection_created.disconnect(self._install)
+        if self in connection.execute_wrappers:
+            connection.execute_wrappers.remove(self)
+
+
+def compare_baseline(name, results, tolerance, save=False, metrics=('p50_ms', 'p99_ms')):
+    """
+    Compara ``results`` (``{cenario: {metrica: valor}}``) com o baseline salvo.
+
+    Retorna a lista de regressões acima de ``tolerance`` (fração). Com
+    ``save=True`` grava os resultados como novo baseline.
+    """
+    path = BASELINE_DIR / f'{name}.json'
+    if save:
+        BASELINE_DIR.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+        return []
+    if not path.exists():
+        return []
+    try:
+        baseline = json.loads(path.read_text())
+    except ValueError:
+        raise CommandError(f'Baseline inválido: {path}')
+
+    regressions = []
+    for scenario, values in results.items():
+        for metric in metrics:
+            old = baseline.get(scenario, {}).get(metric)
+            new = values.get(metric)
+            if old and new is not None and new > old * (1 + tolerance):
+                regressions.append(f'{scenario}.{metric}: {old} -> {new}')
+    return regressions
@@ -0,0 +1,131 @@
+"""
+Agregador de broadcasts de presença.
+
+Em vez de um ``group_send`` por conexão/heartbeat/desconexão, as mudanças
+de presença são acumuladas durante um tick curto e enviadas em um único
+frame ``status.batch`` contendo apenas os usuários cujo estado mudou. O
+frame JSON vai pronto no evento (``text``): é codificado uma vez por
+tick, não uma vez por socket.
+"""
+import asyncio
+import logging
+
+from .jsoncodec import dumps_text
+from .metrics import channel_layer_seconds, group_send_fanout, registry
+from .presence import presence_changed, presence_setting
+
+logger = logging.getLogger(__name__)
+
+STATUS_GROUP = 'user_status_updates'
+
+
+def serialize_state(user_id, state):
+    return {
+        'user_id': user_id,
+        'is_online': state.is_online,
+        'last_activity': state.last_activity.isoformat() if state.last_activity else None,
+    }
+
+
+class PresenceBroadcaster:
+    """
+    Acumula mudanças de presença e envia um frame por tick para o grupo.
+
+    Heartbeats que não alteram ``is_online`` são descartados. ``stats``
+    guarda os contadores acumulados e ``last_tick`` os do último envio.
+    """
+
+    def __init__(self, channel_layer, group=STATUS_GROUP, tick=None):
+        self.channel_layer = channel_layer
+        self.group = group
+        self.tick = tick if tick is not None else presence_setting('BROADCAST_TICK')
+        self._pending = {}
+        self._events = 0
+        self._suppressed = 0
+        self._task = None
+        self.stats = {
+            'ticks': 0,
+            'events': 0,
+            'suppressed': 0,
+            'frames_sent': 0,
+            'frames_saved': 0,
+        }
+        self.last_tick = {}
+
+    def publish(self, user_id, previous, state):
+        """Agenda o envio do novo estado se ele mudou em relação ao anterior."""
+        if previous is not None and previous.is_online == state.is_online:
+            self._suppressed += 1
+            self.stats['suppressed'] += 1
+            self.stats['frames_saved'] += 1
+            return
+        self._pending[user_id] = state
+        presence_changed.send(sender=self.__class__, user_id=user_id, state=state)
+        self._events += 1
+        self.stats['events'] += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        # Encerra sozinho quando um tick passa sem mudanças pendentes
+        while True:
+            await asyncio.sleep(self.tick)
+            if not self._pending:
+                return
+            await self.flush()
+
+    async def flush(self):
+        """Envia imediatamente as mudanças pendentes em um único frame."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        events, self._events = self._events, 0
+        suppressed, self._suppressed = self._suppressed, 0
+        users = [serialize_state(uid, state) for uid, state in pending.items()]
+
+        # Sem agregação cada evento (inclusive heartbeats sem mudança) seria um frame
+        self.stats['ticks'] += 1
+        self.stats['frames_sent'] += 1
+        self.stats['frames_saved'] += events - 1
+        self.last_tick = {
+            'events': events,
+            'suppressed': suppressed,
+            'users': len(users),
+            'frames_saved': events + suppressed - 1,
+        }
+        logger.debug('Broadcast de presença: %s', self.last_tick)
+        group_send_fanout.observe(len(users))
+
+        try:
+            with channel_layer_seconds.time(op='group_send'):
+                await self.channel_layer.group_send(self.group, {
+                    'type': 'status.batch',
+                    'users': users,
+                    # Codificado uma vez aqui, não por destinatário
+                    'text': dumps_text({'type': 'status.batch', 'users': users}),
+                })
+        except Exception:
+            logger.exception('Erro ao enviar broadcast de presença')
+
+
+_broadcasters = {}
+
+
+def get_broadcaster(channel_layer):
+    """Retorna o agregador do processo para a camada de canais informada."""
+    broadcaster = _broadcasters.get(id(channel_layer))
+    if broadcaster is None or broadcaster.channel_layer is not channel_layer:
+        broadcaster = _broadcasters[id(channel_layer)] = PresenceBroadcaster(channel_layer)
+    return broadcaster
+
+
+@registry.add_collector
+def collect_broadcast_stats():
+    totals = {}
+    for broadcaster in _broadcasters.values():
+        for name, value in broadcaster.stats.items():
+            totals[name] = totals.get(name, 0) + value
+    return [
+        (f'presence_broadcast_{name}', f'Broadcast de presença: {name} (acumulado)', value)
+        for name, value in totals.items()
+    ]
@@ -0,0 +1,161 @@
+"""
+Criação de usuários em lote.
+
+As linhas são validadas em uma passada, as senhas são hasheadas em um
+pool de processos (o PBKDF2 é CPU-bound e não paralelisa em threads) e os
+usuários são inseridos com ``bulk_create`` em blocos, dentro de uma única
+transação.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+
+from .hashing import hash_passwords_chunk, init_worker
+from .response_cache import bump_on_commit
+from .search import index_users
+from .serializers import UserBulkRowSerializer
+
+User = get_user_model()
+
+DEFAULTS = {
+    'CHUNK_SIZE': 500,
+    'MAX_ROWS': 10000,
+    'HASH_WORKERS': None,  # None = número de CPUs
+    'POOL_MIN_ROWS': 16,  # abaixo disso hasheia no próprio processo
+}
+
+
+def bulk_setting(name):
+    return getattr(settings, 'ACCOUNTS_BULK_CREATE', {}).get(name, DEFAULTS[name])
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def hash_workers():
+    return bulk_setting('HASH_WORKERS') or os.cpu_count()
+
+
+def get_hash_pool():
+    """Pool de processos reutilizado entre requisições (criado sob demanda)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=hash_workers(),
+                    mp_context=get_context('spawn'),
+                    initializer=init_worker,
+                )
+    return _pool
+
+
+def hash_passwords(passwords):
+    """Retorna os hashes na mesma ordem, distribuindo o trabalho entre processos."""
+    if len(passwords) < bulk_setting('POOL_MIN_ROWS'):
+        return hash_passwords_chunk(passwords)
+    pool = get_hash_pool()
+    size = max(1, -(-len(passwords) // hash_workers()))
+    chunks = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    hashed = []
+    for result in pool.map(hash_passwords_chunk, chunks):
+        hashed.extend(result)
+    return hashed
+
+
+class TooManyRows(Exception):
+    pass
+
+
+def existing_emails(emails):
+    """Emails (em minúsculas) que já têm usuário, sem diferenciar maiúsculas."""
+    return set(
+        User.objects.annotate(email_lower=Lower('email'))
+        .filter(email_lower__in=[email.lower() for email in emails])
+        .values_list('email_lower', flat=True)
+    )
+
+
+def email_taken_error(line):
+    return {'row': line, 'errors': {'email': ['Já existe um usuário com este email.']}}
+
+
+def bulk_create_users(rows):
+    """
+    Cria usuários a partir de um iterável de dicts (JSON ou linhas de CSV).
+
+    Linhas inválidas não impedem as demais; retorna
+    ``(criados, erros)`` com os erros indexados pela linha (a partir de 1).
+    A validação e o hash rodam fora da transação, que fica aberta apenas
+    durante as inserções.
+    """
+    chunk_size = bulk_setting('CHUNK_SIZE')
+    max_rows = bulk_setting('MAX_ROWS')
+    rows = iter(enumerate(rows, start=1))
+    seen_emails = set()
+    users = []
+    errors = []
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        if chunk[-1][0] > max_rows:
+            raise TooManyRows(max_rows)
+
+        valid = []
+        for line, row in chunk:
+            serializer = UserBulkRowSerializer(data=row)
+            if not serializer.is_valid():
+                errors.append({'row': line, 'errors': serializer.errors})
+                continue
+            data = serializer.validated_data
+            email = data['email'].lower()
+            if email in seen_emails:
+                errors.append({'row': line, 'errors': {'email': ['Email repetido no arquivo.']}})
+                continue
+            seen_emails.add(email)
+            valid.append((line, data))
+
+        existing = existing_emails([data['email'] for _, data in valid])
+        chunk_users = []
+        passwords = []
+        for line, data in valid:
+            if data['email'].lower() in existing:
+                errors.append(email_taken_error(line))
+                continue
+            passwords.append(data.pop('password'))
+            chunk_users.append((line, User(**data)))
+
+        for (_, user), password in zip(chunk_users, hash_passwords(passwords)):
+            user.password = password
+        users.extend(chunk_users)
+
+    created = []
+    while users:
+        try:
+            with transaction.atomic():
+                created = User.objects.bulk_create([user for _, user in users], batch_size=chunk_size)
+                # bulk_create não dispara post_save: indexa a busca e invalida o cache explicitamente
+                index_users(created)
+                bump_on_commit('users')
+            break
+        except IntegrityError:
+            # Outra requisição criou algum dos emails depois da verificação:
+            # reporta essas linhas e tenta de novo com as demais
+            taken = existing_emails([user.email for _, user in users])
+            if not taken:
+                raise
+            errors.extend(email_taken_error(line) for line, user in users if user.email.lower() in taken)
+            users = [(line, user) for line, user in users if user.email.lower() not in taken]
+
+    errors.sort(key=lambda error: error['row'])
+    return created, errors
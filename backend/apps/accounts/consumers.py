@@ -1,101 +1,174 @@
-from channels.generic.websocket import AsyncJsonWebsocketConsumer
-from channels.db import database_sync_to_async
-from django.utils import timezone
-from channels_redis.core import RedisChannelLayer
-import json
 import asyncio
+import logging
+import time
+
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from . import wsprotocol
+from .jsoncodec import dumps_text, loads
+from .presence import apresence
+from .broadcast import STATUS_GROUP, get_broadcaster
+from .scheduler import offline_scheduler
+from .metrics import (
+    SampledLogger,
+    channel_layer_seconds,
+    ws_connections_active,
+    ws_connects_total,
+    ws_bytes_out_total,
+    ws_disconnects_total,
+    ws_messages_out_total,
+    ws_receive_seconds,
+)
+
+logger = SampledLogger(__name__)
+
+class JsonWebsocketConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Base dos consumers JSON: codifica pelo ``jsoncodec`` (``orjson`` quando
+    instalado). Frames já codificados por quem publicou no grupo (uma vez
+    por mensagem, não por destinatário) saem por ``send_encoded``.
+
+    Se o cliente pede o subprotocolo msgpack (``wsprotocol``) no handshake,
+    ``accept`` o aceita e ``send_json``/``receive_json`` passam a trocar
+    frames binários compactos, com vários eventos por frame. Quem envia
+    JSON pronto deve checar ``self.msgpack`` antes de ``send_encoded``.
+    """
+    msgpack = False
+    _flush_task = None
+
+    @classmethod
+    async def decode_json(cls, text_data):
+        return loads(text_data)
+
+    @classmethod
+    async def encode_json(cls, content):
+        return dumps_text(content)
+
+    async def accept(self, subprotocol=None):
+        if (
+            subprotocol is None
+            and wsprotocol.MSGPACK in self.scope.get('subprotocols', ())
+            and wsprotocol.ws_protocol_setting('MSGPACK')
+        ):
+            subprotocol = wsprotocol.MSGPACK
+            self.msgpack = True
+            self._events = []
+            self._batch_window = wsprotocol.ws_protocol_setting('BATCH_WINDOW')
+            self._max_batch = wsprotocol.ws_protocol_setting('MAX_BATCH')
+        await super().accept(subprotocol)
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        if text_data is not None:
+            ws_bytes_out_total.inc(len(text_data), protocol='json')
+        elif bytes_data is not None:
+            ws_bytes_out_total.inc(len(bytes_data), protocol='msgpack')
+        await super().send(text_data=text_data, bytes_data=bytes_data, close=close)
+
+    async def send_encoded(self, text):
+        await self.send(text_data=text)
+
+    async def send_json(self, content, close=False):
+        if not self.msgpack:
+            await super().send_json(content, close=close)
+            return
+        self._events.append(wsprotocol.compact(content))
+        if close or not self._batch_window or len(self._events) >= self._max_batch:
+            await self.flush_events(close=close)
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_events_later())
+
+    async def _flush_events_later(self):
+        await asyncio.sleep(self._batch_window)
+        self._flush_task = None
+        await self.flush_events()
+
+    async def flush_events(self, close=False):
+        """Envia em um frame msgpack os eventos acumulados."""
+        events, self._events = self._events, []
+        if self._flush_task is not None and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+        self._flush_task = None
+        if events:
+            await self.send(bytes_data=wsprotocol.pack(events), close=close)
+        elif close:
+            await self.close()
+
+    async def receive(self, text_data=None, bytes_data=None, **kwargs):
+        if bytes_data is not None and self.msgpack:
+            for content in wsprotocol.unpack(bytes_data):
+                await self.receive_json(content, **kwargs)
+            return
+        await super().receive(text_data=text_data, bytes_data=bytes_data, **kwargs)
+
+    async def websocket_disconnect(self, message):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        await super().websocket_disconnect(message)
+
+
+class UserStatusConsumer(JsonWebsocketConsumer):
+    accepted = False
 
-class UserStatusConsumer(AsyncJsonWebsocketConsumer):
     async def connect(self):
-        print("WebSocket connect recebido!")
-        print(f"Headers: {dict(self.scope['headers'])}")
-        print(f"User: {self.scope['user']}")
-        print(f"User is anonymous: {self.scope['user'].is_anonymous}")
-        
         # Verifica autenticação
         if self.scope["user"].is_anonymous:
-            print("Usuário anônimo - Conexão rejeitada")  # Debug
+            logger.info("Conexão WebSocket anônima rejeitada")
+            ws_connects_total.inc(result='rejected')
             await self.close()
             return
 
-        print(f"Usuário autenticado: {self.scope['user'].email}")  # Debug
-        
-        await self.channel_layer.group_add(
-            "user_status_updates",
-            self.channel_name
-        )
+        with channel_layer_seconds.time(op='group_add'):
+            await self.channel_layer.group_add(
+                STATUS_GROUP,
+                self.channel_name
+            )
         await self.accept()
+        self.accepted = True
+        ws_connects_total.inc(result='accepted')
+        ws_connections_active.inc()
         
         user_id = self.scope["user"].id
+        logger.sampled(logging.DEBUG, "Usuário %s conectado (%s)", user_id, self.channel_name)
         await self.add_connection(user_id)
-        await self.update_user_status(True)
-        await self.broadcast_status_update()
+        # Reconexão dentro do período de tolerância: o usuário nunca saiu
+        if offline_scheduler.cancel(user_id):
+            return
+        previous, state = await self.update_user_status(True)
+        self.broadcast_status_update(user_id, previous, state)
 
     async def disconnect(self, close_code):
-        print(f"Desconectando... Código: {close_code}, channel_name={self.channel_name}")
         user_id = getattr(self.scope["user"], "id", None)
-        print(f"user_id no disconnect: {user_id}")
-        if user_id is None:
-            print("user_id está None! Não será possível atualizar status.")
+        if user_id is None or not self.accepted:
             return
+        ws_disconnects_total.inc()
+        ws_connections_active.dec()
+        logger.sampled(logging.DEBUG, "Usuário %s desconectado, código %s", user_id, close_code)
 
-        await self.remove_connection(user_id)
-        await self.channel_layer.group_discard(f"user_{user_id}", self.channel_name)
-
-        await asyncio.sleep(3)  # Aguarda conexões restantes
-
-        redis = self.channel_layer.connection(self.channel_layer.consistent_hash(self.channel_name))
-        connections = await redis.smembers(f"user_ws_{user_id}")
-        print(f"Conexões restantes para user {user_id}: {connections}")  # <-- ADICIONE ISSO
-        if not connections:
-            print(f"Usuário {user_id} ficará offline!")  # <-- ADICIONE ISSO
-            await self.set_user_offline(user_id)
-            await self.broadcast_status_update(user_id)
-
-    @database_sync_to_async
-    def update_user_status(self, is_online):
-        user = self.scope["user"]
-        user.is_online = is_online
-        user.last_activity = timezone.now()
-        user.save(update_fields=['is_online', 'last_activity'])
-
-    @database_sync_to_async
-    def set_user_offline(self, user_id):
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        try:
-            user = User.objects.get(id=user_id)
-            user.is_online = False
-            user.last_activity = timezone.now()
-            user.save(update_fields=['is_online', 'last_activity'])
-        except User.DoesNotExist:
-            pass
-
-    async def broadcast_status_update(self, user_id=None):
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        if user_id is None:
-            user_id = self.scope["user"].id
-        try:
-            user = await database_sync_to_async(User.objects.get)(id=user_id)
-            await self.channel_layer.group_send(
-                "user_status_updates",
-                {
-                    "type": "status.update",
-                    "user_id": user.id,
-                    "is_online": user.is_online,
-                    "last_activity": user.last_activity.isoformat()
-                }
-            )
-        except User.DoesNotExist:
-            pass
+        remaining = await self.remove_connection(user_id)
+        with channel_layer_seconds.time(op='group_discard'):
+            await self.channel_layer.group_discard(f"user_{user_id}", self.channel_name)
+            await self.channel_layer.group_discard(STATUS_GROUP, self.channel_name)
+
+        # Não bloqueia o disconnect: a verificação roda após o período de tolerância
+        if not remaining:
+            offline_scheduler.schedule(user_id, self.channel_layer)
+
+    async def update_user_status(self, is_online):
+        # Grava apenas no store; o flusher persiste no banco em lote
+        return await apresence('set', self.scope["user"].id, is_online)
+
+    def broadcast_status_update(self, user_id, previous, state):
+        """
+        Entrega a mudança ao agregador, que envia um frame por tick apenas
+        com os usuários cujo estado mudou.
+        """
+        get_broadcaster(self.channel_layer).publish(user_id, previous, state)
 
     async def status_update(self, event):
         """
         Handler para mensagens de atualização de status.
         Envia a atualização para o cliente WebSocket.
         """
-        print(f"Enviando atualização de status: {event}")  # Debug
+        ws_messages_out_total.inc(type='status.update')
         await self.send_json({
             'type': 'status.update',
             'user_id': event['user_id'],
@@ -103,28 +176,39 @@ class UserStatusConsumer(AsyncJsonWebsocketConsumer):
             'last_activity': event['last_activity']
         })
 
+    async def status_batch(self, event):
+        """
+        Handler para o frame agregado de presença (vários usuários por tick).
+        """
+        ws_messages_out_total.inc(type='status.batch')
+        if 'text' in event and not self.msgpack:
+            await self.send_encoded(event['text'])
+            return
+        await self.send_json({
+            'type': 'status.batch',
+            'users': event['users'],
+        })
+
     async def receive_json(self, content):
         """
         Handler para mensagens recebidas do cliente WebSocket
         """
+        started = time.perf_counter()
+        message_type = content.get('type', '') if isinstance(content, dict) else ''
         try:
-            print(f"Mensagem recebida: {content}")
-            message_type = content.get('type', '')
-            
             if message_type == 'heartbeat':
-                await self.update_user_status(True)
-                await self.broadcast_status_update()
+                previous, state = await self.update_user_status(True)
+                self.broadcast_status_update(self.scope["user"].id, previous, state)
             else:
-                print(f"Tipo de mensagem desconhecido: {message_type}")
-        except Exception as e:
-            print(f"Erro ao processar mensagem: {e}")
+                logger.sampled(logging.WARNING, "Tipo de mensagem desconhecido: %s", message_type)
+                message_type = 'unknown'
+        except Exception:
+            logger.exception("Erro ao processar mensagem WebSocket")
+        finally:
+            ws_receive_seconds.observe(time.perf_counter() - started, type=message_type)
 
     async def add_connection(self, user_id):
-        print(f"add_connection: user_id={user_id}, channel_name={self.channel_name}")
-        redis = self.channel_layer.connection(self.channel_layer.consistent_hash(self.channel_name))
-        await redis.sadd(f"user_ws_{user_id}", self.channel_name)
+        return await apresence('add_connection', user_id, self.channel_name)
 
     async def remove_connection(self, user_id):
-        print(f"remove_connection: user_id={user_id}, channel_name={self.channel_name}")
-        redis = self.channel_layer.connection(self.channel_layer.consistent_hash(self.channel_name))
-        await redis.srem(f"user_ws_{user_id}", self.channel_name)
\ No newline at end of file
+        return await apresence('remove_connection', user_id, self.channel_name)
@@ -0,0 +1,52 @@
+"""
+Arquivos de dead letter: registros que não puderam ser gravados no banco,
+um por linha (JSON Lines), guardados para um comando de replay.
+
+As linhas são acrescentadas com ``fsync``; o replay move o arquivo para
+``<arquivo>.replay`` antes de ler, então as falhas novas vão para um
+arquivo novo e um replay interrompido é retomado. Subclasses convertem
+os registros de e para ``dict`` em ``encode``/``decode``.
+"""
+import os
+import threading
+from pathlib import Path
+
+from .jsoncodec import dumps_text, loads
+
+
+class DeadLetterFile:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.claimed = self.path.with_name(self.path.name + '.replay')
+        self._lock = threading.Lock()
+
+    def encode(self, record):
+        return record
+
+    def decode(self, data):
+        return data
+
+    def lines(self, records, error=''):
+        return [dumps_text({**self.encode(record), 'error': error}) + '\n' for record in records]
+
+    def write(self, records, error=''):
+        lines = self.lines(records, error)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as file:
+            file.writelines(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def claim(self):
+        """Retorna os registros a regravar; um replay interrompido é retomado."""
+        with self._lock:
+            if not self.claimed.exists():
+                try:
+                    os.replace(self.path, self.claimed)
+                except FileNotFoundError:
+                    return []
+        with open(self.claimed, encoding='utf-8') as file:
+            return [self.decode(loads(line)) for line in file if line.strip()]
+
+    def release(self):
+        """O replay terminou: o que falhou de novo já foi acrescentado ao arquivo."""
+        self.claimed.unlink(missing_ok=True)
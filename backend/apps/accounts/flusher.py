@@ -0,0 +1,59 @@
+"""
+Threads de gravação em background (presença, auditoria).
+
+``PeriodicFlusher`` chama ``flush`` a cada ``interval`` segundos e uma
+última vez ao parar, inclusive na saída do processo (``atexit``). Se o
+banco onde o modelo é gravado mudou desde o início da thread (ex.: o
+banco de teste já foi destruído), esse último flush é descartado em vez
+de ir para outro banco.
+"""
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def current_database(model):
+    """Nome do banco onde ``model`` é gravado (muda nos testes)."""
+    from django.db import connections, router
+
+    return connections[router.db_for_write(model)].settings_dict['NAME']
+
+
+class PeriodicFlusher(threading.Thread):
+    logger = logger
+    discarded_message = 'Banco alterado desde o início do flusher; dados pendentes descartados'
+
+    def __init__(self, interval, name):
+        super().__init__(name=name, daemon=True)
+        self.interval = interval
+        self.database = current_database(self.get_model())
+        self._stopped = threading.Event()
+
+    def get_model(self):
+        """Modelo gravado pelo ``flush``; define o banco conferido na saída."""
+        raise NotImplementedError
+
+    def flush(self):
+        raise NotImplementedError
+
+    def tick(self):
+        self.flush()
+
+    def run(self):
+        from django.db import close_old_connections
+
+        atexit.register(self.stop)
+        while not self._stopped.wait(self.interval):
+            self.tick()
+            close_old_connections()
+
+    def stop(self):
+        """Para a thread com um último flush, se o banco ainda for o do início."""
+        if not self._stopped.is_set():
+            self._stopped.set()
+            if current_database(self.get_model()) == self.database:
+                self.flush()
+            else:
+                self.logger.warning(self.discarded_message)
@@ -0,0 +1,45 @@
+"""
+Números de geração em um cache do Django.
+
+Caches que guardam dados derivados (respostas, usuários por token,
+telefone -> contato) anotam a geração em que cada entrada foi criada.
+Invalidar é um ``incr`` na chave da geração: as entradas antigas deixam
+de valer sem serem apagadas uma a uma. Com um cache compartilhado
+(Redis), o ``incr`` feito em um worker vale para todos.
+"""
+import time
+
+
+def initial_generation():
+    # Pelo relógio: se a chave for despejada, a geração nova não repete uma antiga
+    return time.time_ns() // 1000
+
+
+def get_generations(cache, keys):
+    """Retorna ``{chave: geração}``, criando as que não existem."""
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, initial_generation(), timeout=None)
+            values[key] = cache.get(key)
+    return values
+
+
+def get_generation(cache, key):
+    return get_generations(cache, [key])[key]
+
+
+async def aget_generation(cache, key):
+    value = await cache.aget(key)
+    if value is None:
+        await cache.aadd(key, initial_generation(), timeout=None)
+        value = await cache.aget(key)
+    return value
+
+
+def bump_generation(cache, key):
+    """Incrementa a geração, invalidando as entradas criadas sob a anterior."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, initial_generation(), timeout=None)
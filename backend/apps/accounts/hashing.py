@@ -0,0 +1,18 @@
+"""
+Funções executadas nos processos do pool de hash de senhas.
+
+Ficam em um módulo sem imports de models: o processo filho (spawn)
+importa este módulo antes de o Django estar configurado.
+"""
+import os
+
+
+def init_worker():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
+    import django
+    django.setup()
+
+
+def hash_passwords_chunk(passwords):
+    from django.contrib.auth.hashers import make_password
+    return [make_password(password) for password in passwords]
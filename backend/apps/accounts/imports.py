@@ -0,0 +1,73 @@
+"""
+Importações em streaming por blocos.
+
+O corpo da requisição (CSV com cabeçalho ou NDJSON) é lido linha a linha
+e entregue em blocos a uma função de gravação; cada bloco gera um dict
+de progresso e só o bloco atual fica em memória.
+"""
+import csv
+from itertools import islice
+
+from .jsoncodec import loads
+
+
+def read_rows(content_type, stream):
+    """
+    Iterador de linhas (dicts) do corpo da requisição; ``None`` se o formato
+    não é suportado.
+    """
+    if content_type.startswith('text/csv'):
+        return csv.DictReader(line.decode('utf-8-sig') for line in stream or ())
+    if content_type.startswith(('application/x-ndjson', 'application/jsonl')):
+        return read_ndjson(stream or ())
+    return None
+
+
+def read_ndjson(lines):
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield loads(line)
+        except ValueError:
+            # Vira um erro da linha, sem interromper a importação
+            yield None
+
+
+def import_in_chunks(rows, upsert_chunk, chunk_size, max_errors):
+    """
+    Chama ``upsert_chunk([(linha, row)])`` a cada bloco de ``chunk_size``
+    linhas; ela retorna ``(contagens, erros)``. Gera um dict de progresso
+    com os totais acumulados por bloco e um resumo final (``done``). Um
+    erro de leitura do arquivo interrompe a importação; os blocos
+    anteriores continuam gravados.
+    """
+    rows = iter(enumerate(rows, start=1))
+    totals = {'rows': 0, 'invalid': 0}
+    reported = 0
+
+    while True:
+        chunk, error = [], None
+        try:
+            for item in islice(rows, chunk_size):
+                chunk.append(item)
+        except (UnicodeDecodeError, csv.Error) as e:
+            error = e
+
+        if chunk:
+            counts, errors = upsert_chunk(chunk)
+            totals['rows'] += len(chunk)
+            totals['invalid'] += len(errors)
+            for name, value in counts.items():
+                totals[name] = totals.get(name, 0) + value
+            detailed = errors[:max(0, max_errors - reported)]
+            reported += len(detailed)
+            yield {**totals, 'errors': detailed}
+
+        if error is not None:
+            yield {'done': False, 'detail': f'Arquivo inválido após a linha {totals["rows"]}: {error}', **totals}
+            return
+        if len(chunk) < chunk_size:
+            break
+
+    yield {'done': True, **totals}
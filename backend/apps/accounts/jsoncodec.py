@@ -0,0 +1,78 @@
+"""
+Codificação JSON da API (DRF) e dos WebSockets.
+
+Usa o ``orjson`` (em ``requerimentos.txt``); o ``json`` da biblioteca
+padrão fica como alternativa para ambientes sem ele. A saída equivale à do ``JSONRenderer``
+do DRF: compacta, UTF-8, com ``datetime``, ``Decimal``, textos
+traduzíveis etc. convertidos pelo encoder do DRF.
+
+``dumps``/``loads`` escolhem o backend disponível; ``BACKENDS`` expõe os
+dois para o benchmark (``bench_json``).
+"""
+import json
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser as BaseJSONParser
+from rest_framework.renderers import JSONRenderer as BaseJSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_drf_encoder = JSONEncoder()
+
+
+def stdlib_dumps(obj):
+    return json.dumps(obj, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+if orjson is not None:
+    # Datetimes passam pelo encoder do DRF (mesmo formato: milissegundos e "Z")
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def orjson_dumps(obj):
+        try:
+            return orjson.dumps(obj, default=_drf_encoder.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Ex.: inteiros acima de 64 bits, que o orjson não aceita
+            return stdlib_dumps(obj)
+
+    dumps, loads = orjson_dumps, orjson.loads
+    BACKENDS = {'json': (stdlib_dumps, json.loads), 'orjson': (orjson_dumps, orjson.loads)}
+else:
+    dumps, loads = stdlib_dumps, json.loads
+    BACKENDS = {'json': (stdlib_dumps, json.loads)}
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def dumps_text(obj):
+    """``dumps`` como ``str``, para frames de texto do WebSocket."""
+    return dumps(obj).decode()
+
+
+class JSONRenderer(BaseJSONRenderer):
+    """``JSONRenderer`` do DRF com o ``orjson``; com indentação pedida, usa o original."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Como o DRF: escapa separadores de linha que quebram JSON embutido em <script>
+        return orjson_dumps(data).replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class JSONParser(BaseJSONParser):
+    """``JSONParser`` do DRF com o ``orjson`` (corpo em UTF-8)."""
+    renderer_class = JSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,145 @@
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.accounts.benchmarks import compare_baseline, percentile
+from apps.accounts.jsoncodec import BACKENDS
+
+
+def status_batch(users):
+    """Frame ``status.batch`` do broadcast de presença."""
+    now = timezone.now()
+    return {
+        'type': 'status.batch',
+        'users': [
+            {'user_id': i, 'is_online': i % 3 != 0, 'last_activity': (now - timedelta(seconds=i)).isoformat()}
+            for i in range(users)
+        ],
+    }
+
+
+def users_page(users):
+    """Página de accounts/ (``UserSerializer``): datas já como texto."""
+    created_at = timezone.now().isoformat()
+    return {
+        'next': 'http://localhost:8000/api/v1/accounts/?cursor=MjAyNi0xMC0xOFQwODo0MDoxNC40NDN8MTIz',
+        'results': [
+            {
+                'id': i,
+                'email': f'atendente{i}@empresa.com.br',
+                'nome': f'Atendente Número {i}',
+                'is_online': i % 2 == 0,
+                'is_active': True,
+                'is_staff': False,
+                'is_superuser': False,
+                'last_login': created_at,
+                'created_at': created_at,
+            }
+            for i in range(users)
+        ],
+    }
+
+
+def users_status(users):
+    """Snapshot de status/: ``last_activity`` como ``datetime`` (passa pelo encoder)."""
+    now = timezone.now()
+    return {
+        'version': 1792323614373,
+        'full': True,
+        'users': [
+            {
+                'user_id': i,
+                'nome': f'Atendente Número {i}',
+                'email': f'atendente{i}@empresa.com.br',
+                'is_online': i % 3 != 0,
+                'last_activity': now - timedelta(seconds=i),
+            }
+            for i in range(users)
+        ],
+    }
+
+
+def chat_batch(messages):
+    """Frame ``chat.batch`` (``MessageSerializer``)."""
+    created_at = timezone.now().isoformat()
+    return {
+        'type': 'chat.batch',
+        'messages': [
+            {
+                'id': 100000 + i,
+                'chat_id': 42,
+                'entrada': i % 2 == 0,
+                'tipo': 'texto',
+                'conteudo': 'Olá, gostaria de saber o status do meu pedido nº %d, obrigado!' % i,
+                'created_at': created_at,
+            }
+            for i in range(messages)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Micro-benchmark dos codecs JSON (json da biblioteca padrão x orjson) '
+        'nos payloads da API e dos WebSockets'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=50, help='Usuários/mensagens por payload')
+        parser.add_argument('--number', type=int, default=200, help='Operações por amostra')
+        parser.add_argument('--repeat', type=int, default=30, help='Amostras por medição')
+        parser.add_argument('--save-baseline', action='store_true')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Regressão tolerada (fração)')
+
+    def handle(self, *args, **options):
+        size = options['size']
+        payloads = {
+            'status_batch': status_batch(size),
+            'users_page': users_page(size),
+            'users_status': users_status(size),
+            'chat_batch': chat_batch(size),
+            'status_batch_single': status_batch(1),
+        }
+
+        results = {}
+        for payload_name, payload in payloads.items():
+            for backend, (dumps, loads) in BACKENDS.items():
+                encoded = dumps(payload)
+                results[f'{payload_name}_{backend}'] = {
+                    'bytes': len(encoded),
+                    'encode': self.measure(dumps, payload, options['number'], options['repeat']),
+                    'decode': self.measure(loads, encoded, options['number'], options['repeat']),
+                }
+
+        self.stdout.write(json.dumps(results, indent=2))
+        regressions = compare_baseline(
+            f'json_{size}',
+            {
+                f'{name}_{op}': result[op]
+                for name, result in results.items()
+                for op in ('encode', 'decode')
+            },
+            options['tolerance'],
+            save=options['save_baseline'],
+            metrics=('p50_us',),
+        )
+        if regressions:
+            raise CommandError('Regressões em relação ao baseline:\n' + '\n'.join(regressions))
+
+    @staticmethod
+    def measure(func, arg, number, repeat):
+        """Tempo por operação em microssegundos (cada amostra é a média de ``number`` chamadas)."""
+        func(arg)
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                func(arg)
+            samples.append((time.perf_counter() - started) / number)
+        return {
+            'p50_us': round(percentile(samples, 50) * 1e6, 2),
+            'p99_us': round(percentile(samples, 99) * 1e6, 2),
+        }
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounts import broadcast, presence
+from apps.accounts.auth_cache import token_user_cache
+from apps.accounts.benchmarks import QueryCounter, bench_database, compare_baseline, summarize
+from apps.accounts.consumers import UserStatusConsumer
+from apps.accounts.scheduler import offline_scheduler
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark do WebSocket de presença: conecta N usuários à aplicação ASGI '
+        'em processo, envia heartbeats, desconecta e reporta p50/p99'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--heartbeats', type=int, default=3, help='Rodadas de heartbeat por usuário')
+        parser.add_argument('--concurrency', type=int, default=200, help='Conexões simultâneas em andamento')
+        parser.add_argument('--tick', type=float, default=0.25, help='PRESENCE BROADCAST_TICK')
+        parser.add_argument('--flush-interval', type=float, default=1.0, help='Intervalo de flush do store')
+        parser.add_argument('--timeout', type=float, default=120.0)
+        parser.add_argument('--save-baseline', action='store_true')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Regressão tolerada (fração)')
+
+    def handle(self, *args, **options):
+        presence_settings = {
+            'BACKEND': 'memory',
+            'FLUSH_INTERVAL': 0,
+            'BROADCAST_TICK': options['tick'],
+            'OFFLINE_GRACE': 0,
+            'SWEEP_INTERVAL': 0,
+        }
+        channel_layers = {
+            'default': {
+                'BACKEND': 'channels.layers.InMemoryChannelLayer',
+                'CONFIG': {'capacity': 10000},
+            },
+        }
+        with bench_database(), override_settings(PRESENCE=presence_settings, CHANNEL_LAYERS=channel_layers):
+            self.reset_state()
+            tokens = self.create_users(options['users'] + 1)
+            results = asyncio.run(self.run(tokens, options))
+
+        self.stdout.write(json.dumps(results, indent=2))
+        regressions = compare_baseline(
+            f'presence_{options["users"]}',
+            {key: value for key, value in results.items() if isinstance(value, dict)},
+            options['tolerance'],
+            save=options['save_baseline'],
+        )
+        if regressions:
+            raise CommandError('Regressões em relação ao baseline:\n' + '\n'.join(regressions))
+
+    @staticmethod
+    def reset_state():
+        presence._store = None
+        broadcast._broadcasters.clear()
+        offline_scheduler.grace = 0
+        token_user_cache.clear()
+
+    @staticmethod
+    def create_users(count):
+        users = []
+        for i in range(count):
+            user = User(email=f'bench{i}@bench.local', nome=f'Bench {i}')
+            user.set_unusable_password()
+            users.append(user)
+        User.objects.bulk_create(users, batch_size=500)
+        return [
+            (user.id, str(AccessToken.for_user(user)))
+            for user in User.objects.order_by('id')
+        ]
+
+    async def run(self, tokens, options):
+        from api.asgi import application
+
+        deadline = time.monotonic() + options['timeout']
+        (observer_id, observer_token), tokens = tokens[0], tokens[1:]
+        connect_times = []
+        heartbeat_times = []
+        online_latency = []
+        offline_latency = []
+        event_started = {}
+        pending_online = {user_id for user_id, _ in tokens}
+        pending_offline = set(pending_online)
+
+        heartbeat_sent = {}
+        heartbeat_done = asyncio.Event()
+        original_receive = UserStatusConsumer.receive_json
+
+        async def timed_receive(consumer, content, **kwargs):
+            await original_receive(consumer, content, **kwargs)
+            sent = heartbeat_sent.pop(consumer.scope['user'].id, None)
+            if sent is not None:
+                heartbeat_times.append(time.perf_counter() - sent)
+                if not heartbeat_sent:
+                    heartbeat_done.set()
+
+        async def observe(communicator):
+            # Mede o atraso até o frame agregado chegar a outro socket
+            while pending_online or pending_offline:
+                try:
+                    frame = await communicator.receive_json_from(timeout=max(0.1, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    return
+                now = time.perf_counter()
+                for user in frame.get('users', ()):
+                    started = event_started.get(user['user_id'])
+                    if started is None:
+                        continue
+                    if user['is_online'] and user['user_id'] in pending_online:
+                        pending_online.discard(user['user_id'])
+                        online_latency.append(now - started)
+                    elif not user['is_online'] and user['user_id'] in pending_offline and user['user_id'] not in pending_online:
+                        pending_offline.discard(user['user_id'])
+                        offline_latency.append(now - started)
+
+        stop_flushing = asyncio.Event()
+
+        async def flush_loop():
+            while not stop_flushing.is_set():
+                await asyncio.sleep(options['flush_interval'])
+                await sync_to_async(presence.flush_presence)()
+
+        semaphore = asyncio.Semaphore(options['concurrency'])
+        communicators = {}
+
+        async def connect(user_id, token):
+            async with semaphore:
+                communicator = WebsocketCommunicator(application, f'/ws/status/?token={token}')
+                event_started[user_id] = time.perf_counter()
+                started = time.perf_counter()
+                connected, _ = await communicator.connect(timeout=options['timeout'])
+                connect_times.append(time.perf_counter() - started)
+                if connected:
+                    communicators[user_id] = communicator
+
+        UserStatusConsumer.receive_json = timed_receive
+        counter = QueryCounter()
+        try:
+            with counter:
+                started_all = time.perf_counter()
+                observer = WebsocketCommunicator(application, f'/ws/status/?token={observer_token}')
+                await observer.connect()
+                observer_task = asyncio.create_task(observe(observer))
+                flush_task = asyncio.create_task(flush_loop())
+
+                await asyncio.gather(*(connect(user_id, token) for user_id, token in tokens))
+
+                for _ in range(options['heartbeats']):
+                    heartbeat_done.clear()
+                    for user_id, communicator in communicators.items():
+                        heartbeat_sent[user_id] = time.perf_counter()
+                        await communicator.send_json_to({'type': 'heartbeat'})
+                    if heartbeat_sent:
+                        await asyncio.wait_for(heartbeat_done.wait(), max(0.1, deadline - time.monotonic()))
+
+                # Garante que o online de todos foi observado antes de desconectar
+                while pending_online and time.monotonic() < deadline:
+                    await asyncio.sleep(0.05)
+                for user_id, communicator in communicators.items():
+                    event_started[user_id] = time.perf_counter()
+                    await communicator.disconnect()
+
+                await observer_task
+                stop_flushing.set()
+                await flush_task
+                await observer.disconnect()
+                await sync_to_async(presence.flush_presence)()
+                elapsed = time.perf_counter() - started_all
+        finally:
+            UserStatusConsumer.receive_json = original_receive
+
+        stats = broadcast.get_broadcaster(get_channel_layer()).stats
+        return {
+            'users': len(tokens),
+            'elapsed_s': round(elapsed, 3),
+            'connect': summarize(connect_times),
+            'heartbeat': summarize(heartbeat_times),
+            'broadcast_online': summarize(online_latency),
+            'broadcast_offline': summarize(offline_latency),
+            'missed_broadcasts': len(pending_online) + len(pending_offline),
+            'db': {
+                'writes': counter.writes,
+                'writes_per_s': round(counter.writes / elapsed, 2) if elapsed else 0.0,
+                'queries': dict(counter.counts),
+            },
+            'broadcaster': dict(stats),
+        }
@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounts.benchmarks import bench_database, compare_baseline, summarize
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark de cold start: inicia N processos novos que importam a '
+        'aplicação ASGI e mede o tempo até o primeiro WebSocket aceito'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=10, help='Processos iniciados')
+        parser.add_argument('--channel-layer', choices=('default', 'memory'), default='default',
+                            help='Camada das settings (Redis) ou em memória')
+        parser.add_argument('--save-baseline', action='store_true')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Regressão tolerada (fração)')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            if connection.vendor == 'sqlite':
+                # O worker é outro processo: o banco de teste precisa ser um arquivo
+                connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(tmp, 'bench.sqlite3')
+            with bench_database():
+                db_name = connection.settings_dict['NAME']
+                user = User.objects.create_user(email='startup@bench.local', nome='Startup', password='x')
+                token = str(AccessToken.for_user(user))
+                connection.close()
+                probes = [self.probe(db_name, token, options['channel_layer']) for _ in range(options['runs'])]
+
+        results = {
+            # Do fork/exec do interpretador até o accept
+            'spawn_to_accept': summarize([probe['spawn_to_accept'] for probe in probes]),
+            # Do início do módulo (interpretador pronto) até o accept
+            'process_to_accept': summarize([probe['total_ms'] / 1000 for probe in probes]),
+            'import_asgi': summarize([probe['import_ms'] / 1000 for probe in probes]),
+            'first_accept': summarize([probe['first_accept_ms'] / 1000 for probe in probes]),
+        }
+        self.stdout.write(json.dumps({
+            **results,
+            'channels_redis_loaded': probes[-1]['channels_redis_loaded'],
+            'drf_spectacular_loaded': probes[-1]['drf_spectacular_loaded'],
+        }, indent=2))
+        regressions = compare_baseline(
+            f'startup_{options["channel_layer"]}',
+            results,
+            options['tolerance'],
+            save=options['save_baseline'],
+        )
+        if regressions:
+            raise CommandError('Regressões em relação ao baseline:\n' + '\n'.join(regressions))
+
+    @staticmethod
+    def probe(db_name, token, layer):
+        started = time.time()
+        process = subprocess.run(
+            [sys.executable, '-m', 'apps.accounts.startup_probe', 'websocket', db_name, token, layer],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            raise CommandError(process.stderr[-2000:])
+        probe = json.loads(process.stdout.splitlines()[-1])
+        if not probe['accepted']:
+            raise CommandError('WebSocket recusado pelo worker novo')
+        probe['spawn_to_accept'] = probe['accepted_at'] - started
+        return probe
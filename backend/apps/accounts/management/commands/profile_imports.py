@@ -0,0 +1,71 @@
+import json
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def parse_importtime(stderr):
+    """Linhas do ``-X importtime``: ``[(modulo, proprio_us, acumulado_us)]``."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a inicialização de um worker novo: tempo de import por módulo '
+        '(-X importtime), fases do django.setup(), ready() de cada app, '
+        'api.asgi e URLconf'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='Módulos listados por critério')
+        parser.add_argument('--module', action='append', default=[],
+                            help='Informa se o módulo foi importado (pode repetir)')
+
+    def handle(self, *args, **options):
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-m', 'apps.accounts.startup_probe', 'imports'],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            raise CommandError(process.stderr[-2000:])
+        probe = json.loads(process.stdout)
+        modules = parse_importtime(process.stderr)
+
+        packages = defaultdict(int)
+        for name, self_us, _ in modules:
+            packages[name.split('.')[0]] += self_us
+
+        top = options['top']
+        report = {
+            'phases': probe['phases'],
+            'apps': probe['apps'],
+            'modules': len(probe['modules']),
+            'import_ms': round(sum(self_us for _, self_us, _ in modules) / 1000, 2),
+            'packages': {
+                name: round(us / 1000, 2)
+                for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]
+            },
+            'cumulative': {
+                name: round(cumulative_us / 1000, 2)
+                for name, _, cumulative_us in sorted(modules, key=lambda item: -item[2])[:top]
+            },
+            'self': {
+                name: round(self_us / 1000, 2)
+                for name, self_us, _ in sorted(modules, key=lambda item: -item[1])[:top]
+            },
+        }
+        if options['module']:
+            loaded = set(probe['modules'])
+            report['loaded'] = {name: name in loaded for name in options['module']}
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.accounts.presence import presence_setting
+from apps.accounts.sweeper import sweep_inactive_users, sweep_stats
+
+
+class Command(BaseCommand):
+    help = 'Marca como offline os usuários sem atividade recente'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Executa continuamente a cada --interval segundos',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=presence_setting('SWEEP_INTERVAL') or 60,
+            help='Intervalo entre varreduras em segundos (com --loop)',
+        )
+        parser.add_argument(
+            '--threshold', type=int, default=None,
+            help='Segundos sem atividade para considerar inativo',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            swept = sweep_inactive_users(threshold=options['threshold'])
+            self.stdout.write(
+                f'{len(swept)} usuários marcados como offline '
+                f'em {sweep_stats["last_duration"]:.3f}s'
+            )
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,208 @@
+"""
+Métricas do processo no formato texto do Prometheus.
+
+Registro mínimo (contadores, gauges e histogramas com labels) sem
+dependências externas. Os valores são por worker: cada processo Daphne
+expõe os seus em ``/metrics/``.
+"""
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+
+DEFAULTS = {
+    'LOG_SAMPLE_RATE': 0.01,
+    'ALLOWED_IPS': ('127.0.0.1', '::1'),
+}
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def metrics_setting(name):
+    return getattr(settings, 'METRICS', {}).get(name, DEFAULTS[name])
+
+
+class Metric:
+    kind = ''
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _format_labels(self, key, extra=None):
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ''
+        return '{%s}' % ','.join(f'{name}="{value}"' for name, value in pairs)
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        with self._lock:
+            series = list(self._series.items())
+        for key, value in series:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key, value):
+        return [f'{self.name}{self._format_labels(key)} {value}']
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_series(self, key, value):
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += bucket_count
+            labels = self._format_labels(key, ('le', bound))
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = self._format_labels(key)
+        lines.append(f'{self.name}_sum{labels} {total}')
+        lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def add_collector(self, func):
+        """Registra uma função que retorna ``[(nome, ajuda, valor), ...]`` na coleta."""
+        self._collectors.append(func)
+        return func
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, documentation, value in collector():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} gauge')
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+ws_connections_active = registry.gauge(
+    'ws_connections_active', 'Conexões WebSocket abertas neste worker')
+ws_connects_total = registry.counter(
+    'ws_connects_total', 'Conexões WebSocket aceitas ou rejeitadas', ['result'])
+ws_disconnects_total = registry.counter(
+    'ws_disconnects_total', 'Desconexões WebSocket')
+ws_handshake_seconds = registry.histogram(
+    'ws_handshake_seconds', 'Tempo de autenticação do handshake WebSocket', ['cache'])
+ws_receive_seconds = registry.histogram(
+    'ws_receive_seconds', 'Tempo de processamento de receive_json', ['type'])
+ws_messages_out_total = registry.counter(
+    'ws_messages_out_total', 'Frames enviados aos clientes WebSocket', ['type'])
+ws_bytes_out_total = registry.counter(
+    'ws_bytes_out_total', 'Bytes enviados aos clientes WebSocket por subprotocolo', ['protocol'])
+group_send_fanout = registry.histogram(
+    'group_send_fanout', 'Usuários por frame de broadcast de presença',
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000))
+channel_layer_seconds = registry.histogram(
+    'channel_layer_seconds', 'Tempo de ida e volta de operações da camada de canais', ['op'])
+db_seconds = registry.histogram(
+    'db_seconds', 'Tempo de banco/store por método', ['method'])
+
+
+class SampledLogger:
+    """
+    Logger com amostragem para mensagens de alto volume.
+
+    ``sampled`` só formata e emite uma fração ``METRICS['LOG_SAMPLE_RATE']``
+    das mensagens, e nada quando o nível está desabilitado.
+    """
+
+    def __init__(self, name):
+        self.logger = logging.getLogger(name)
+
+    def __getattr__(self, name):
+        return getattr(self.logger, name)
+
+    def sampled(self, level, msg, *args):
+        if not self.logger.isEnabledFor(level):
+            return
+        if random.random() < metrics_setting('LOG_SAMPLE_RATE'):
+            self.logger.log(level, msg, *args)
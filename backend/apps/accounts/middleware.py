@@ -7,12 +7,18 @@ from django.contrib.auth.models import AnonymousUser
 from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth import get_user_model
 from urllib.parse import parse_qs
+from .auth_cache import token_user_cache, user_generation
+from .presence import get_presence_store
+from .metrics import db_seconds, ws_handshake_seconds
+import time
 
 User = get_user_model()
 
 class TokenAuthMiddleware(BaseMiddleware):
     async def __call__(self, scope, receive, send):
         # Extrai o token da query string
+        started = time.perf_counter()
+        cache_result = 'none'
         query_string = scope.get('query_string', b'').decode()
         query_params = parse_qs(query_string)
         token_list = query_params.get('token')
@@ -20,35 +26,50 @@ class TokenAuthMiddleware(BaseMiddleware):
 
         if token_list:
             token = token_list[0]
-            try:
-                access_token = AccessToken(token)
-                user_id = access_token['user_id']
-                user = await self.get_user(user_id)
-            except Exception:
-                user = AnonymousUser()
+            cached = await token_user_cache.get(token)
+            if cached is not None:
+                user = cached
+                cache_result = 'hit'
+            else:
+                cache_result = 'miss'
+                try:
+                    access_token = AccessToken(token)
+                    user_id = access_token['user_id']
+                    # Lida antes do usuário: uma alteração no meio invalida a entrada
+                    generation = await user_generation(user_id)
+                    user = await self.get_user(user_id)
+                    if user.is_authenticated and user.is_active:
+                        token_user_cache.set(token, user, access_token['exp'], generation)
+                except Exception:
+                    user = AnonymousUser()
 
         scope['user'] = user
+        ws_handshake_seconds.observe(time.perf_counter() - started, cache=cache_result)
         return await super().__call__(scope, receive, send)
 
     @staticmethod
     async def get_user(user_id):
         try:
-            return await User.objects.aget(id=user_id)
+            with db_seconds.time(method='get_user'):
+                return await User.objects.aget(id=user_id)
         except User.DoesNotExist:
             return AnonymousUser()
 
 class UserActivityMiddleware:
+    """
+    Registra a atividade do usuário no store de presença; o flusher grava
+    ``last_activity`` no banco em lote, fora do caminho da requisição.
+    """
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
         response = self.get_response(request)
         
-        if request.user.is_authenticated:
-            # Atualiza last_activity apenas se já passou mais de 5 minutos
-            update_threshold = timezone.now() - timezone.timedelta(minutes=5)
-            if not request.user.last_activity or request.user.last_activity < update_threshold:
-                request.user.last_activity = timezone.now()
-                request.user.save(update_fields=['last_activity'])
+        # Lido após a view: o DRF repassa ao HttpRequest o usuário autenticado
+        # via JWT, que não é visível antes dela
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            get_presence_store().touch(user.id)
         
         return response
\ No newline at end of file
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_alter_user_options_remove_user_date_joined_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='last_activity',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Última atividade registrada do usuário.', null=True, verbose_name='última atividade'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='atualizado em'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_search_index(apps, schema_editor):
+    from apps.accounts.search import user_tokens
+
+    User = apps.get_model('accounts', 'User')
+    UserSearchToken = apps.get_model('accounts', 'UserSearchToken')
+    db_alias = schema_editor.connection.alias
+    UserSearchToken.objects.using(db_alias).bulk_create(
+        [
+            UserSearchToken(user_id=user.id, token=token)
+            for user in User.objects.using(db_alias).only('id', 'nome', 'email').iterator()
+            for token in user_tokens(user)
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_user_online_activity_index'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64, verbose_name='token')),
+            ],
+            options={
+                'verbose_name': 'token de busca',
+                'verbose_name_plural': 'tokens de busca',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['created_at', 'id'], name='user_created_id_idx'),
+        ),
+        migrations.AddField(
+            model_name='usersearchtoken',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='usersearchtoken',
+            index=models.Index(fields=['token', 'user'], name='user_search_token_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='usersearchtoken',
+            constraint=models.UniqueConstraint(fields=('user', 'token'), name='unique_user_search_token'),
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
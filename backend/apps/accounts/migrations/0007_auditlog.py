@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:36
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_search_index'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditLog',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('object_id', models.BigIntegerField(verbose_name='id do registro')),
+                ('action', models.CharField(choices=[('create', 'cadastro'), ('update', 'alteração'), ('delete', 'exclusão'), ('import', 'importação')], max_length=10, verbose_name='ação')),
+                ('changes', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='alterações')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='criado em')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='contenttypes.contenttype')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='usuário')),
+            ],
+            options={
+                'verbose_name': 'registro de auditoria',
+                'verbose_name_plural': 'registros de auditoria',
+                'indexes': [models.Index(fields=['content_type', 'object_id', 'id'], name='audit_log_object_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,7 @@
+from django.conf import settings
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
+from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -36,12 +39,13 @@ class User(AbstractBaseUser, PermissionsMixin):
         _('última atividade'),
         null=True,
         blank=True,
+        db_index=True,
         help_text=_('Última atividade registrada do usuário.'),
     )
     
     # Campos de auditoria
     created_at = models.DateTimeField(_('criado em'), auto_now_add=True)
-    updated_at = models.DateTimeField(_('atualizado em'), auto_now=True)
+    updated_at = models.DateTimeField(_('atualizado em'), auto_now=True, db_index=True)
     last_login = models.DateTimeField(_('último login'), null=True, blank=True)
     
     # Configurações
@@ -53,6 +57,12 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name = _('user')
         verbose_name_plural = _('users')
         ordering = ['-created_at']
+        indexes = [
+            # Varredura de inativos: is_online=True AND last_activity < limite
+            models.Index(fields=['is_online', 'last_activity'], name='user_online_activity_idx'),
+            # Paginação por cursor em (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='user_created_id_idx'),
+        ]
 
     def __str__(self):
         return self.email
@@ -74,3 +84,95 @@ class User(AbstractBaseUser, PermissionsMixin):
         if is_online:
             self.last_activity = timezone.now()
         self.save(update_fields=['is_online', 'last_activity'])
+
+
+class UserSearchToken(models.Model):
+    """Token normalizado de nome/email usado pela busca de usuários."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(_('token'), max_length=64)
+
+    class Meta:
+        verbose_name = _('token de busca')
+        verbose_name_plural = _('tokens de busca')
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'token'], name='unique_user_search_token'),
+        ]
+        indexes = [
+            models.Index(fields=['token', 'user'], name='user_search_token_idx'),
+        ]
+
+    def __str__(self):
+        return self.token
+
+
+class AuditModel(models.Model):
+    """
+    Quem cadastrou e quem alterou o registro por último. Preenchidos pelas
+    views com ``apps.accounts.audit.AuditViewMixin`` e pelas importações.
+    """
+    usuario_cadastro = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        verbose_name=_('cadastrado por'),
+    )
+    usuario_alteracao = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        verbose_name=_('alterado por'),
+    )
+
+    class Meta:
+        abstract = True
+
+
+class AuditLog(models.Model):
+    """
+    Histórico de alterações, somente inserção. As entradas são gravadas em
+    lote por ``apps.accounts.audit.AuditLogWriter`` após o commit da
+    alteração; ``changes`` é ``{campo: [antes, depois]}``.
+    """
+
+    class Action(models.TextChoices):
+        CREATE = 'create', _('cadastro')
+        UPDATE = 'update', _('alteração')
+        DELETE = 'delete', _('exclusão')
+        IMPORT = 'import', _('importação')
+
+    id = models.BigAutoField(primary_key=True)
+    content_type = models.ForeignKey(ContentType, on_delete=models.PROTECT, related_name='+')
+    object_id = models.BigIntegerField(_('id do registro'))
+    action = models.CharField(_('ação'), max_length=10, choices=Action.choices)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_('usuário'),
+    )
+    changes = models.JSONField(_('alterações'), default=dict, encoder=DjangoJSONEncoder)
+    # Momento da alteração, não da gravação do lote
+    created_at = models.DateTimeField(_('criado em'), default=timezone.now)
+
+    class Meta:
+        verbose_name = _('registro de auditoria')
+        verbose_name_plural = _('registros de auditoria')
+        indexes = [
+            models.Index(fields=['content_type', 'object_id', 'id'], name='audit_log_object_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_action_display()} {self.content_type_id}:{self.object_id}'
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Registros de auditoria não podem ser alterados.')
+        super().save(*args, **kwargs)
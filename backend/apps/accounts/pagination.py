@@ -0,0 +1,109 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação por cursor (keyset) em ``(-created_at, -id)``.
+
+    O cursor guarda a posição do último item da página, então cada página
+    é uma consulta de intervalo no índice, sem OFFSET. Subclasses trocam a
+    ordem (``ordering``) junto com ``encode_cursor``/``decode_cursor`` e
+    ``filter_after``.
+    """
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    page_size = 50
+    max_page_size = 200
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    @staticmethod
+    def encode_cursor(instance):
+        raw = f'{instance.created_at.isoformat()}|{instance.pk}'
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(created_at), int(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound('Cursor inválido')
+
+    def filter_after(self, queryset, cursor):
+        created_at, pk = self.decode_cursor(cursor)
+        return queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = self.filter_after(queryset, cursor)
+
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class NameKeysetPagination(KeysetPagination):
+    """Paginação por cursor em ``(nome, id)``, a ordem alfabética dos cadastros."""
+    ordering = ('nome', 'id')
+
+    @staticmethod
+    def encode_cursor(instance):
+        # O id vem antes: o nome pode conter o separador
+        raw = f'{instance.pk}|{instance.nome}'
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            pk, nome = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+            return nome, int(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound('Cursor inválido')
+
+    def filter_after(self, queryset, cursor):
+        nome, pk = self.decode_cursor(cursor)
+        return queryset.filter(Q(nome__gt=nome) | Q(nome=nome, id__gt=pk))
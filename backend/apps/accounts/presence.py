@@ -0,0 +1,412 @@
+"""
+Armazenamento de presença (online/offline) dos usuários.
+
+O estado de presença vive em um store rápido (memória do processo ou Redis),
+que é a fonte da verdade. Um flusher em background grava periodicamente o
+estado alterado em ``User.is_online``/``User.last_activity`` com um único
+UPDATE em lote, de modo que heartbeats não geram escritas no banco.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Case, F, Q, Value, When
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .flusher import PeriodicFlusher
+from .metrics import db_seconds
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BACKEND': 'memory',
+    'REDIS_URL': 'redis://127.0.0.1:6379/0',
+    'KEY_PREFIX': 'presence',
+    'FLUSH_INTERVAL': 5,
+    'FLUSH_BATCH_SIZE': 500,
+    'BROADCAST_TICK': 0.5,
+    'OFFLINE_GRACE': 3,
+    'INACTIVE_THRESHOLD': 300,
+    'SWEEP_INTERVAL': 60,
+    'SWEEP_CHUNK_SIZE': 500,
+}
+
+
+# Enviado quando ``is_online`` de um usuário muda (argumentos: user_id, state)
+presence_changed = Signal()
+
+
+def presence_setting(name):
+    return getattr(settings, 'PRESENCE', {}).get(name, DEFAULTS[name])
+
+
+class PresenceState(NamedTuple):
+    # None quando só a atividade é conhecida (ex.: requisições HTTP)
+    is_online: Optional[bool]
+    last_activity: datetime
+
+
+class MemoryPresenceStore:
+    """Store de presença em memória do processo (padrão em desenvolvimento)."""
+
+    blocking = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[int, PresenceState] = {}
+        self._dirty = set()
+        self._connections: Dict[int, set] = {}
+
+    def set(self, user_id, is_online, when=None) -> Tuple[Optional[PresenceState], PresenceState]:
+        """Registra o estado do usuário e retorna ``(anterior, atual)``."""
+        state = PresenceState(bool(is_online), when or timezone.now())
+        with self._lock:
+            previous = self._states.get(user_id)
+            self._states[user_id] = state
+            self._dirty.add(user_id)
+        return previous, state
+
+    def touch(self, user_id, when=None) -> PresenceState:
+        """Registra atividade do usuário sem alterar o status online."""
+        when = when or timezone.now()
+        with self._lock:
+            previous = self._states.get(user_id)
+            state = PresenceState(previous.is_online if previous else None, when)
+            self._states[user_id] = state
+            self._dirty.add(user_id)
+        return state
+
+    def get(self, user_id) -> Optional[PresenceState]:
+        return self._states.get(user_id)
+
+    def get_many(self, user_ids: Iterable[int]) -> Dict[int, PresenceState]:
+        states = self._states
+        return {uid: states[uid] for uid in user_ids if uid in states}
+
+    def online_ids(self) -> List[int]:
+        """Ids dos usuários online (o dispatcher recarrega os atendentes daqui)."""
+        with self._lock:
+            return [uid for uid, state in self._states.items() if state.is_online]
+
+    def drain(self) -> Dict[int, PresenceState]:
+        """Remove e retorna os estados alterados desde o último flush."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            return {uid: self._states[uid] for uid in dirty if uid in self._states}
+
+    def restore(self, states: Dict[int, PresenceState]):
+        """Marca novamente como pendentes estados cujo flush falhou."""
+        with self._lock:
+            self._dirty.update(states)
+
+    def add_connection(self, user_id, channel_name) -> int:
+        """Registra um socket do usuário e retorna quantos ele tem abertos."""
+        with self._lock:
+            channels = self._connections.setdefault(user_id, set())
+            channels.add(channel_name)
+            return len(channels)
+
+    def remove_connection(self, user_id, channel_name) -> int:
+        """Remove um socket do usuário e retorna quantos restam abertos."""
+        with self._lock:
+            channels = self._connections.get(user_id, set())
+            channels.discard(channel_name)
+            if not channels:
+                self._connections.pop(user_id, None)
+            return len(channels)
+
+    def connection_count(self, user_id) -> int:
+        return len(self._connections.get(user_id, ()))
+
+
+class RedisPresenceStore:
+    """
+    Store de presença compartilhado entre workers via Redis.
+
+    Cada usuário ocupa um hash ``<prefix>:<id>``, os ids pendentes de flush
+    ficam no set ``<prefix>:dirty`` e os online no set ``<prefix>:online``.
+    """
+
+    blocking = True
+
+    def __init__(self, url, prefix):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._dirty_key = f'{prefix}:dirty'
+        self._online_key = f'{prefix}:online'
+
+    def _key(self, user_id):
+        return f'{self._prefix}:{user_id}'
+
+    @staticmethod
+    def _decode(raw) -> Optional[PresenceState]:
+        if not raw:
+            return None
+        is_online = raw.get(b'on')
+        return PresenceState(
+            None if is_online is None else is_online == b'1',
+            datetime.fromtimestamp(float(raw[b'ts']), tz=dt_timezone.utc),
+        )
+
+    def set(self, user_id, is_online, when=None):
+        state = PresenceState(bool(is_online), when or timezone.now())
+        key = self._key(user_id)
+        pipe = self._redis.pipeline()
+        pipe.hgetall(key)
+        pipe.hset(key, mapping={'on': int(state.is_online), 'ts': state.last_activity.timestamp()})
+        pipe.sadd(self._dirty_key, user_id)
+        if state.is_online:
+            pipe.sadd(self._online_key, user_id)
+        else:
+            pipe.srem(self._online_key, user_id)
+        previous = pipe.execute()[0]
+        return self._decode(previous), state
+
+    def touch(self, user_id, when=None):
+        when = when or timezone.now()
+        key = self._key(user_id)
+        pipe = self._redis.pipeline()
+        pipe.hset(key, 'ts', when.timestamp())
+        pipe.sadd(self._dirty_key, user_id)
+        pipe.hget(key, 'on')
+        is_online = pipe.execute()[2]
+        return PresenceState(None if is_online is None else is_online == b'1', when)
+
+    def get(self, user_id):
+        return self._decode(self._redis.hgetall(self._key(user_id)))
+
+    def get_many(self, user_ids):
+        user_ids = list(user_ids)
+        pipe = self._redis.pipeline()
+        for uid in user_ids:
+            pipe.hgetall(self._key(uid))
+        states = {}
+        for uid, raw in zip(user_ids, pipe.execute()):
+            state = self._decode(raw)
+            if state is not None:
+                states[uid] = state
+        return states
+
+    def online_ids(self):
+        return [int(uid) for uid in self._redis.smembers(self._online_key)]
+
+    def drain(self):
+        ids = [int(uid) for uid in self._redis.spop(self._dirty_key, 10000) or []]
+        return self.get_many(ids)
+
+    def restore(self, states):
+        if states:
+            self._redis.sadd(self._dirty_key, *states)
+
+    @staticmethod
+    def _connections_key(user_id):
+        return f'user_ws_{user_id}'
+
+    def add_connection(self, user_id, channel_name):
+        key = self._connections_key(user_id)
+        pipe = self._redis.pipeline()
+        pipe.sadd(key, channel_name)
+        pipe.scard(key)
+        return pipe.execute()[1]
+
+    def remove_connection(self, user_id, channel_name):
+        key = self._connections_key(user_id)
+        pipe = self._redis.pipeline()
+        pipe.srem(key, channel_name)
+        pipe.scard(key)
+        return pipe.execute()[1]
+
+    def connection_count(self, user_id):
+        return self._redis.scard(self._connections_key(user_id))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_presence_store():
+    """Retorna o store de presença do processo, iniciando o flusher na primeira chamada."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if presence_setting('BACKEND') == 'redis':
+                    store = RedisPresenceStore(
+                        presence_setting('REDIS_URL'),
+                        presence_setting('KEY_PREFIX'),
+                    )
+                else:
+                    store = MemoryPresenceStore()
+                interval = presence_setting('FLUSH_INTERVAL')
+                if interval:
+                    PresenceFlusher(store, interval).start()
+                _store = store
+    return _store
+
+
+def set_presence(user_id, is_online, when=None):
+    """
+    Atalho para registrar o estado de presença no store do processo (fora
+    do WebSocket). Envia ``presence_changed`` se ``is_online`` mudou.
+    """
+    previous, state = get_presence_store().set(user_id, is_online, when)
+    if previous is None or previous.is_online != state.is_online:
+        presence_changed.send(sender=set_presence, user_id=user_id, state=state)
+    return previous, state
+
+
+async def apresence(method, *args):
+    """
+    Executa uma operação do store a partir de código assíncrono. Stores que
+    fazem I/O (Redis) rodam em thread para não bloquear o event loop.
+    """
+    store = get_presence_store()
+    func = getattr(store, method)
+    with db_seconds.time(method=f'presence.{method}'):
+        if store.blocking:
+            return await sync_to_async(func, thread_sensitive=False)(*args)
+        return func(*args)
+
+
+def resolve_presence(users) -> Dict[int, PresenceState]:
+    """
+    Retorna o estado de presença de cada usuário, priorizando o store e
+    usando os campos do banco para quem ainda não tem estado registrado.
+    """
+    users = list(users)
+    states = get_presence_store().get_many([user.id for user in users])
+    for user in users:
+        state = states.get(user.id)
+        if state is None:
+            states[user.id] = PresenceState(user.is_online, user.last_activity)
+        elif state.is_online is None:
+            states[user.id] = state._replace(is_online=user.is_online)
+    return states
+
+
+def to_version(value: Optional[datetime]) -> int:
+    """Converte um timestamp na versão (milissegundos desde a época)."""
+    return int(value.timestamp() * 1000) if value else 0
+
+
+def presence_snapshot(since: Optional[int] = None):
+    """
+    Monta o snapshot de presença.
+
+    Sem ``since`` retorna todos os usuários; com ``since`` retorna apenas os
+    alterados desde aquela versão, usando os índices de ``last_activity`` e
+    ``updated_at``. A janela é recuada em dois intervalos de flush para
+    cobrir estados ainda não gravados por outros workers. Retorna
+    ``(versao, linhas)``.
+    """
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+
+    queryset = User.objects.only('id', 'nome', 'email', 'is_online', 'last_activity', 'updated_at')
+    if since is not None:
+        lag = timedelta(seconds=2 * (presence_setting('FLUSH_INTERVAL') or 0))
+        cutoff = datetime.fromtimestamp(since / 1000, tz=dt_timezone.utc) - lag
+        queryset = queryset.filter(Q(last_activity__gte=cutoff) | Q(updated_at__gte=cutoff))
+
+    users = list(queryset.order_by('id'))
+    presence = resolve_presence(users)
+    version = since or 0
+    rows = []
+    for user in users:
+        state = presence[user.id]
+        version = max(version, to_version(state.last_activity), to_version(user.updated_at))
+        rows.append({
+            'user_id': user.id,
+            'nome': user.nome,
+            'email': user.email,
+            'is_online': state.is_online,
+            'last_activity': state.last_activity,
+        })
+    return version, rows
+
+
+def flush_presence(store=None) -> int:
+    """
+    Grava no banco os estados pendentes do store com um UPDATE por lote.
+
+    Retorna o número de usuários gravados.
+    """
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+
+    store = store or get_presence_store()
+    states = store.drain()
+    if not states:
+        return 0
+
+    batch_size = presence_setting('FLUSH_BATCH_SIZE')
+    items = sorted(states.items())
+    try:
+        with db_seconds.time(method='flush_presence'):
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
+                User.objects.filter(id__in=[uid for uid, _ in batch]).update(
+                    is_online=Case(
+                        *[
+                            When(id=uid, then=Value(state.is_online))
+                            for uid, state in batch if state.is_online is not None
+                        ],
+                        default=F('is_online'),
+                    ),
+                    last_activity=Case(
+                        *[When(id=uid, then=Value(state.last_activity)) for uid, state in batch],
+                        default=F('last_activity'),
+                    ),
+                )
+    except Exception:
+        store.restore(states)
+        raise
+    return len(states)
+
+
+class PresenceFlusher(PeriodicFlusher):
+    """
+    Thread daemon que executa ``flush_presence`` a cada ``interval`` segundos
+    e, se ``SWEEP_INTERVAL`` estiver configurado, a varredura de inativos.
+    """
+    logger = logger
+    discarded_message = 'Banco alterado desde o início do flusher; presença pendente descartada'
+
+    def __init__(self, store, interval):
+        super().__init__(interval, name='presence-flusher')
+        self.store = store
+        self.sweep_interval = presence_setting('SWEEP_INTERVAL')
+        self.next_sweep = time.monotonic() + (self.sweep_interval or 0)
+
+    def get_model(self):
+        from django.contrib.auth import get_user_model
+
+        return get_user_model()
+
+    def tick(self):
+        self.flush()
+        if self.sweep_interval and time.monotonic() >= self.next_sweep:
+            self.sweep()
+            self.next_sweep = time.monotonic() + self.sweep_interval
+
+    def sweep(self):
+        from .sweeper import sweep_inactive_users
+
+        try:
+            sweep_inactive_users()
+        except Exception:
+            logger.exception('Erro na varredura de usuários inativos')
+
+    def flush(self):
+        try:
+            flushed = flush_presence(self.store)
+            if flushed:
+                logger.debug('Presença gravada para %d usuários', flushed)
+        except Exception:
+            logger.exception('Erro ao gravar presença no banco')
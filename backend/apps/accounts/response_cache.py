@@ -0,0 +1,160 @@
+"""
+Cache das respostas de leitura de usuários (listagem, ``me`` e status).
+
+Guarda os bytes já renderizados no cache do Django (``CACHES``: memória
+local ou Redis), em chaves que incluem números de geração:
+
+* ``users``: incrementada pelos sinais de ``User`` (e pela criação em
+  lote, que não dispara ``post_save``);
+* ``presence``: incrementada quando ``is_online`` de alguém muda, já que
+  a listagem e o ``me`` trazem o estado do store de presença;
+* ``user:<id>``: incrementada pelas duas anteriores, só para o usuário
+  afetado (usada pelo ``me``).
+
+Invalidar é um ``incr`` por geração; as entradas antigas deixam de ser
+lidas e expiram sozinhas. O status muda também com ``last_activity``,
+que não gera invalidação: é guardado só por ``STATUS_TIMEOUT`` segundos.
+
+Com mais de um worker use o Redis como cache, para que a invalidação
+feita em um processo valha para todos.
+"""
+import asyncio
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+from .generations import bump_generation, get_generations
+from .metrics import registry
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE': 'default',  # alias em CACHES
+    'KEY_PREFIX': 'responses',
+    'TIMEOUT': 300,  # segundos; as gerações invalidam antes disso
+    'STATUS_TIMEOUT': 2,  # status/: atraso máximo de last_activity
+}
+
+response_cache_requests_total = registry.counter(
+    'response_cache_requests_total', 'Consultas ao cache de respostas por view e resultado', ['view', 'result'])
+response_cache_bytes_served_total = registry.counter(
+    'response_cache_bytes_served_total', 'Bytes de respostas servidos do cache', ['view'])
+response_cache_invalidations_total = registry.counter(
+    'response_cache_invalidations_total', 'Gerações do cache de respostas incrementadas', ['generation'])
+
+stats = {'hits': 0, 'misses': 0}
+
+
+def response_cache_setting(name):
+    return getattr(settings, 'RESPONSE_CACHE', {}).get(name, DEFAULTS[name])
+
+
+def get_cache():
+    return caches[response_cache_setting('CACHE')]
+
+
+def _generation_key(name):
+    return f'{response_cache_setting("KEY_PREFIX")}:gen:{name}'
+
+
+def generations(*names):
+    """Retorna as gerações atuais, unidas em uma string para compor a chave."""
+    keys = [_generation_key(name) for name in names]
+    values = get_generations(get_cache(), keys)
+    return '.'.join(str(values[key]) for key in keys)
+
+
+def bump(*names):
+    """Incrementa as gerações, invalidando todas as respostas que dependem delas."""
+    cache = get_cache()
+    for name in names:
+        bump_generation(cache, _generation_key(name))
+        response_cache_invalidations_total.inc(generation=name.split(':')[0])
+
+
+def bump_on_commit(*names, using=None):
+    """``bump`` após o commit, para que ninguém guarde os dados antigos na geração nova."""
+    transaction.on_commit(lambda: bump(*names), using=using)
+
+
+def bump_soon(*names):
+    """
+    ``bump`` para quem pode estar no event loop (broadcast de presença):
+    lá roda em thread, para um cache Redis não bloquear o loop.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        bump(*names)
+    else:
+        loop.run_in_executor(None, bump, *names)
+
+
+def make_key(view, request, *parts):
+    """Chave da resposta; ``None`` se ela não deve ser cacheada."""
+    if not response_cache_setting('ENABLED') or request.method != 'GET':
+        return None
+    # Só o JSON: a API navegável depende do usuário, CSRF etc.
+    renderer = getattr(request, 'accepted_renderer', None)
+    if renderer is None or renderer.format != 'json':
+        return None
+    raw = ':'.join(str(part) for part in (request.accepted_media_type, *parts))
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'{response_cache_setting("KEY_PREFIX")}:{view}:{digest}'
+
+
+def lookup(view, key):
+    """Retorna o valor guardado (uma tupla cujo último item são os bytes) ou ``None``."""
+    value = get_cache().get(key)
+    if value is None:
+        stats['misses'] += 1
+        response_cache_requests_total.inc(view=view, result='miss')
+        return None
+    stats['hits'] += 1
+    response_cache_requests_total.inc(view=view, result='hit')
+    response_cache_bytes_served_total.inc(len(value[-1]), view=view)
+    return value
+
+
+def store(view, key, value, timeout=None):
+    get_cache().set(key, value, timeout if timeout is not None else response_cache_setting('TIMEOUT'))
+
+
+class CachedResponseMixin:
+    """
+    Para views do DRF: serve o ``GET`` do cache quando a chave de
+    ``get_response_cache_key`` existe e guarda os bytes das respostas 200.
+    """
+    response_cache_view = None
+
+    def get_response_cache_key(self, request):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        self._response_cache_key = self.get_response_cache_key(request)
+        if self._response_cache_key is not None:
+            cached = lookup(self.response_cache_view, self._response_cache_key)
+            if cached is not None:
+                content_type, content = cached
+                return HttpResponse(content, content_type=content_type)
+        return super().get(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, '_response_cache_key', None)
+        if key is not None and isinstance(response, Response) and response.status_code == 200:
+            response.render()
+            store(self.response_cache_view, key, (response['Content-Type'], response.content))
+        return response
+
+
+@registry.add_collector
+def collect_response_cache_stats():
+    total = stats['hits'] + stats['misses']
+    return [
+        ('response_cache_hit_ratio', 'Fração das consultas ao cache de respostas atendidas por ele',
+         stats['hits'] / total if total else 0.0),
+    ]
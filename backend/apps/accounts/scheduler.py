@@ -0,0 +1,81 @@
+"""
+Agendamento da transição para offline após a desconexão.
+
+Quando o último socket de um usuário fecha, a verificação de offline é
+agendada no event loop (``loop.call_later``) para depois do período de
+tolerância, e o ``disconnect`` retorna imediatamente. Uma reconexão dentro
+da janela cancela a verificação sem tocar no store nem no banco.
+"""
+import asyncio
+import logging
+
+from .broadcast import get_broadcaster
+from .metrics import registry
+from .presence import apresence, presence_setting
+
+logger = logging.getLogger(__name__)
+
+
+class OfflineScheduler:
+    """Mantém um timer pendente por usuário desconectado."""
+
+    def __init__(self, grace=None):
+        self.grace = grace if grace is not None else presence_setting('OFFLINE_GRACE')
+        self._pending = {}
+        self.stats = {
+            'scheduled': 0,
+            'cancelled': 0,
+            'fired': 0,
+            'went_offline': 0,
+        }
+
+    def __len__(self):
+        return len(self._pending)
+
+    def schedule(self, user_id, channel_layer):
+        """Agenda a verificação de offline, substituindo uma anterior."""
+        self.cancel(user_id, count=False)
+        loop = asyncio.get_running_loop()
+        self._pending[user_id] = loop.call_later(
+            self.grace, self._fire, user_id, channel_layer
+        )
+        self.stats['scheduled'] += 1
+
+    def cancel(self, user_id, count=True) -> bool:
+        """Cancela a verificação pendente; retorna se havia uma."""
+        handle = self._pending.pop(user_id, None)
+        if handle is None:
+            return False
+        handle.cancel()
+        if count:
+            self.stats['cancelled'] += 1
+        return True
+
+    def _fire(self, user_id, channel_layer):
+        self._pending.pop(user_id, None)
+        self.stats['fired'] += 1
+        asyncio.get_running_loop().create_task(self._check(user_id, channel_layer))
+
+    async def _check(self, user_id, channel_layer):
+        try:
+            # Outro worker pode ter recebido a reconexão
+            if await apresence('connection_count', user_id):
+                return
+            previous, state = await apresence('set', user_id, False)
+            self.stats['went_offline'] += 1
+            get_broadcaster(channel_layer).publish(user_id, previous, state)
+        except Exception:
+            logger.exception('Erro ao verificar offline do usuário %s', user_id)
+
+
+offline_scheduler = OfflineScheduler()
+
+
+@registry.add_collector
+def collect_scheduler_stats():
+    metrics = [('presence_offline_pending', 'Verificações de offline agendadas', len(offline_scheduler))]
+    metrics.extend(
+        (f'presence_offline_{name}', f'Agendador de offline: {name} (acumulado)', value)
+        for name, value in offline_scheduler.stats.items()
+    )
+    return metrics
@@ -0,0 +1,88 @@
+"""
+Índice de busca de usuários.
+
+Cada palavra de ``nome`` e ``email`` vira um token normalizado (minúsculo,
+sem acentos) na tabela ``UserSearchToken``. A busca por prefixo é uma
+consulta de intervalo no índice de ``token`` (``token >= termo AND
+token < termo + U+FFFF``), que funciona com B-tree em qualquer banco, ao
+contrário de ``icontains``.
+"""
+import re
+import unicodedata
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db.models import Q
+
+TOKEN_MAX_LENGTH = 64
+_SPLIT_RE = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def tokenize(*values):
+    """Retorna o conjunto de tokens indexáveis dos valores informados."""
+    tokens = set()
+    for value in values:
+        for token in _SPLIT_RE.split(normalize(value)):
+            if token:
+                tokens.add(token[:TOKEN_MAX_LENGTH])
+    return tokens
+
+
+def user_tokens(user):
+    return tokenize(user.nome, user.email)
+
+
+def index_users(users):
+    """Recria os tokens de busca dos usuários informados."""
+    from .models import UserSearchToken
+
+    users = list(users)
+    if not users:
+        return
+    UserSearchToken.objects.filter(user__in=users).delete()
+    UserSearchToken.objects.bulk_create(
+        [
+            UserSearchToken(user=user, token=token)
+            for user in users
+            for token in user_tokens(user)
+        ],
+        batch_size=500,
+    )
+
+
+def search_users(queryset, search):
+    """
+    Filtra o queryset pelo termo de busca.
+
+    Ids numéricos e emails completos usam o caminho rápido de igualdade;
+    o restante exige que cada termo seja prefixo de algum token do usuário.
+    """
+    from .models import UserSearchToken
+
+    search = search.strip()
+    if not search:
+        return queryset
+
+    if search.isdigit():
+        return queryset.filter(id=int(search))
+
+    if '@' in search:
+        try:
+            validate_email(search)
+        except ValidationError:
+            pass
+        else:
+            local, _, domain = search.rpartition('@')
+            return queryset.filter(Q(email=search) | Q(email=f'{local}@{domain.lower()}'))
+
+    for term in tokenize(search):
+        matching = UserSearchToken.objects.filter(
+            token__gte=term, token__lt=term + '\uffff'
+        ).values('user_id')
+        queryset = queryset.filter(id__in=matching)
+    return queryset
@@ -1,12 +1,25 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError as DjangoValidationError
+from .audit import audit_users, prefetch_audit_users
+from .presence import resolve_presence
 
 User = get_user_model()
 
+class PresenceListSerializer(serializers.ListSerializer):
+    """Resolve a presença da página inteira com um ``get_many`` antes de serializar as linhas."""
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, 'all') else data)
+        self.context['_presence'] = resolve_presence(items)
+        return super().to_representation(items)
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
+        list_serializer_class = PresenceListSerializer
         fields = [
             'id', 
             'email', 
@@ -20,6 +33,15 @@ class UserSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'last_login', 'created_at']
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # O store de presença tem o estado mais recente que o banco
+        states = self.context.get('_presence')
+        if states is None or instance.id not in states:
+            states = resolve_presence([instance])
+        data['is_online'] = states[instance.id].is_online
+        return data
+
 class UserCreateSerializer(serializers.ModelSerializer):
     password = serializers.CharField(
         write_only=True,
@@ -64,6 +86,30 @@ class UserCreateSerializer(serializers.ModelSerializer):
         user = User.objects.create_user(**validated_data)
         return user
 
+class UserBulkRowSerializer(serializers.Serializer):
+    """
+    Valida uma linha da criação em lote (JSON ou CSV), sem consultar o banco
+    """
+    email = serializers.EmailField()
+    nome = serializers.CharField(max_length=255)
+    password = serializers.CharField(write_only=True)
+    is_active = serializers.BooleanField(default=True)
+    is_staff = serializers.BooleanField(default=False)
+
+    def validate_email(self, value):
+        return User.objects.normalize_email(value)
+
+    def validate(self, attrs):
+        """
+        Aplica os validadores de senha com os dados da própria linha
+        """
+        user = User(email=attrs['email'], nome=attrs['nome'])
+        try:
+            validate_password(attrs['password'], user)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError({'password': list(e.messages)})
+        return attrs
+
 class UserSchema(serializers.ModelSerializer):
     is_online = serializers.BooleanField(read_only=True)
     last_activity = serializers.DateTimeField(read_only=True)
@@ -74,4 +120,48 @@ class UserSchema(serializers.ModelSerializer):
             'id', 'email', 'nome', 'is_active', 'is_staff', 
             'is_superuser', 'is_online', 'last_activity',
             'created_at', 'updated_at'
-        ]
\ No newline at end of file
+        ]
+
+
+class AuditUserField(serializers.Field):
+    """``{id, nome}`` do usuário, lido do cache de ``prefetch_audit_users``."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, user_id):
+        return audit_users(self.context).get(user_id)
+
+
+class AuditListSerializer(serializers.ListSerializer):
+    """Resolve os usuários de auditoria da página inteira antes de serializar as linhas."""
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, 'all') else data)
+        prefetch_audit_users(self.context, items)
+        return super().to_representation(items)
+
+
+class AuditSerializerMixin(serializers.Serializer):
+    """
+    Campos de auditoria para serializers de ``AuditModel``. Inclua
+    ``AUDIT_FIELDS`` em ``Meta.fields`` e herde ``Meta`` de
+    ``AuditSerializerMixin.Meta`` (serializador de lista que faz o
+    ``in_bulk``).
+    """
+    usuario_cadastro_id = serializers.IntegerField(read_only=True)
+    usuario_alteracao_id = serializers.IntegerField(read_only=True)
+    usuario_cadastro = AuditUserField(source='usuario_cadastro_id')
+    usuario_alteracao = AuditUserField(source='usuario_alteracao_id')
+
+    class Meta:
+        list_serializer_class = AuditListSerializer
+
+    def to_representation(self, instance):
+        # Numa lista já está tudo no cache; sozinho, custa um in_bulk
+        prefetch_audit_users(self.context, [instance])
+        return super().to_representation(instance)
+
+
+AUDIT_FIELDS = ['usuario_cadastro_id', 'usuario_alteracao_id', 'usuario_cadastro', 'usuario_alteracao']
@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth_cache import bump_user_generation, token_user_cache
+from .presence import presence_changed
+from .response_cache import bump_on_commit, bump_soon
+from .search import index_users
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_token_cache(sender, instance, using=None, **kwargs):
+    """
+    Descarta os snapshots em cache do usuário alterado ou removido, neste
+    processo e (pela geração no cache compartilhado) nos demais.
+    """
+    token_user_cache.invalidate_user(instance.pk)
+    user_id = instance.pk
+    transaction.on_commit(lambda: bump_user_generation(user_id), using=using)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_response_cache(sender, instance, using=None, raw=False, **kwargs):
+    """Invalida a listagem, o status e o ``me`` do usuário em cache."""
+    if raw:
+        return
+    bump_on_commit('users', f'user:{instance.pk}', using=using)
+
+
+@receiver(presence_changed)
+def invalidate_presence_responses(sender, user_id, state, **kwargs):
+    """A listagem e o ``me`` trazem ``is_online`` do store de presença."""
+    bump_soon('presence', f'user:{user_id}')
+
+
+@receiver(post_save, sender=User)
+def update_search_index(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Mantém os tokens de busca sincronizados com nome/email."""
+    if raw:
+        return
+    if update_fields is not None and not {'nome', 'email'} & set(update_fields):
+        return
+    index_users([instance])
@@ -0,0 +1,126 @@
+"""
+Medições de inicialização executadas em um processo novo, como um worker
+Daphne recém-criado pelo autoscaling.
+
+Rodado pelos comandos ``profile_imports`` e ``bench_startup`` com
+``python [-X importtime] -m apps.accounts.startup_probe <modo> ...``;
+imprime um JSON na saída padrão. Não importa nada do Django no topo: o
+que importa é medido.
+
+* ``imports``: tempo das fases do ``django.setup()`` (settings, módulos
+  dos apps, models, ``ready()`` de cada app), do ``api.asgi`` e do URLconf.
+* ``websocket <banco> <token> <camada>``: tempo até o primeiro WebSocket
+  aceito (``ws/status/``) pela aplicação ASGI recém-importada.
+"""
+import json
+import os
+import sys
+import time
+
+STARTED = time.perf_counter()
+STARTED_WALL = time.time()
+
+
+def elapsed_ms(since):
+    return round((time.perf_counter() - since) * 1000, 2)
+
+
+def timed_app_configs(timings):
+    """Mede ``import_models``/``ready`` de cada app durante o ``populate``."""
+    from django.apps.config import AppConfig
+
+    create = AppConfig.create.__func__
+
+    def timed(app_config, name):
+        method = getattr(app_config, name)
+
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                timings.setdefault(app_config.label, {})[f'{name}_ms'] = elapsed_ms(started)
+
+        setattr(app_config, name, wrapper)
+
+    def timed_create(cls, entry):
+        started = time.perf_counter()
+        app_config = create(cls, entry)
+        timings.setdefault(app_config.label, {})['import_ms'] = elapsed_ms(started)
+        timed(app_config, 'import_models')
+        timed(app_config, 'ready')
+        return app_config
+
+    AppConfig.create = classmethod(timed_create)
+
+
+def probe_imports():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
+    started = time.perf_counter()
+    import django
+    from django.conf import settings
+    settings.INSTALLED_APPS  # noqa: B018 - força o import das settings
+    phases = {'settings_ms': elapsed_ms(started)}
+
+    apps = {}
+    timed_app_configs(apps)
+    started = time.perf_counter()
+    django.setup()
+    phases['setup_ms'] = elapsed_ms(started)
+
+    started = time.perf_counter()
+    import api.asgi  # noqa: F401
+    phases['asgi_ms'] = elapsed_ms(started)
+
+    started = time.perf_counter()
+    from django.urls import get_resolver
+    get_resolver().url_patterns  # noqa: B018 - importa o URLconf e as views
+    phases['urls_ms'] = elapsed_ms(started)
+    phases['total_ms'] = elapsed_ms(STARTED)
+    return {'phases': phases, 'apps': apps, 'modules': sorted(sys.modules)}
+
+
+def probe_websocket(db_name, token, layer):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
+    import asyncio
+
+    started = time.perf_counter()
+    from api.asgi import application
+    import_ms = elapsed_ms(started)
+
+    from django.conf import settings
+    from django.db import connections
+    # Usa o banco de teste criado pelo processo principal
+    for alias in connections:
+        connections[alias].settings_dict['NAME'] = db_name
+    if layer == 'memory':
+        settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+    from channels.testing import WebsocketCommunicator
+
+    async def connect():
+        communicator = WebsocketCommunicator(application, f'/ws/status/?token={token}')
+        connected, _ = await communicator.connect(timeout=10)
+        return connected
+
+    started = time.perf_counter()
+    connected = asyncio.run(connect())
+    return {
+        'accepted': connected,
+        'accepted_at': time.time(),
+        'probe_started_at': STARTED_WALL,
+        'import_ms': import_ms,
+        'first_accept_ms': elapsed_ms(started),
+        'total_ms': elapsed_ms(STARTED),
+        'channels_redis_loaded': 'channels_redis' in sys.modules,
+        'drf_spectacular_loaded': 'drf_spectacular' in sys.modules,
+    }
+
+
+if __name__ == '__main__':
+    mode, args = sys.argv[1], sys.argv[2:]
+    result = probe_imports() if mode == 'imports' else probe_websocket(*args)
+    sys.stdout.write(json.dumps(result) + '\n')
+    sys.stdout.flush()
+    # Sem esperar threads de fundo (flusher de presença etc.)
+    os._exit(0)
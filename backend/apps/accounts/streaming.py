@@ -0,0 +1,32 @@
+"""
+Respostas em streaming que entregam as partes à medida que são geradas.
+
+Servido por ASGI, o ``StreamingHttpResponse`` consome por inteiro um
+iterador síncrono antes de enviar a primeira parte. Nesse caso o
+iterador é avançado em uma thread, algumas partes por vez, no mesmo
+contexto da view (mesma conexão com o banco, o que os cursores do lado do
+servidor exigem).
+"""
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+
+async def iterate_in_thread(iterable, parts=1):
+    iterator = iter(iterable)
+    next_parts = sync_to_async(lambda: list(islice(iterator, parts)), thread_sensitive=True)
+    while True:
+        chunk = await next_parts()
+        if not chunk:
+            return
+        for part in chunk:
+            yield part
+
+
+def streaming_response(request, parts, **kwargs):
+    """``StreamingHttpResponse`` que não acumula as partes nem em WSGI nem em ASGI."""
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        parts = iterate_in_thread(parts)
+    return StreamingHttpResponse(parts, **kwargs)
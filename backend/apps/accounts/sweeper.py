@@ -0,0 +1,113 @@
+"""
+Varredura periódica de usuários inativos.
+
+Marca como offline os usuários online sem atividade há mais de
+``PRESENCE['INACTIVE_THRESHOLD']`` segundos, em lotes limitados pelo índice
+``(is_online, last_activity)``, e avisa os clientes WebSocket com um único
+frame ``status.batch``.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.db import router
+from django.utils import timezone
+
+from .broadcast import STATUS_GROUP, serialize_state
+from .metrics import db_seconds, registry
+from .presence import PresenceState, flush_presence, get_presence_store, presence_changed, presence_setting
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+sweep_stats = {
+    'runs': 0,
+    'rows': 0,
+    'last_rows': 0,
+    'last_duration': 0.0,
+}
+
+
+def sweep_inactive_users(threshold=None, chunk_size=None, broadcast=True):
+    """
+    Executa uma varredura e retorna a lista de ids marcados como offline.
+    """
+    threshold = threshold if threshold is not None else presence_setting('INACTIVE_THRESHOLD')
+    chunk_size = chunk_size or presence_setting('SWEEP_CHUNK_SIZE')
+    started = time.monotonic()
+
+    store = get_presence_store()
+    # Grava antes a atividade pendente deste processo para não varrer quem está ativo
+    flush_presence(store)
+    cutoff = timezone.now() - timedelta(seconds=threshold)
+
+    swept = {}
+    last_id = 0
+    while True:
+        rows = list(
+            # Lê do primário: a réplica pode não ter o flush recém-feito
+            User.objects.db_manager(router.db_for_write(User))
+            .filter(is_online=True, last_activity__lt=cutoff, id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'last_activity')[:chunk_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        # O store pode ter atividade mais recente ainda não gravada
+        states = store.get_many([uid for uid, _ in rows])
+        chunk = {
+            uid: last_activity for uid, last_activity in rows
+            if uid not in states or states[uid].last_activity < cutoff
+        }
+        if chunk:
+            # updated_at: a auto_now não vale no update() e o delta de status/ (?since=) depende dele
+            User.objects.filter(id__in=list(chunk), is_online=True).update(
+                is_online=False, updated_at=timezone.now())
+            for uid, last_activity in chunk.items():
+                _, state = store.set(uid, False, last_activity)
+                presence_changed.send(sender=sweep_inactive_users, user_id=uid, state=state)
+            swept.update(chunk)
+
+    duration = time.monotonic() - started
+    db_seconds.observe(duration, method='sweep_inactive_users')
+    sweep_stats['runs'] += 1
+    sweep_stats['rows'] += len(swept)
+    sweep_stats['last_rows'] = len(swept)
+    sweep_stats['last_duration'] = duration
+    if swept:
+        logger.info('Varredura de inativos: %d usuários em %.3fs', len(swept), duration)
+        if broadcast:
+            broadcast_offline(swept)
+    return list(swept)
+
+
+def broadcast_offline(swept):
+    """Envia um único frame com todos os usuários varridos."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    users = [
+        serialize_state(uid, PresenceState(False, last_activity))
+        for uid, last_activity in swept.items()
+    ]
+    try:
+        async_to_sync(channel_layer.group_send)(STATUS_GROUP, {
+            'type': 'status.batch',
+            'users': users,
+        })
+    except Exception:
+        logger.exception('Erro ao enviar broadcast da varredura de inativos')
+
+
+@registry.add_collector
+def collect_sweep_stats():
+    return [
+        (f'presence_sweep_{name}', f'Varredura de inativos: {name}', value)
+        for name, value in sweep_stats.items()
+    ]
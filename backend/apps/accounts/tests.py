@@ -1,3 +1,624 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone as dj_timezone
+from rest_framework.renderers import JSONRenderer as DRFJSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import db_routing
+from apps.companies.models import Company
+from apps.contacts.models import Contact
+from apps.groups.models import Group
+
+from . import presence, wsprotocol
+from .audit import AuditLogWriter
+from .auth_cache import TokenUserCache, bump_user_generation, user_generation
+from .broadcast import PresenceBroadcaster, get_broadcaster
+from .consumers import JsonWebsocketConsumer
+from .jsoncodec import JSONRenderer
+from .metrics import Registry
+from .models import AuditLog
+from .presence import (
+    MemoryPresenceStore, PresenceFlusher, PresenceState, flush_presence, presence_snapshot, set_presence,
+    to_version,
+)
+from .scheduler import OfflineScheduler
+from .sweeper import sweep_inactive_users
+
+User = get_user_model()
+
+WHEN = datetime(2026, 10, 18, 8, 40, tzinfo=timezone.utc)
+
+
+class PresenceStoreTests(TestCase):
+    def setUp(self):
+        self.store = MemoryPresenceStore()
+        self.users = [
+            User.objects.create_user(email=f'presenca{i}@teste.local', password='x', nome=f'Presença {i}')
+            for i in range(3)
+        ]
+
+    def test_set_touch_and_drain(self):
+        previous, state = self.store.set(1, True, WHEN)
+        self.assertIsNone(previous)
+        self.assertEqual(self.store.set(1, False, WHEN)[0], state)
+        self.assertIsNone(self.store.touch(2, WHEN).is_online)
+
+        self.assertEqual(set(self.store.drain()), {1, 2})
+        self.assertEqual(self.store.drain(), {})
+        self.store.restore({1: state})
+        self.assertEqual(set(self.store.drain()), {1})
+
+    def test_connections_are_counted_per_user(self):
+        self.assertEqual(self.store.add_connection(1, 'a'), 1)
+        self.assertEqual(self.store.add_connection(1, 'b'), 2)
+        self.assertEqual(self.store.remove_connection(1, 'a'), 1)
+        self.assertEqual(self.store.remove_connection(1, 'b'), 0)
+        self.assertEqual(self.store.connection_count(1), 0)
+
+    def test_flush_writes_pending_states_in_one_update(self):
+        online, touched, untouched = self.users
+        self.store.set(online.id, True, WHEN)
+        self.store.touch(touched.id, WHEN)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(flush_presence(self.store), 2)
+        online.refresh_from_db()
+        touched.refresh_from_db()
+        untouched.refresh_from_db()
+        self.assertTrue(online.is_online)
+        self.assertEqual(online.last_activity, WHEN)
+        self.assertFalse(touched.is_online)
+        self.assertEqual(touched.last_activity, WHEN)
+        self.assertIsNone(untouched.last_activity)
+        self.assertEqual(flush_presence(self.store), 0)
+
+    def test_exit_flush_is_skipped_when_the_database_changed(self):
+        flusher = PresenceFlusher(self.store, 60)
+        self.store.set(self.users[0].id, True, WHEN)
+        flusher.database = 'outro.sqlite3'
+        with self.assertLogs('apps.accounts.presence', 'WARNING'):
+            flusher.stop()
+        self.users[0].refresh_from_db()
+        self.assertFalse(self.users[0].is_online)
+        self.assertEqual(set(self.store.drain()), {self.users[0].id})
+
+
+class RecordingChannelLayer:
+    def __init__(self):
+        self.sent = []
+
+    async def group_send(self, group, message):
+        self.sent.append((group, message))
+
+
+class PresenceBroadcasterTests(SimpleTestCase):
+    async def test_changes_in_a_tick_go_out_in_one_frame(self):
+        layer = RecordingChannelLayer()
+        broadcaster = PresenceBroadcaster(layer, tick=60)
+        online, offline = PresenceState(True, WHEN), PresenceState(False, WHEN)
+
+        broadcaster.publish(1, None, online)
+        broadcaster.publish(2, offline, online)
+        broadcaster.publish(2, online, online)  # heartbeat: não muda o estado
+        broadcaster.publish(1, online, offline)
+        await broadcaster.flush()
+        broadcaster._task.cancel()
+
+        self.assertEqual(len(layer.sent), 1)
+        group, message = layer.sent[0]
+        self.assertEqual(group, broadcaster.group)
+        self.assertEqual(
+            [(user['user_id'], user['is_online']) for user in message['users']],
+            [(1, False), (2, True)],
+        )
+        self.assertEqual(json.loads(message['text'])['users'], message['users'])
+        self.assertEqual(broadcaster.last_tick, {'events': 3, 'suppressed': 1, 'users': 2, 'frames_saved': 3})
+
+
+@mock.patch('apps.accounts.presence._store', MemoryPresenceStore())
+class OfflineSchedulerTests(SimpleTestCase):
+    async def test_reconnect_within_grace_cancels_the_check(self):
+        scheduler = OfflineScheduler(grace=0.01)
+        layer = RecordingChannelLayer()
+        presence.get_presence_store().set(1, True)
+        scheduler.schedule(1, layer)
+        self.assertTrue(scheduler.cancel(1))
+        await asyncio.sleep(0.05)
+        self.assertTrue(presence.get_presence_store().get(1).is_online)
+        self.assertEqual(scheduler.stats['fired'], 0)
+        self.assertEqual(len(scheduler), 0)
+
+    async def test_check_marks_offline_only_without_open_sockets(self):
+        scheduler = OfflineScheduler(grace=0.01)
+        layer = RecordingChannelLayer()
+        store = presence.get_presence_store()
+        store.set(1, True)
+        store.set(2, True)
+        store.add_connection(2, 'outro-worker')
+        scheduler.schedule(1, layer)
+        scheduler.schedule(2, layer)
+        await asyncio.sleep(0.05)
+
+        self.assertFalse(store.get(1).is_online)
+        self.assertTrue(store.get(2).is_online)
+        self.assertEqual(scheduler.stats['went_offline'], 1)
+        self.assertIn(1, get_broadcaster(layer)._pending)
+        get_broadcaster(layer)._task.cancel()
+
+
+@mock.patch('apps.accounts.presence._store', MemoryPresenceStore())
+class SweeperTests(TestCase):
+    def test_swept_users_show_up_in_the_status_delta(self):
+        idle = User.objects.create_user(email='inativo@teste.local', password='x', nome='Inativo')
+        active = User.objects.create_user(email='ativo@teste.local', password='x', nome='Ativo')
+        now = dj_timezone.now()
+        User.objects.filter(pk=idle.pk).update(is_online=True, last_activity=now - timedelta(minutes=10))
+        User.objects.filter(pk=active.pk).update(is_online=True, last_activity=now - timedelta(seconds=1))
+        since = to_version(dj_timezone.now())
+
+        self.assertEqual(sweep_inactive_users(threshold=60, broadcast=False), [idle.pk])
+        idle.refresh_from_db()
+        self.assertFalse(idle.is_online)
+
+        _, rows = presence_snapshot(since)
+        self.assertEqual([(row['user_id'], row['is_online']) for row in rows], [(idle.pk, False)])
+
+
+@mock.patch('apps.accounts.presence._store', MemoryPresenceStore())
+class UserActivityMiddlewareTests(TestCase):
+    def test_request_activity_is_buffered_not_written(self):
+        user = User.objects.create_user(email='atividade@teste.local', password='x', nome='Atividade')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(client.get('/api/v1/accounts/me/').status_code, 200)
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE')])
+
+        state = presence.get_presence_store().get(user.id)
+        self.assertIsNone(state.is_online)
+        flush_presence()
+        user.refresh_from_db()
+        self.assertEqual(user.last_activity, state.last_activity)
+        self.assertFalse(user.is_online)
+
+
+@mock.patch('apps.accounts.presence._store', MemoryPresenceStore())
+class PresenceSnapshotTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(email='snapshot@teste.local', password='x', nome='Snapshot')
+        self.other = User.objects.create_user(email='outro@teste.local', password='x', nome='Outro')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_full_snapshot_then_delta_since_version(self):
+        full = self.client.get('/api/v1/accounts/status/').json()
+        self.assertTrue(full['full'])
+        self.assertEqual({row['user_id'] for row in full['users']}, {self.user.id, self.other.id})
+
+        # Estado mais novo que o snapshot: só ele entra no delta
+        set_presence(self.other.id, True, dj_timezone.now() + timedelta(seconds=1))
+        delta = self.client.get('/api/v1/accounts/status/', {'since': full['version']}).json()
+        self.assertFalse(delta['full'])
+        self.assertEqual([(row['user_id'], row['is_online']) for row in delta['users']], [(self.other.id, True)])
+        self.assertGreater(delta['version'], full['version'])
+
+    def test_etag_answers_not_modified(self):
+        response = self.client.get('/api/v1/accounts/status/')
+        etag = response['ETag']
+        response = self.client.get('/api/v1/accounts/status/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get('/api/v1/accounts/status/', {'since': 'x'}).status_code, 400)
+
+
+class UserListPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        names = ['Ana Souza', 'Bruno Lima', 'João Sousa', 'Maria José', 'Pedro Alves']
+        cls.users = [
+            User.objects.create_user(email=f'lista{i}@teste.local', password='x', nome=nome)
+            for i, nome in enumerate(names)
+        ]
+
+    def setUp(self):
+        caches['default'].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def test_cursor_pages_cover_every_user_once(self):
+        seen = []
+        url = '/api/v1/accounts/?limit=2'
+        pages = 0
+        while url:
+            page = self.client.get(url).json()
+            seen.extend(user['id'] for user in page['results'])
+            url = page['next']
+            pages += 1
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, [user.id for user in reversed(self.users)])
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/v1/accounts/', {'cursor': 'x'}).status_code, 404)
+
+    def test_search_by_word_prefix_without_accents(self):
+        def search(term):
+            response = self.client.get('/api/v1/accounts/', {'search': term})
+            return {user['id'] for user in response.json()['results']}
+
+        ana, bruno, joao, maria, _ = self.users
+        self.assertEqual(search('jos'), {maria.id})
+        self.assertEqual(search('sou'), {ana.id, joao.id})
+        self.assertEqual(search('joao sou'), {joao.id})
+        self.assertEqual(search('lista1@TESTE.local'), {bruno.id})
+        self.assertEqual(search(str(maria.id)), {maria.id})
+
+    def test_page_presence_is_read_with_one_store_call(self):
+        store = presence.MemoryPresenceStore()
+        store.set(self.users[1].id, True)
+        with mock.patch('apps.accounts.presence._store', store), \
+                mock.patch.object(store, 'get_many', wraps=store.get_many) as get_many, \
+                mock.patch.object(store, 'get', wraps=store.get) as get:
+            results = self.client.get('/api/v1/accounts/').json()['results']
+        get_many.assert_called_once()
+        get.assert_not_called()
+        self.assertEqual({user['id'] for user in results if user['is_online']}, {self.users[1].id})
+
+
+class MetricsTests(SimpleTestCase):
+    def test_registry_renders_prometheus_text(self):
+        registry = Registry()
+        requests = registry.counter('teste_requests_total', 'Requisições', ['view'])
+        latency = registry.histogram('teste_seconds', 'Latência', buckets=(0.1, 1.0))
+        requests.inc(view='lista')
+        requests.inc(2, view='lista')
+        latency.observe(0.5)
+        registry.add_collector(lambda: [('teste_fila', 'Fila', 7)])
+
+        lines = registry.render().splitlines()
+        self.assertIn('# TYPE teste_requests_total counter', lines)
+        self.assertIn('teste_requests_total{view="lista"} 3', lines)
+        self.assertIn('teste_seconds_bucket{le="0.1"} 0', lines)
+        self.assertIn('teste_seconds_bucket{le="1.0"} 1', lines)
+        self.assertIn('teste_seconds_count 1', lines)
+        self.assertIn('teste_fila 7', lines)
+
+    def test_endpoint_is_local_only(self):
+        response = self.client.get('/metrics/', REMOTE_ADDR='127.0.0.1')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ws_handshake_seconds', response.content.decode())
+        self.assertEqual(self.client.get('/metrics/', REMOTE_ADDR='10.0.0.9').status_code, 403)
+
+
+class BulkCreateTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.admin = User.objects.create_user(
+            email='admin@teste.local', password='x', nome='Admin', is_staff=True)
+        User.objects.create_user(email='Existente@teste.local', password='x', nome='Existente')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def row(self, email, password='Senha-forte-123'):
+        return {'email': email, 'nome': 'Lote', 'password': password}
+
+    def test_duplicates_are_reported_case_insensitively(self):
+        response = self.client.post('/api/v1/accounts/bulk-create/', [
+            self.row('novo@teste.local'),
+            self.row('existente@teste.local'),
+            self.row('NOVO@teste.local'),
+            self.row('invalido'),
+            self.row('outro@teste.local'),
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual(body['created'], 2)
+        self.assertEqual([error['row'] for error in body['errors']], [2, 3, 4])
+        self.assertEqual(
+            sorted(User.objects.filter(id__in=body['ids']).values_list('email', flat=True)),
+            ['novo@teste.local', 'outro@teste.local'],
+        )
+        self.assertTrue(User.objects.get(email='novo@teste.local').check_password('Senha-forte-123'))
+
+    def test_email_created_concurrently_is_reported_not_a_500(self):
+        from . import bulk
+
+        User.objects.create_user(email='corrida@teste.local', password='x', nome='Corrida')
+        calls = []
+
+        def existing_emails(emails):
+            # A primeira verificação não vê o usuário criado "ao mesmo tempo"
+            calls.append(emails)
+            return set() if len(calls) == 1 else real_existing_emails(emails)
+
+        real_existing_emails = bulk.existing_emails
+        with mock.patch.object(bulk, 'existing_emails', existing_emails):
+            response = self.client.post('/api/v1/accounts/bulk-create/', [
+                self.row('corrida@teste.local'),
+                self.row('livre@teste.local'),
+            ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(response.json()['errors'][0]['row'], 1)
+        self.assertTrue(User.objects.filter(email='livre@teste.local').exists())
+
+
+def with_replica():
+    return mock.patch('api.db_routing.replica_aliases', lambda: ['replica_1'])
+
+
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(email='replica@teste.local', password='x', nome='Réplica')
+        self.factory = RequestFactory()
+        self.pinned = []
+
+        def get_response(request):
+            self.pinned.append(db_routing._pinned.get())
+            return HttpResponse(status=200)
+
+        self.middleware = db_routing.ReplicaRoutingMiddleware(get_response)
+
+    def request(self, method, user=None):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'} if user else {}
+        request = getattr(self.factory, method)('/api/v1/contatos/', **headers)
+        with with_replica():
+            self.middleware(request)
+        return self.pinned[-1]
+
+    def test_router_reads_from_replica_unless_pinned(self):
+        router = db_routing.PrimaryReplicaRouter()
+        with with_replica():
+            self.assertEqual(router.db_for_read(User), 'replica_1')
+            self.assertEqual(router.db_for_write(User), db_routing.PRIMARY)
+            token = db_routing._pinned.set(True)
+            try:
+                self.assertEqual(router.db_for_read(User), db_routing.PRIMARY)
+            finally:
+                db_routing._pinned.reset(token)
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        other = User.objects.create_user(email='replica2@teste.local', password='x', nome='Outra')
+        self.assertFalse(self.request('get', self.user))
+        self.assertTrue(self.request('post', self.user))
+        self.assertTrue(self.request('get', self.user))
+        self.assertFalse(self.request('get', other))
+        self.assertFalse(self.request('get'))
+
+    def test_local_memory_sticky_cache_is_flagged(self):
+        self.assertEqual(db_routing.check_sticky_cache(), [])
+        with with_replica():
+            self.assertEqual([warning.id for warning in db_routing.check_sticky_cache()], ['api.W001'])
+
+
+class TokenUserCacheTests(TestCase):
+    async def test_entry_is_dropped_when_the_user_generation_changes(self):
+        cache = TokenUserCache(max_size=10, ttl=60)
+        user = User(id=7001, email='token@teste.local', nome='Token')
+        cache.set('token', user, time.time() + 60, await user_generation(user.id))
+
+        cached = await cache.get('token')
+        self.assertEqual(cached.id, user.id)
+        self.assertIsNot(cached, user)
+
+        # Como o sinal de outro worker: só a geração compartilhada muda
+        bump_user_generation(user.id)
+        self.assertIsNone(await cache.get('token'))
+        self.assertEqual(cache.stats()['stale'], 1)
+        self.assertEqual(len(cache), 0)
+
+    async def test_lru_evicts_the_oldest_entry(self):
+        cache = TokenUserCache(max_size=2, ttl=60)
+        for i in range(3):
+            user = User(id=7100 + i, email=f'lru{i}@teste.local', nome='LRU')
+            cache.set(f'token{i}', user, time.time() + 60, await user_generation(user.id))
+        self.assertIsNone(await cache.get('token0'))
+        self.assertIsNotNone(await cache.get('token2'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_saving_a_user_bumps_the_generation_on_commit(self):
+        user = User.objects.create_user(email='geracao@teste.local', password='x', nome='Geração')
+        before = async_to_sync(user_generation)(user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.is_active = False
+            user.save()
+        self.assertNotEqual(async_to_sync(user_generation)(user.id), before)
+
+
+@override_settings(AUDIT={'FLUSH_INTERVAL': 0})
+class AuditTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(email=f'auditor{i}@teste.local', password='x', nome=f'Auditor {i}')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def create_rows(self, start, count):
+        for i in range(start, start + count):
+            cadastro, alteracao = self.users[i % 3], self.users[(i + 1) % 3]
+            audit = {'usuario_cadastro': cadastro, 'usuario_alteracao': alteracao}
+            grupo = Group.objects.create(nome=f'Grupo {i}', **audit)
+            empresa = Company.objects.create(nome=f'Empresa {i}', cnpj=f'{i:014d}', grupo=grupo, **audit)
+            Contact.objects.create(nome=f'Contato {i}', telefone=f'+55119{i:08d}', empresa=empresa, **audit)
+
+    def test_list_endpoints_use_a_fixed_number_of_queries(self):
+        # Uma consulta da listagem e um in_bulk para os usuários da página
+        for total in (1, 25):
+            self.create_rows(Group.objects.count(), total - Group.objects.count())
+            for url in ('/api/v1/empresas/', '/api/v1/contatos/', '/api/v1/grupos/'):
+                with self.subTest(url=url, total=total), self.assertNumQueries(2):
+                    response = self.client.get(url)
+                # Empresas e contatos são paginados por cursor
+                rows = response.data['results'] if 'results' in response.data else response.data
+                self.assertEqual(len(rows), total)
+                row = rows[0]
+                self.assertEqual(set(row['usuario_cadastro']), {'id', 'nome'})
+                self.assertEqual(row['usuario_alteracao']['id'], row['usuario_alteracao_id'])
+
+    def test_changes_are_logged_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/grupos/', {'nome': 'Holding'}, format='json')
+        group_id = response.data['id']
+        self.assertEqual(response.data['usuario_cadastro'], {'id': self.users[0].id, 'nome': 'Auditor 0'})
+
+        self.client.force_authenticate(self.users[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/v1/grupos/{group_id}/', {'nome': 'Holding SA'}, format='json')
+
+        entries = list(AuditLog.objects.filter(object_id=group_id).order_by('id'))
+        self.assertEqual([entry.action for entry in entries], ['create', 'update'])
+        self.assertEqual(entries[1].usuario_id, self.users[1].id)
+        self.assertEqual(entries[1].changes, {'nome': ['Holding', 'Holding SA']})
+        self.assertEqual(Group.objects.get(pk=group_id).usuario_alteracao_id, self.users[1].id)
+
+    def test_failing_batches_are_retried_then_set_aside(self):
+        group = Group.objects.create(nome='Holding')
+        entries = []
+
+        def entry(i):
+            entries.append(AuditLog(
+                content_type_id=1, object_id=group.id, action='update', changes={'nome': [i, i + 1]}))
+            return entries[-1]
+
+        writer = AuditLogWriter()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f'{tmp}/audit.jsonl'
+            audit = {'FLUSH_INTERVAL': 0, 'MAX_RETRIES': 3, 'MAX_BUFFER': 3, 'DEAD_LETTER': path}
+            failing = mock.patch.object(AuditLog.objects, 'db_manager', return_value=mock.Mock(
+                bulk_create=mock.Mock(side_effect=RuntimeError('banco fora'))))
+            with override_settings(AUDIT=audit), failing, self.assertLogs('apps.accounts.audit', 'ERROR'):
+                writer.add([entry(0), entry(1)])
+                self.assertEqual(writer.flush(), 0)
+                self.assertEqual(len(writer), 2)
+                # Pendências acima de MAX_BUFFER desviam o lote mais antigo
+                writer.add([entry(2), entry(3)])
+                self.assertEqual(writer.flush(), 0)
+                self.assertEqual(len(writer), 2)
+                # O lote restante esgota as tentativas
+                self.assertEqual(writer.flush(), 0)
+                self.assertEqual(len(writer), 2)
+                self.assertEqual(writer.flush(), 0)
+                self.assertEqual(len(writer), 0)
+            with open(path, encoding='utf-8') as file:
+                lines = [json.loads(line) for line in file]
+
+            # Com o banco de volta o writer segue gravando e o replay regrava o arquivo
+            with override_settings(AUDIT=audit):
+                writer.add([entry(4)])
+                self.assertEqual(writer.flush(), 1)
+                call_command('replay_audit_dead_letter', stdout=mock.Mock())
+            self.assertEqual(os.listdir(tmp), [])
+        self.assertEqual([line['changes']['nome'][0] for line in lines], [0, 1, 2, 3])
+        self.assertEqual(lines[0]['object_id'], group.id)
+        replayed = AuditLog.objects.filter(object_id=group.id, action='update').order_by('id')
+        self.assertEqual([log.changes['nome'][0] for log in replayed], [4, 0, 1, 2, 3])
+        self.assertEqual(replayed[1].created_at, entries[0].created_at)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='cache@teste.local', password='x', nome='Cache')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_is_served_from_cache_until_a_user_changes(self):
+        with self.assertNumQueries(1):
+            self.client.get('/api/v1/accounts/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/accounts/')
+        self.assertEqual(response.json()['results'][0]['nome'], 'Cache')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.nome = 'Cache 2'
+            self.user.save()
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/accounts/')
+        self.assertEqual(response.json()['results'][0]['nome'], 'Cache 2')
+
+    def test_me_follows_presence_changes(self):
+        self.assertFalse(self.client.get('/api/v1/accounts/me/').json()['is_online'])
+        set_presence(self.user.id, True)
+        self.assertTrue(self.client.get('/api/v1/accounts/me/').json()['is_online'])
+
+
+class LazySchemaTests(SimpleTestCase):
+    def test_generator_replaces_lazy_schema(self):
+        from drf_spectacular.openapi import AutoSchema
+
+        from api.openapi import SchemaGenerator
+        from api.schema import LazyAutoSchema
+
+        from .views import UserMeAPIView
+
+        self.assertIsInstance(UserMeAPIView().schema, LazyAutoSchema)
+        callback = UserMeAPIView.as_view()
+        view = SchemaGenerator().create_view(callback, 'GET')
+        self.assertIsInstance(view.schema, AutoSchema)
+        self.assertIs(view.schema.view, view)
+
+
+class JSONCodecTests(SimpleTestCase):
+    def test_renderer_output_matches_drf(self):
+        data = {
+            'quando': datetime(2026, 10, 18, 8, 40, 14, 443210, tzinfo=timezone.utc),
+            'valor': Decimal('10.50'),
+            'nome': 'Atendimento\u2028ç',
+            1: [None, True],
+        }
+        self.assertEqual(JSONRenderer().render(data), DRFJSONRenderer().render(data))
+
+
+class EchoConsumer(JsonWebsocketConsumer):
+    async def receive_json(self, content):
+        await self.send_json(content)
+        await self.send_json({'type': 'status.batch', 'users': [
+            {'user_id': 7, 'is_online': True, 'last_activity': '2026-10-18T08:40:14.443Z'},
+        ]})
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class WsProtocolTests(SimpleTestCase):
+    async def test_msgpack_is_negotiated_and_batches_events(self):
+        communicator = WebsocketCommunicator(EchoConsumer.as_asgi(), '/ws/', subprotocols=[wsprotocol.MSGPACK])
+        connected, subprotocol = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(subprotocol, wsprotocol.MSGPACK)
+
+        await communicator.send_to(bytes_data=wsprotocol.pack([wsprotocol.compact({'type': 'heartbeat'})]))
+        frame = await communicator.receive_from()
+        self.assertEqual(wsprotocol.unpack(frame), [
+            {'type': 'heartbeat'},
+            {'type': 'status.batch', 'users': [{'user_id': 7, 'is_online': True, 'last_activity': 1792312814443}]},
+        ])
+        await communicator.disconnect()
+
+    async def test_json_stays_the_default(self):
+        communicator = WebsocketCommunicator(EchoConsumer.as_asgi(), '/ws/')
+        connected, subprotocol = await communicator.connect()
+        self.assertIsNone(subprotocol)
+        await communicator.send_json_to({'type': 'heartbeat'})
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'heartbeat'})
+        await communicator.disconnect()
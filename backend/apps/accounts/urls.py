@@ -4,6 +4,7 @@ from .views import (
     CustomTokenObtainPairView,
     UserMeAPIView,
     UserCreateAPIView,
+    UserBulkCreateAPIView,
     UserListAPIView,
     UserUpdateAPIView,
     logout,
@@ -21,6 +22,7 @@ urlpatterns = [
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('me/', UserMeAPIView.as_view(), name='me'),
     path('create/', UserCreateAPIView.as_view(), name='create'),
+    path('bulk-create/', UserBulkCreateAPIView.as_view(), name='bulk_create'),
     path('', UserListAPIView.as_view(), name='list'),
     path('logout/', logout, name='logout'),
     path('change-password/', change_password, name='change-password'),
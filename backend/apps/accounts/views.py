@@ -5,47 +5,65 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
 from rest_framework.response import Response
-from .serializers import UserSerializer, UserCreateSerializer
+from .serializers import UserSerializer, UserCreateSerializer, UserBulkRowSerializer
 from rest_framework.decorators import api_view, permission_classes
 from django.contrib.auth.password_validation import validate_password
 from rest_framework.exceptions import ValidationError
 from django.db import transaction
 from datetime import datetime, timedelta
+from django.core.serializers.json import DjangoJSONEncoder
+from .presence import presence_snapshot, set_presence
+from .sweeper import sweep_inactive_users
+from .search import search_users
+from .pagination import KeysetPagination
+from .bulk import TooManyRows, bulk_create_users
+import csv
+from .metrics import metrics_setting, registry
+from . import response_cache
+from .response_cache import CachedResponseMixin
+from django.http import HttpResponse, HttpResponseForbidden
+import hashlib
+import json
 
 User = get_user_model()
 
-class UserListAPIView(generics.ListAPIView):
+class UserListAPIView(CachedResponseMixin, generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = UserSerializer
+    pagination_class = KeysetPagination
+    response_cache_view = 'users_list'
+
+    def get_response_cache_key(self, request):
+        # A URL completa: busca, cursor, limite e o host usado no link "next"
+        return response_cache.make_key(
+            self.response_cache_view, request,
+            response_cache.generations('users', 'presence'), request.build_absolute_uri(),
+        )
 
     def get_queryset(self):
         """
-        Permite filtrar usuários por múltiplos campos
+        Permite buscar usuários por id, email completo ou prefixos de
+        palavras do nome/email (índice de busca)
         """
-        queryset = User.objects.all().order_by('-created_at')
+        queryset = User.objects.all()
         search = self.request.query_params.get('search', None)
         
         if search:
-            # Cria um Q object para busca em múltiplos campos
-            search_filter = Q()
-            search_fields = [
-                'email__icontains',
-                'nome__icontains',
-                'id__icontains',
-            ]
-            
-            # Adiciona cada campo à busca (OR condition)
-            for field in search_fields:
-                search_filter |= Q(**{field: search})
-            
-            # Aplica o filtro
-            queryset = queryset.filter(search_filter)
+            queryset = search_users(queryset, search)
             
         return queryset
 
-class UserMeAPIView(generics.RetrieveAPIView):
+class UserMeAPIView(CachedResponseMixin, generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = UserSerializer
+    response_cache_view = 'users_me'
+
+    def get_response_cache_key(self, request):
+        user_id = request.user.id
+        return response_cache.make_key(
+            self.response_cache_view, request,
+            user_id, response_cache.generations(f'user:{user_id}'),
+        )
 
     def get_object(self):
         return self.request.user
@@ -66,6 +84,50 @@ class UserCreateAPIView(generics.CreateAPIView):
             status=status.HTTP_201_CREATED
         )
 
+class UserBulkCreateAPIView(generics.GenericAPIView):
+    """
+    Cria usuários em lote a partir de JSON (lista ou ``{"users": [...]}``)
+    ou de um CSV (``Content-Type: text/csv``) lido em streaming.
+    """
+    permission_classes = [permissions.IsAuthenticated, permissions.IsAdminUser]
+    serializer_class = UserBulkRowSerializer
+
+    def get_rows(self, request):
+        if request.content_type.startswith('text/csv'):
+            stream = request.stream
+            if stream is None:
+                return []
+            return csv.DictReader(line.decode('utf-8-sig') for line in stream)
+        data = request.data
+        if isinstance(data, dict):
+            data = data.get('users')
+        if not isinstance(data, list):
+            raise ValidationError({'detail': 'Envie uma lista de usuários'})
+        return data
+
+    def post(self, request, *args, **kwargs):
+        try:
+            created, errors = bulk_create_users(self.get_rows(request))
+        except TooManyRows as e:
+            return Response(
+                {'detail': f'Máximo de {e.args[0]} linhas por requisição'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        except (UnicodeDecodeError, csv.Error) as e:
+            return Response(
+                {'detail': f'CSV inválido: {str(e)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            {
+                'created': len(created),
+                'ids': [user.id for user in created],
+                'errors': errors,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        )
+
 class CustomTokenObtainPairView(TokenObtainPairView):
     def post(self, request, *args, **kwargs):
         response = super().post(request, *args, **kwargs)
@@ -78,9 +140,8 @@ class CustomTokenObtainPairView(TokenObtainPairView):
                 # Verifica se já existe outro usuário logado com este e-mail
                 # Se existir, não altera o is_online
                 user.last_login = timezone.now()
-                user.last_activity = timezone.now()
-                user.is_online = True
-                user.save(update_fields=['is_online', 'last_login', 'last_activity'])
+                user.save(update_fields=['last_login'])
+                set_presence(user.id, True, user.last_login)
         
         return response
 
@@ -92,11 +153,8 @@ def logout(request):
     """
     try:
         if request.user.is_authenticated:
-            # Atualiza apenas o usuário atual usando select_for_update() para evitar race conditions
-            with transaction.atomic():
-                user = User.objects.select_for_update().get(id=request.user.id)
-                user.is_online = False
-                user.save(update_fields=['is_online'])
+            # O store de presença é a fonte da verdade; o flusher grava no banco
+            set_presence(request.user.id, False)
             return Response(status=status.HTTP_200_OK)
         return Response(
             {'detail': 'Usuário não autenticado'},
@@ -154,20 +212,51 @@ def change_password(request):
 @permission_classes([permissions.IsAuthenticated])
 def get_users_status(request):
     """
-    Retorna o status de todos os usuários
+    Retorna o status dos usuários.
+
+    Sem parâmetros retorna o snapshot completo com a sua ``version``; com
+    ``?since=<version>`` retorna apenas os usuários alterados desde então.
+    Responde 304 quando o ``If-None-Match`` coincide com o ETag atual. O
+    JSON e o ETag ficam em cache por ``RESPONSE_CACHE['STATUS_TIMEOUT']``.
     """
+    since = request.query_params.get('since')
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return Response(
+                {'detail': 'Parâmetro since inválido'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
     try:
-        users = User.objects.all()
-        status_data = [
-            {
-                'user_id': user.id,
-                'nome': user.nome,
-                'email': user.email,
-                'is_online': user.is_online,
-                'last_activity': user.last_activity
-            } for user in users
-        ]
-        return Response(status_data)
+        key = response_cache.make_key(
+            'users_status', request, since, response_cache.generations('users', 'presence'),
+        )
+        cached = response_cache.lookup('users_status', key) if key is not None else None
+        if cached is not None:
+            etag, content_type, content = cached
+        else:
+            version, users = presence_snapshot(since)
+            status_data = {
+                'version': version,
+                'full': since is None,
+                'users': users,
+            }
+            canonical = json.dumps(status_data, cls=DjangoJSONEncoder, sort_keys=True)
+            etag = '"%s"' % hashlib.md5(canonical.encode()).hexdigest()
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        if key is None:
+            return Response(status_data, headers={'ETag': etag})
+        if cached is None:
+            content_type = request.accepted_media_type
+            content = request.accepted_renderer.render(status_data, content_type)
+            response_cache.store(
+                'users_status', key, (etag, content_type, content),
+                timeout=response_cache.response_cache_setting('STATUS_TIMEOUT'),
+            )
+        return HttpResponse(content, content_type=content_type, headers={'ETag': etag})
     except Exception as e:
         return Response(
             {'detail': f'Erro ao buscar status dos usuários: {str(e)}'},
@@ -183,16 +272,14 @@ def update_status(request):
     try:
         user = request.user
         if user.is_authenticated:
-            user.is_online = True
-            user.last_activity = timezone.now()
-            user.save(update_fields=['is_online', 'last_activity'])
+            _, state = set_presence(user.id, True)
             
             return Response({
                 'user_id': user.id,
                 'nome': user.nome,
                 'email': user.email,
-                'is_online': user.is_online,
-                'last_activity': user.last_activity
+                'is_online': state.is_online,
+                'last_activity': state.last_activity
             })
     except Exception as e:
         return Response(
@@ -207,15 +294,10 @@ def update_user_status(request):
     Atualiza o status do usuário (online/offline)
     """
     try:
-        with transaction.atomic():
-            user = request.user
-            status_type = request.data.get('status', 'online')
-            
-            user.is_online = status_type == 'online'
-            user.last_activity = timezone.now()
-            user.save(update_fields=['is_online', 'last_activity'])
-            
-            return Response({'status': 'success'})
+        status_type = request.data.get('status', 'online')
+        set_presence(request.user.id, status_type == 'online')
+        
+        return Response({'status': 'success'})
     except Exception as e:
         return Response(
             {'detail': f'Erro ao atualizar status: {str(e)}'},
@@ -223,23 +305,29 @@ def update_user_status(request):
         )
 
 @api_view(['GET'])
-def check_inactive_users():
+@permission_classes([permissions.IsAuthenticated, permissions.IsAdminUser])
+def check_inactive_users(request):
     """
-    Verifica e atualiza usuários inativos (executado periodicamente)
+    Executa manualmente a varredura de usuários inativos
     """
     try:
-        inactive_threshold = timezone.now() - timedelta(minutes=5)
-        with transaction.atomic():
-            # Atualiza usuários que não tiveram atividade nos últimos 5 minutos
-            User.objects.filter(
-                is_online=True,
-                last_activity__lt=inactive_threshold
-            ).update(
-                is_online=False
-            )
-        return Response({'status': 'success'})
+        swept = sweep_inactive_users()
+        return Response({'status': 'success', 'swept': len(swept)})
     except Exception as e:
         return Response(
             {'detail': f'Erro ao verificar usuários inativos: {str(e)}'},
             status=status.HTTP_400_BAD_REQUEST
-        )
\ No newline at end of file
+        )
+
+def metrics(request):
+    """
+    Métricas do worker no formato texto do Prometheus (apenas acesso local)
+    """
+    if request.META.get('REMOTE_ADDR') not in metrics_setting('ALLOWED_IPS'):
+        return HttpResponseForbidden()
+    # Garante que os coletores dos módulos de presença estejam registrados
+    from . import auth_cache, broadcast, scheduler, sweeper  # noqa: F401
+    return HttpResponse(
+        registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,120 @@
+"""
+Subprotocolo binário (msgpack) dos WebSockets.
+
+O cliente pede ``Sec-WebSocket-Protocol: dx.msgpack.v1`` no handshake;
+sem isso a conexão continua em frames de texto JSON. No msgpack:
+
+* cada frame binário é uma lista de eventos; eventos enviados dentro de
+  ``WS_PROTOCOL['BATCH_WINDOW']`` saem no mesmo frame;
+* as chaves são ids inteiros (``FIELD_IDS``) e o ``type`` também
+  (``EVENT_TYPE_IDS``); chaves fora da tabela seguem como texto;
+* ``last_activity`` e ``created_at`` são inteiros em milissegundos desde
+  a época, não textos ISO.
+
+O cliente pode enviar um evento ou uma lista de eventos no mesmo formato.
+As tabelas só podem crescer: ids não são reaproveitados.
+"""
+from datetime import datetime
+
+import msgpack
+from django.conf import settings
+
+MSGPACK = 'dx.msgpack.v1'
+
+DEFAULTS = {
+    'MSGPACK': True,  # aceita o subprotocolo msgpack quando o cliente pede
+    'BATCH_WINDOW': 0.05,  # segundos para juntar eventos em um frame
+    'MAX_BATCH': 100,  # eventos por frame
+}
+
+FIELD_IDS = {
+    'type': 0,
+    'user_id': 1,
+    'is_online': 2,
+    'last_activity': 3,
+    'users': 4,
+    'chat_id': 5,
+    'chat_ids': 6,
+    'messages': 7,
+    'id': 8,
+    'atendente_id': 9,
+    'entrada': 10,
+    'tipo': 11,
+    'conteudo': 12,
+    'midia_url': 13,
+    'created_at': 14,
+    'error': 15,
+}
+FIELD_NAMES = {value: key for key, value in FIELD_IDS.items()}
+
+EVENT_TYPE_IDS = {
+    'status.update': 1,
+    'status.batch': 2,
+    'heartbeat': 3,
+    'chat.subscribed': 4,
+    'chat.batch': 5,
+    'chat.resync': 6,
+    'chat.error': 7,
+    'subscribe': 8,
+    'unsubscribe': 9,
+}
+EVENT_TYPE_NAMES = {value: key for key, value in EVENT_TYPE_IDS.items()}
+
+TIMESTAMP_FIELDS = {'last_activity', 'created_at'}
+
+
+def ws_protocol_setting(name):
+    return getattr(settings, 'WS_PROTOCOL', {}).get(name, DEFAULTS[name])
+
+
+def to_millis(value):
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    return value
+
+
+def compact(value):
+    """Troca chaves e tipos pelos ids e datas por milissegundos."""
+    if isinstance(value, dict):
+        return {FIELD_IDS.get(key, key): _compact_field(key, item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [compact(item) for item in value]
+    return value
+
+
+def _compact_field(name, value):
+    if name == 'type':
+        return EVENT_TYPE_IDS.get(value, value)
+    if name in TIMESTAMP_FIELDS:
+        return to_millis(value)
+    return compact(value)
+
+
+def expand(value):
+    """Inverso de ``compact`` para as chaves e os tipos (datas continuam inteiras)."""
+    if isinstance(value, dict):
+        expanded = {}
+        for key, item in value.items():
+            name = FIELD_NAMES.get(key, key)
+            expanded[name] = EVENT_TYPE_NAMES.get(item, item) if name == 'type' else expand(item)
+        return expanded
+    if isinstance(value, list):
+        return [expand(item) for item in value]
+    return value
+
+
+def pack(events):
+    """Frame binário com os eventos (já passados por ``compact``)."""
+    return msgpack.packb(events)
+
+
+def unpack(data):
+    """Eventos de um frame recebido, com as chaves por extenso."""
+    content = msgpack.unpackb(data, strict_map_key=False)
+    events = content if isinstance(content, list) else [content]
+    return [expand(event) for event in events]
@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import Chat
 
-# Register your models here.
+
+@admin.register(Chat)
+class ChatAdmin(admin.ModelAdmin):
+    list_display = ('id', 'nome', 'last_message_at', 'created_at')
+    search_fields = ('nome',)
+    readonly_fields = ('last_message_id', 'last_message_at')
@@ -0,0 +1,34 @@
+"""
+Funções executadas nos processos do benchmark de protocolos.
+
+Cada processo simula um worker Daphne com o seu próprio alocador. Ficam
+em um módulo sem imports de models: o processo filho (spawn) importa este
+módulo antes de o Django estar configurado.
+"""
+import os
+import time
+
+
+def init_worker(db_name, protocolo_settings):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
+    import django
+    from django.conf import settings
+
+    django.setup()
+    settings.PROTOCOLO = protocolo_settings
+    from django.db import connections
+    # Usa o banco de teste criado pelo processo principal
+    for alias in connections:
+        connections[alias].settings_dict['NAME'] = db_name
+
+
+def create_atendimentos(count, chat_id):
+    """Cria ``count`` atendimentos um a um; retorna ``(segundos, blocos reservados)``."""
+    from apps.chats import protocolo
+    from apps.chats.models import Atendimento
+
+    protocolo._allocator = None
+    started = time.perf_counter()
+    for _ in range(count):
+        Atendimento.objects.create(chat_id=chat_id, status=Atendimento.Status.FINALIZADO)
+    return time.perf_counter() - started, protocolo.get_allocator().blocks
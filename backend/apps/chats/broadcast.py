@@ -0,0 +1,58 @@
+"""
+Publicação de mensagens nos grupos por conversa (``chat_<id>``).
+
+Cada conversa tem o seu grupo, então uma mensagem só chega aos sockets
+que estão com aquela conversa aberta. As mensagens de um lote são
+agrupadas por conversa: um ``group_send`` por conversa, não por mensagem.
+Cada mensagem segue já codificada em JSON (``encoded``), então é
+codificada uma vez, e não uma vez por socket que a recebe.
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from apps.accounts.jsoncodec import dumps_text
+from apps.accounts.metrics import channel_layer_seconds, registry
+
+from .serializers import MessageSerializer
+
+logger = logging.getLogger(__name__)
+
+chat_group_send_messages = registry.histogram(
+    'chat_group_send_messages', 'Mensagens por group_send de conversa',
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500))
+
+
+def chat_group(chat_id):
+    return f'chat_{chat_id}'
+
+
+def serialize_messages(messages):
+    """Agrupa as mensagens serializadas por conversa, preservando a ordem."""
+    by_chat = {}
+    for data in MessageSerializer(messages, many=True).data:
+        by_chat.setdefault(data['chat_id'], []).append(dict(data))
+    return by_chat
+
+
+async def apublish_messages(channel_layer, by_chat):
+    for chat_id, messages in by_chat.items():
+        chat_group_send_messages.observe(len(messages))
+        try:
+            with channel_layer_seconds.time(op='group_send'):
+                await channel_layer.group_send(chat_group(chat_id), {
+                    'type': 'chat.messages',
+                    'chat_id': chat_id,
+                    'encoded': [dumps_text(message) for message in messages],
+                })
+        except Exception:
+            logger.exception('Erro ao publicar mensagens da conversa %s', chat_id)
+
+
+def publish_messages(messages, channel_layer=None):
+    """Publica mensagens já gravadas (contexto síncrono)."""
+    channel_layer = channel_layer or get_channel_layer()
+    if channel_layer is None or not messages:
+        return
+    async_to_sync(apublish_messages)(channel_layer, serialize_messages(messages))
@@ -0,0 +1,209 @@
+"""
+WebSocket de conversas (``ws/chats/``).
+
+O socket assina apenas as conversas abertas (``subscribe``/``unsubscribe``)
+e recebe as mensagens em frames ``chat.batch``. Só podem assinar uma
+conversa o atendente do atendimento aberto nela e a equipe (``is_staff``).
+
+Cada conexão tem uma fila de envio, esvaziada por uma task própria a cada
+``BATCH_WINDOW``: o handler do grupo só enfileira. A fila limita o tamanho
+de uma rajada, não é controle de fluxo: o ``send()`` do Daphne não bloqueia
+(o frame vai para o buffer do transporte), então um cliente lento acumula
+no servidor ASGI, não aqui. Se uma rajada passa de ``MAX_QUEUE``, as
+mensagens pendentes são descartadas e o cliente recebe ``chat.resync``
+com as conversas que deve recarregar pelo histórico.
+
+As mensagens chegam do grupo já codificadas em JSON (``broadcast``); o
+frame ``chat.batch`` só concatena os trechos. Clientes do subprotocolo
+msgpack (``apps.accounts.wsprotocol``) recebem a rajada inteira, com
+``chat.resync``, em um único frame binário.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from apps.accounts.consumers import JsonWebsocketConsumer
+from apps.accounts.jsoncodec import dumps_text, loads
+from apps.accounts.metrics import (
+    SampledLogger,
+    channel_layer_seconds,
+    registry,
+    ws_messages_out_total,
+    ws_receive_seconds,
+)
+
+from .broadcast import chat_group
+from .models import Chat
+
+logger = SampledLogger(__name__)
+
+DEFAULTS = {
+    'BATCH_WINDOW': 0.05,  # segundos para juntar uma rajada em um frame
+    'MAX_BATCH': 100,  # mensagens por frame
+    'MAX_QUEUE': 500,  # mensagens de uma rajada por conexão antes de descartar
+    'MAX_SUBSCRIPTIONS': 50,  # conversas abertas por conexão
+}
+
+
+def chat_ws_setting(name):
+    return getattr(settings, 'CHAT_WS', {}).get(name, DEFAULTS[name])
+
+
+chat_connections_active = registry.gauge(
+    'chat_ws_connections_active', 'Conexões WebSocket de conversas abertas neste worker')
+chat_subscriptions_active = registry.gauge(
+    'chat_ws_subscriptions_active', 'Conversas assinadas pelas conexões deste worker')
+chat_messages_dropped_total = registry.counter(
+    'chat_ws_messages_dropped_total', 'Mensagens descartadas por rajada acima de MAX_QUEUE')
+chat_batch_messages = registry.histogram(
+    'chat_ws_batch_messages', 'Mensagens por frame chat.batch',
+    buckets=(1, 2, 5, 10, 25, 50, 100))
+
+
+# Mesmo JSON de send_json({'type': 'chat.batch', 'messages': [...]})
+CHAT_BATCH_FRAME = '{"type":"chat.batch","messages":[%s]}'
+
+
+class ChatConsumer(JsonWebsocketConsumer):
+    accepted = False
+
+    async def connect(self):
+        if self.scope["user"].is_anonymous:
+            logger.info("Conexão WebSocket anônima rejeitada")
+            await self.close()
+            return
+
+        self.chats = set()
+        self.outbox = deque()  # (chat_id, mensagem em JSON)
+        self.stale = set()
+        self.wakeup = asyncio.Event()
+        self.batch_window = chat_ws_setting('BATCH_WINDOW')
+        self.max_batch = chat_ws_setting('MAX_BATCH')
+        self.max_queue = chat_ws_setting('MAX_QUEUE')
+
+        await self.accept()
+        self.accepted = True
+        chat_connections_active.inc()
+        self.writer = asyncio.create_task(self.write_loop())
+
+    async def disconnect(self, close_code):
+        if not self.accepted:
+            return
+        chat_connections_active.dec()
+        self.writer.cancel()
+        with channel_layer_seconds.time(op='group_discard'):
+            for chat_id in self.chats:
+                await self.channel_layer.group_discard(chat_group(chat_id), self.channel_name)
+        chat_subscriptions_active.dec(len(self.chats))
+        self.chats.clear()
+
+    async def receive_json(self, content):
+        started = time.perf_counter()
+        message_type = content.get('type', '') if isinstance(content, dict) else ''
+        try:
+            if message_type == 'subscribe':
+                await self.subscribe(content.get('chat_id'))
+            elif message_type == 'unsubscribe':
+                await self.unsubscribe(content.get('chat_id'))
+            else:
+                logger.sampled(logging.WARNING, "Tipo de mensagem desconhecido: %s", message_type)
+                message_type = 'unknown'
+        except Exception:
+            logger.exception("Erro ao processar mensagem WebSocket")
+        finally:
+            ws_receive_seconds.observe(time.perf_counter() - started, type=message_type)
+
+    async def subscribe(self, chat_id):
+        if not isinstance(chat_id, int) or not await self.chat_exists(chat_id):
+            await self.send_json({'type': 'chat.error', 'chat_id': chat_id, 'error': 'Conversa não encontrada'})
+            return
+        if chat_id in self.chats:
+            return
+        if not await self.can_subscribe(chat_id):
+            logger.sampled(logging.WARNING, "Usuário %s sem acesso à conversa %s", self.scope['user'].pk, chat_id)
+            await self.send_json({'type': 'chat.error', 'chat_id': chat_id, 'error': 'Sem acesso à conversa'})
+            return
+        if len(self.chats) >= chat_ws_setting('MAX_SUBSCRIPTIONS'):
+            await self.send_json({'type': 'chat.error', 'chat_id': chat_id, 'error': 'Limite de conversas abertas'})
+            return
+        with channel_layer_seconds.time(op='group_add'):
+            await self.channel_layer.group_add(chat_group(chat_id), self.channel_name)
+        self.chats.add(chat_id)
+        chat_subscriptions_active.inc()
+        await self.send_json({'type': 'chat.subscribed', 'chat_id': chat_id})
+
+    async def unsubscribe(self, chat_id):
+        if chat_id not in self.chats:
+            return
+        self.chats.discard(chat_id)
+        chat_subscriptions_active.dec()
+        with channel_layer_seconds.time(op='group_discard'):
+            await self.channel_layer.group_discard(chat_group(chat_id), self.channel_name)
+
+    @database_sync_to_async
+    def chat_exists(self, chat_id):
+        return Chat.objects.filter(pk=chat_id).exists()
+
+    @database_sync_to_async
+    def can_subscribe(self, chat_id):
+        """Mesma regra da API: equipe ou o atendente do atendimento aberto na conversa."""
+        return Chat.objects.visible_to(self.scope['user']).filter(pk=chat_id).exists()
+
+    async def chat_messages(self, event):
+        """
+        Handler do grupo da conversa: apenas enfileira para a task de envio.
+        """
+        chat_id = event['chat_id']
+        # Mensagens em trânsito de uma conversa já fechada
+        if chat_id not in self.chats:
+            return
+        encoded = event.get('encoded')
+        if encoded is None:
+            encoded = [dumps_text(message) for message in event['messages']]
+        if chat_id in self.stale:
+            # O cliente já vai recarregar esta conversa
+            chat_messages_dropped_total.inc(len(encoded))
+            return
+        self.outbox.extend((chat_id, message) for message in encoded)
+        if len(self.outbox) > self.max_queue:
+            self.collapse()
+        self.wakeup.set()
+
+    def collapse(self):
+        """Rajada acima de MAX_QUEUE: troca as mensagens pendentes por um resync."""
+        chat_messages_dropped_total.inc(len(self.outbox))
+        self.stale.update(chat_id for chat_id, _ in self.outbox)
+        self.outbox.clear()
+        logger.sampled(logging.WARNING, "Rajada acima de MAX_QUEUE em %s; pedindo resync", self.channel_name)
+
+    async def write_loop(self):
+        while True:
+            await self.wakeup.wait()
+            if self.batch_window:
+                await asyncio.sleep(self.batch_window)
+            self.wakeup.clear()
+            try:
+                await self.flush_outbox()
+            except Exception:
+                logger.exception("Erro ao enviar mensagens pelo WebSocket")
+
+    async def flush_outbox(self):
+        stale, self.stale = self.stale & self.chats, set()
+        if stale:
+            ws_messages_out_total.inc(type='chat.resync')
+            await self.send_json({'type': 'chat.resync', 'chat_ids': sorted(stale)})
+        while self.outbox:
+            batch = [self.outbox.popleft()[1] for _ in range(min(self.max_batch, len(self.outbox)))]
+            chat_batch_messages.observe(len(batch))
+            ws_messages_out_total.inc(type='chat.batch')
+            if self.msgpack:
+                await self.send_json({'type': 'chat.batch', 'messages': [loads(message) for message in batch]})
+            else:
+                await self.send_encoded(CHAT_BATCH_FRAME % ','.join(batch))
+        if self.msgpack:
+            # A rajada já esperou BATCH_WINDOW: sai agora, em um frame só
+            await self.flush_events()
@@ -0,0 +1,323 @@
+"""
+Distribuição de atendimentos aguardando entre os atendentes online.
+
+O dispatcher mantém em memória um heap de atendentes disponíveis ordenado
+por ``(carga, última atribuição)``: o primeiro é o menos carregado e,
+entre os empatados, o que está há mais tempo sem receber atendimento.
+Cada atribuição é um ``heappop``/``heappush`` (O(log n)); entradas antigas
+de um atendente ficam no heap e são descartadas ao sair (remoção
+preguiçosa).
+
+O heap é alimentado pelo sinal ``presence_changed`` (conexões WebSocket,
+agendador de offline e varredura de inativos). As atribuições são gravadas
+em lote por uma thread, com um único UPDATE condicional
+(``status = 'aguardando'``), sem travar linhas; o que outro processo
+atribuiu antes é reconciliado depois do UPDATE.
+
+Cada processo tem o seu dispatcher, e ``presence_changed`` só chega ao
+processo da conexão. Por isso a fila, a carga e os atendentes online são
+relidos do banco e do store de presença na partida e a cada
+``RELOAD_INTERVAL``.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import router
+from django.db.models import BigIntegerField, Case, Count, Value, When
+from django.utils import timezone
+
+from apps.accounts.metrics import registry
+
+from .models import Atendimento
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MAX_LOAD': 5,  # atendimentos em andamento por atendente
+    'TICK': 0.5,  # segundos entre rodadas de atribuição/gravação
+    'BATCH_SIZE': 500,  # atribuições por UPDATE
+    'RELOAD_INTERVAL': 30,  # segundos entre releituras da fila, da carga e dos online
+}
+
+
+def dispatch_setting(name):
+    return getattr(settings, 'DISPATCH', {}).get(name, DEFAULTS[name])
+
+
+dispatch_wait_seconds = registry.histogram(
+    'dispatch_wait_seconds', 'Espera na fila até a atribuição a um atendente',
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600))
+dispatch_flush_seconds = registry.histogram(
+    'dispatch_flush_seconds', 'Tempo de gravação de um lote de atribuições')
+dispatch_assignments_total = registry.counter(
+    'dispatch_assignments_total', 'Atribuições de atendimentos por resultado', ['result'])
+
+
+class Dispatcher:
+    def __init__(self, max_load=None):
+        self.max_load = max_load if max_load is not None else dispatch_setting('MAX_LOAD')
+        self._lock = threading.Lock()
+        self._heap = []  # (carga, última atribuição, atendente, seq)
+        self._entries = {}  # atendente -> seq da entrada válida no heap
+        self._seq = itertools.count()
+        self._online = set()
+        self._loads = {}
+        self._last_assigned = {}
+        self._waiting = deque()  # (atendimento_id, iniciado_em)
+        self._queued = set()
+        self._pending = []  # (atendimento_id, atendente, iniciado_em) a gravar
+        self._recent = None  # enfileirados durante um load(), que não os leu do banco
+        self.loaded = False
+        self.stats = {
+            'assigned': 0,
+            'persisted': 0,
+            'conflicts': 0,
+        }
+
+    def _push(self, agent_id):
+        """Reinsere o atendente com a carga atual (ou o remove se indisponível)."""
+        load = self._loads.get(agent_id, 0)
+        if agent_id not in self._online or load >= self.max_load:
+            self._entries.pop(agent_id, None)
+            return
+        seq = next(self._seq)
+        self._entries[agent_id] = seq
+        heapq.heappush(self._heap, (load, self._last_assigned.get(agent_id, 0.0), agent_id, seq))
+
+    def set_online(self, agent_id, is_online):
+        with self._lock:
+            if is_online:
+                if agent_id in self._online:
+                    return
+                self._online.add(agent_id)
+            else:
+                self._online.discard(agent_id)
+            self._push(agent_id)
+
+    def release(self, agent_id):
+        """Um atendimento do atendente foi finalizado."""
+        with self._lock:
+            self._loads[agent_id] = max(0, self._loads.get(agent_id, 0) - 1)
+            self._push(agent_id)
+
+    def enqueue(self, atendimento_id, iniciado_em):
+        with self._lock:
+            if atendimento_id in self._queued:
+                return
+            self._queued.add(atendimento_id)
+            self._waiting.append((atendimento_id, iniciado_em))
+            if self._recent is not None:
+                self._recent.append((atendimento_id, iniciado_em))
+
+    def load(self):
+        """
+        (Re)carrega do banco a fila de espera e a carga dos atendentes, e do
+        store de presença os atendentes online. O que outros processos
+        atribuíram ou finalizaram desde a última leitura entra aqui.
+        """
+        from apps.accounts.presence import get_presence_store
+
+        with self._lock:
+            self._recent = []
+        try:
+            # Lê do primário: a réplica pode não ter as atribuições recentes
+            objects = Atendimento.objects.db_manager(router.db_for_write(Atendimento))
+            loads = dict(
+                objects.filter(status=Atendimento.Status.EM_ANDAMENTO, atendente__isnull=False)
+                .values('atendente')
+                .annotate(total=Count('id'))
+                .values_list('atendente', 'total')
+            )
+            waiting = list(
+                objects.filter(status=Atendimento.Status.AGUARDANDO, atendente__isnull=True)
+                .order_by('id')
+                .values_list('id', 'iniciado_em')
+            )
+            online = get_presence_store().online_ids()
+        finally:
+            with self._lock:
+                recent, self._recent = self._recent, None
+        with self._lock:
+            # Atribuições ainda não gravadas: fora da fila e somadas à carga
+            assigned = set()
+            for atendimento_id, agent_id, _ in self._pending:
+                assigned.add(atendimento_id)
+                loads[agent_id] = loads.get(agent_id, 0) + 1
+            self._waiting = deque()
+            self._queued = set()
+            for atendimento_id, iniciado_em in itertools.chain(waiting, recent):
+                if atendimento_id not in assigned and atendimento_id not in self._queued:
+                    self._queued.add(atendimento_id)
+                    self._waiting.append((atendimento_id, iniciado_em))
+            self._loads = loads
+            self._online = set(online)
+            self._heap, self._entries = [], {}
+            for agent_id in self._online:
+                self._push(agent_id)
+        self.loaded = True
+
+    def waiting_count(self):
+        return len(self._waiting)
+
+    def available_count(self):
+        return len(self._entries)
+
+    def assign(self, limit=None):
+        """Atribui até ``limit`` atendimentos da fila; retorna quantas atribuições fez."""
+        assigned = 0
+        with self._lock:
+            while self._waiting and self._heap and (limit is None or assigned < limit):
+                load, _, agent_id, seq = heapq.heappop(self._heap)
+                if self._entries.get(agent_id) != seq:
+                    continue  # entrada antiga
+                atendimento_id, iniciado_em = self._waiting.popleft()
+                self._queued.discard(atendimento_id)
+                self._loads[agent_id] = load + 1
+                self._last_assigned[agent_id] = time.monotonic()
+                self._push(agent_id)
+                self._pending.append((atendimento_id, agent_id, iniciado_em))
+                assigned += 1
+        self.stats['assigned'] += assigned
+        return assigned
+
+    def flush(self, batch_size=None):
+        """Grava as atribuições pendentes em lotes; retorna quantas foram gravadas."""
+        batch_size = batch_size or dispatch_setting('BATCH_SIZE')
+        with self._lock:
+            pending, self._pending = self._pending, []
+        persisted = 0
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            try:
+                persisted += self._persist(batch)
+            except Exception:
+                logger.exception('Erro ao gravar %d atribuições', len(batch))
+                # Volta para a fila e devolve a carga dos atendentes
+                with self._lock:
+                    for atendimento_id, agent_id, iniciado_em in reversed(batch):
+                        self._loads[agent_id] = max(0, self._loads.get(agent_id, 0) - 1)
+                        self._push(agent_id)
+                        self._queued.add(atendimento_id)
+                        self._waiting.appendleft((atendimento_id, iniciado_em))
+        return persisted
+
+    def _persist(self, batch):
+        started = time.perf_counter()
+        now = timezone.now()
+        ids = [atendimento_id for atendimento_id, _, _ in batch]
+        Atendimento.objects.filter(
+            pk__in=ids,
+            status=Atendimento.Status.AGUARDANDO,
+            atendente__isnull=True,
+        ).update(
+            status=Atendimento.Status.EM_ANDAMENTO,
+            atendente_id=Case(
+                *[When(pk=atendimento_id, then=Value(agent_id)) for atendimento_id, agent_id, _ in batch],
+                output_field=BigIntegerField(),
+            ),
+            atendido_em=now,
+        )
+        # Reconcilia o que outro processo atribuiu ou o que foi finalizado antes
+        current = dict(
+            Atendimento.objects.db_manager(router.db_for_write(Atendimento))
+            .filter(pk__in=ids)
+            .values_list('id', 'atendente_id')
+        )
+        persisted = 0
+        conflicts = []
+        for atendimento_id, agent_id, iniciado_em in batch:
+            if current.get(atendimento_id) == agent_id:
+                persisted += 1
+                dispatch_wait_seconds.observe((now - iniciado_em).total_seconds())
+            else:
+                conflicts.append(agent_id)
+        if conflicts:
+            with self._lock:
+                for agent_id in conflicts:
+                    self._loads[agent_id] = max(0, self._loads.get(agent_id, 0) - 1)
+                    self._push(agent_id)
+        self.stats['persisted'] += persisted
+        self.stats['conflicts'] += len(conflicts)
+        dispatch_assignments_total.inc(persisted, result='persisted')
+        if conflicts:
+            dispatch_assignments_total.inc(len(conflicts), result='conflict')
+        dispatch_flush_seconds.observe(time.perf_counter() - started)
+        return persisted
+
+
+class DispatchWorker(threading.Thread):
+    """
+    Thread daemon que atribui e grava a cada ``TICK`` ou quando acordada, e
+    recarrega o dispatcher a cada ``reload_interval`` segundos.
+    """
+
+    def __init__(self, dispatcher, tick, reload_interval=None):
+        super().__init__(name='atendimento-dispatcher', daemon=True)
+        self.dispatcher = dispatcher
+        self.tick = tick
+        self.reload_interval = (
+            reload_interval if reload_interval is not None else dispatch_setting('RELOAD_INTERVAL'))
+        self.wakeup = threading.Event()
+
+    def run(self):
+        from django.db import close_old_connections
+
+        next_reload = 0.0
+        while True:
+            self.wakeup.wait(self.tick)
+            self.wakeup.clear()
+            try:
+                now = time.monotonic()
+                if not self.dispatcher.loaded or (self.reload_interval and now >= next_reload):
+                    self.dispatcher.load()
+                    next_reload = now + (self.reload_interval or 0)
+                if self.dispatcher.assign():
+                    self.dispatcher.flush()
+            except Exception:
+                logger.exception('Erro no dispatcher de atendimentos')
+            close_old_connections()
+
+
+_dispatcher = None
+_worker = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """Retorna o dispatcher do processo, iniciando a thread na primeira chamada."""
+    global _dispatcher, _worker
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                dispatcher = Dispatcher()
+                if dispatch_setting('TICK'):
+                    _worker = DispatchWorker(dispatcher, dispatch_setting('TICK'))
+                    _worker.start()
+                _dispatcher = dispatcher
+    return _dispatcher
+
+
+def wake_dispatcher():
+    if _worker is not None:
+        _worker.wakeup.set()
+
+
+@registry.add_collector
+def collect_dispatch_stats():
+    if _dispatcher is None:
+        return []
+    stats = [
+        ('dispatch_waiting', 'Atendimentos aguardando atribuição', _dispatcher.waiting_count()),
+        ('dispatch_agents_available', 'Atendentes online com capacidade livre', _dispatcher.available_count()),
+    ]
+    stats.extend(
+        (f'dispatch_{name}', f'Dispatcher: {name} (acumulado)', value)
+        for name, value in _dispatcher.stats.items()
+    )
+    return stats
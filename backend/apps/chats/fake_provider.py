@@ -0,0 +1,66 @@
+"""
+Provedor WhatsApp falso para testes e desenvolvimento local.
+
+Gera payloads no formato da Cloud API, assina com o app secret e entrega
+ao webhook por um ``django.test.Client``, opcionalmente repetindo a
+entrega como o provedor faz quando não recebe 200 a tempo.
+"""
+import itertools
+import json
+import time
+
+from django.test import Client
+from django.urls import reverse
+
+from .whatsapp import SIGNATURE_HEADER, sign
+
+
+class FakeWhatsAppProvider:
+    def __init__(self, app_secret, client=None):
+        self.app_secret = app_secret
+        self.client = client or Client()
+        self._ids = itertools.count(1)
+
+    def message(self, phone, text='', name='', kind='text', media_id=None, timestamp=None):
+        """Monta uma mensagem recebida (``messages[]``) com id novo."""
+        raw = {
+            'from': phone,
+            'id': f'wamid.fake{next(self._ids)}',
+            'timestamp': str(int(timestamp or time.time())),
+            'type': kind,
+        }
+        if kind == 'text':
+            raw['text'] = {'body': text}
+        else:
+            raw[kind] = {'id': media_id or raw['id'], 'caption': text}
+        return {'name': name, 'raw': raw}
+
+    @staticmethod
+    def payload(messages):
+        return {
+            'object': 'whatsapp_business_account',
+            'entry': [{
+                'id': 'fake-waba',
+                'changes': [{
+                    'field': 'messages',
+                    'value': {
+                        'messaging_product': 'whatsapp',
+                        'contacts': [
+                            {'profile': {'name': m['name']}, 'wa_id': m['raw']['from']}
+                            for m in messages
+                        ],
+                        'messages': [m['raw'] for m in messages],
+                    },
+                }],
+            }],
+        }
+
+    def deliver(self, messages, retries=0, secret=None):
+        """Entrega o payload ``1 + retries`` vezes; retorna as respostas."""
+        body = json.dumps(self.payload(messages)).encode()
+        headers = {SIGNATURE_HEADER: sign(body, secret or self.app_secret)}
+        url = reverse('chats:whatsapp_webhook')
+        return [
+            self.client.post(url, body, content_type='application/json', **headers)
+            for _ in range(1 + retries)
+        ]
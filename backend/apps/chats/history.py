@@ -0,0 +1,30 @@
+"""
+Gravação de mensagens em lote.
+
+As mensagens são inseridas com ``bulk_create`` e a última mensagem de cada
+conversa é atualizada com um UPDATE por conversa, na mesma transação.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Chat, Message
+
+
+def append_messages(messages, batch_size=500):
+    """Insere as mensagens (não salvas) e retorna as instâncias criadas."""
+    if not messages:
+        return []
+    with transaction.atomic():
+        created = Message.objects.bulk_create(messages, batch_size=batch_size)
+        last = {}
+        for message in created:
+            current = last.get(message.chat_id)
+            if current is None or message.pk > current.pk:
+                last[message.chat_id] = message
+        for chat_id, message in last.items():
+            # Só avança: inserções concorrentes não voltam o ponteiro
+            Chat.objects.filter(
+                Q(last_message_id__isnull=True) | Q(last_message_id__lt=message.pk),
+                pk=chat_id,
+            ).update(last_message_id=message.pk, last_message_at=message.created_at)
+    return created
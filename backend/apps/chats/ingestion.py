@@ -0,0 +1,458 @@
+"""
+Ingestão das mensagens recebidas pelo webhook do WhatsApp.
+
+O webhook só valida, enfileira e responde. Threads consumidoras tiram da
+fila lotes de até ``BATCH_SIZE`` mensagens e, para cada lote, descartam
+reenvios, resolvem contatos (``apps.contacts.phones.PhoneIndex``) e
+conversas com poucas consultas em lote,
+gravam as mensagens com ``bulk_create`` e, na mesma transação, abrem um
+atendimento aguardando nas conversas sem atendimento aberto; por fim
+publicam nos grupos das conversas.
+
+Duplicatas são barradas em duas camadas: um conjunto limitado dos ids
+recentes em memória (barato, por processo) e o índice único de
+``Message.provider_id`` (definitivo, entre workers).
+
+Um lote que continua falhando depois de ``RETRIES`` tentativas vai para o
+arquivo de dead letter (``DEAD_LETTER``): o webhook já respondeu 200 e o
+provedor não reenvia. ``manage.py replay_whatsapp_dead_letter`` grava de
+novo o que estiver lá.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from django.db import DatabaseError, IntegrityError, router, transaction
+from django.utils.dateparse import parse_datetime
+
+from apps.accounts.deadletter import DeadLetterFile
+from apps.accounts.metrics import registry
+from apps.contacts.models import Contact
+from apps.contacts.phones import get_phone_index, phone_generation
+
+from .broadcast import publish_messages
+from .dispatch import dispatch_setting, get_dispatcher, wake_dispatcher
+from .history import append_messages
+from .models import Atendimento, Chat, Message
+from .protocolo import ProtocoloExhausted, take_protocolos
+from .whatsapp import InboundMessage, whatsapp_setting
+
+logger = logging.getLogger(__name__)
+
+whatsapp_messages_total = registry.counter(
+    'whatsapp_messages_total', 'Mensagens do webhook do WhatsApp por resultado', ['result'])
+whatsapp_protocolo_exhausted_total = registry.counter(
+    'whatsapp_protocolo_exhausted_total', 'Conversas do WhatsApp sem atendimento por falta de protocolo')
+whatsapp_batch_seconds = registry.histogram(
+    'whatsapp_batch_seconds', 'Tempo de gravação de um lote de mensagens do WhatsApp')
+
+
+class SeenSet:
+    """Conjunto limitado (LRU) de ids de mensagens já aceitas."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._ids = OrderedDict()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, provider_id):
+        """Registra o id; retorna ``False`` se ele já estava no conjunto."""
+        with self._lock:
+            if provider_id in self._ids:
+                self._ids.move_to_end(provider_id)
+                return False
+            self._ids[provider_id] = None
+            while len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+            return True
+
+    def discard(self, provider_id):
+        with self._lock:
+            self._ids.pop(provider_id, None)
+
+
+class MessageDeadLetterFile(DeadLetterFile):
+    """Mensagens de lotes que não puderam ser gravados."""
+
+    def encode(self, message):
+        return message._asdict()
+
+    def decode(self, data):
+        data['created_at'] = parse_datetime(data['created_at'])
+        return InboundMessage(**{field: data[field] for field in InboundMessage._fields})
+
+
+class IngestionPipeline:
+    def __init__(self, workers=None):
+        self.queue = queue.Queue(maxsize=whatsapp_setting('QUEUE_SIZE'))
+        self.seen = SeenSet(whatsapp_setting('SEEN_SIZE'))
+        self.batch_size = whatsapp_setting('BATCH_SIZE')
+        self.batch_window = whatsapp_setting('BATCH_WINDOW')
+        self.workers = workers if workers is not None else whatsapp_setting('WORKERS')
+        self._threads = []
+        self._lock = threading.Lock()
+        self.stats = {
+            'enqueued': 0,
+            'duplicates': 0,
+            'rejected': 0,
+            'created': 0,
+            'batches': 0,
+            'dead_letter': 0,
+        }
+
+    def enqueue(self, messages):
+        """
+        Enfileira sem bloquear. Retorna ``False`` se a fila está cheia: o
+        webhook responde 503 e o provedor reenvia mais tarde.
+        """
+        self.start()
+        accepted = []
+        for message in messages:
+            if self.seen.add(message.provider_id):
+                accepted.append(message)
+            else:
+                self.stats['duplicates'] += 1
+                whatsapp_messages_total.inc(result='duplicate')
+        for index, message in enumerate(accepted):
+            try:
+                self.queue.put_nowait(message)
+            except queue.Full:
+                # Libera os ids não enfileirados para o reenvio passar
+                for pending in accepted[index:]:
+                    self.seen.discard(pending.provider_id)
+                rejected = len(accepted) - index
+                self.stats['rejected'] += rejected
+                whatsapp_messages_total.inc(rejected, result='rejected')
+                return False
+        self.stats['enqueued'] += len(accepted)
+        whatsapp_messages_total.inc(len(accepted), result='enqueued')
+        return True
+
+    def start(self):
+        if len(self._threads) >= self.workers:
+            return
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._run, name=f'whatsapp-ingestion-{len(self._threads)}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        from django.db import close_old_connections
+
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self.process(batch)
+            close_old_connections()
+
+    def flush(self):
+        """Processa no chamador tudo o que está na fila."""
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self.process(batch)
+
+    def process(self, batch):
+        started = time.perf_counter()
+        try:
+            created = self.persist(batch)
+        except Exception as exc:
+            # O webhook já respondeu 200: sem o reenvio do provedor o lote
+            # só sobrevive no arquivo de dead letter
+            logger.exception('Erro ao gravar lote de %d mensagens do WhatsApp', len(batch))
+            for message in batch:
+                self.seen.discard(message.provider_id)
+            whatsapp_messages_total.inc(len(batch), result='failed')
+            self.dead_letter(batch, exc)
+            return
+        finally:
+            whatsapp_batch_seconds.observe(time.perf_counter() - started)
+
+        duplicates = len(batch) - len(created)
+        self.stats['batches'] += 1
+        self.stats['created'] += len(created)
+        self.stats['duplicates'] += duplicates
+        whatsapp_messages_total.inc(len(created), result='created')
+        if duplicates:
+            whatsapp_messages_total.inc(duplicates, result='duplicate')
+        try:
+            publish_messages(created)
+        except Exception:
+            logger.exception('Erro ao publicar mensagens do WhatsApp')
+
+    def dead_letter(self, batch, exc):
+        try:
+            get_dead_letter().write(batch, repr(exc))
+        except Exception:
+            logger.exception(
+                'Lote do WhatsApp perdido (%s)', ' '.join(message.provider_id for message in batch))
+            whatsapp_messages_total.inc(len(batch), result='lost')
+            return
+        self.stats['dead_letter'] += len(batch)
+        whatsapp_messages_total.inc(len(batch), result='dead_letter')
+
+    def persist(self, batch):
+        """Grava o lote, tentando de novo com espera crescente em erros transitórios."""
+        retries = whatsapp_setting('RETRIES')
+        for attempt in range(retries + 1):
+            try:
+                return persist_messages(batch)
+            except DatabaseError:
+                if attempt == retries:
+                    raise
+                logger.warning('Erro ao gravar lote do WhatsApp; nova tentativa %d', attempt + 1)
+                time.sleep(0.1 * 2 ** attempt)
+
+
+def resolve_chats(batch):
+    """Retorna ``{telefone: (chat_id, contato_id)}``, criando contatos e conversas que faltam."""
+    names = {message.telefone: message.nome for message in batch}
+    phones = list(names)
+    # Lê do primário: os contatos e conversas recém-criados podem não estar na réplica
+    using = router.db_for_write(Contact)
+
+    index = get_phone_index()
+    # Lida antes do banco: uma troca de telefone depois disso barra o set_many
+    generation = phone_generation()
+    contacts = index.get_many(phones, generation)
+    unknown = [phone for phone in phones if phone not in contacts]
+    if unknown:
+        found = dict(
+            Contact.objects.db_manager(using).filter(telefone__in=unknown).values_list('telefone', 'id')
+        )
+        missing = [Contact(telefone=phone, nome=names[phone]) for phone in unknown if phone not in found]
+        if missing:
+            # Outro worker pode criar o mesmo contato ao mesmo tempo
+            Contact.objects.db_manager(using).bulk_create(missing, ignore_conflicts=True)
+            found.update(
+                Contact.objects.db_manager(using)
+                .filter(telefone__in=[c.telefone for c in missing])
+                .values_list('telefone', 'id')
+            )
+        contacts.update(found)
+        # Só entra no cache após o commit: ids de um rollback não podem ficar lá
+        transaction.on_commit(lambda: index.set_many(found, generation), using=using)
+
+    contact_ids = list(contacts.values())
+    chats = dict(
+        Chat.objects.db_manager(using).filter(contato_id__in=contact_ids).values_list('contato_id', 'id')
+    )
+    missing = [
+        Chat(contato_id=contact_id, nome=names[phone])
+        for phone, contact_id in contacts.items()
+        if contact_id not in chats
+    ]
+    if missing:
+        try:
+            Chat.objects.db_manager(using).bulk_create(missing, ignore_conflicts=True)
+        except IntegrityError:
+            # Contato apagado por outro processo ainda no cache: a nova
+            # tentativa do lote (``IngestionPipeline.persist``) relê do banco
+            index.discard(*phones)
+            raise
+        chats.update(
+            Chat.objects.db_manager(using)
+            .filter(contato_id__in=[c.contato_id for c in missing])
+            .values_list('contato_id', 'id')
+        )
+
+    return {phone: (chats[contact_id], contact_id) for phone, contact_id in contacts.items()}
+
+
+def new_atendimentos(chats):
+    """
+    Atendimentos aguardando (não salvos) para as conversas (``{chat_id:
+    contato_id}``) que não têm um aberto, já com protocolo.
+
+    Roda antes da transação das mensagens: a reserva de protocolos usa uma
+    conexão própria, que não pode esperar pelas travas dessa transação. Se
+    o dia passou do limite de protocolos, as mensagens são gravadas mesmo
+    assim e a conversa ganha o atendimento na próxima mensagem.
+    """
+    open_chats = set(
+        Atendimento.objects.db_manager(router.db_for_write(Atendimento))
+        .filter(chat_id__in=list(chats))
+        .exclude(status=Atendimento.Status.FINALIZADO)
+        .values_list('chat_id', flat=True)
+    )
+    missing = [chat_id for chat_id in chats if chat_id not in open_chats]
+    if not missing:
+        return []
+    try:
+        protocolos = take_protocolos(len(missing))
+    except ProtocoloExhausted:
+        logger.error('Limite diário de protocolos atingido; %d conversas sem atendimento', len(missing))
+        whatsapp_protocolo_exhausted_total.inc(len(missing))
+        return []
+    return [
+        Atendimento(chat_id=chat_id, contato_id=chats[chat_id], protocolo=protocolo)
+        for chat_id, protocolo in zip(missing, protocolos)
+    ]
+
+
+def open_atendimentos(atendimentos):
+    """Grava os atendimentos e os coloca na fila do dispatcher após o commit."""
+    if not atendimentos:
+        return
+    # A restrição de um atendimento aberto por conversa barra a corrida entre workers
+    Atendimento.objects.bulk_create(atendimentos, ignore_conflicts=True)
+    if not dispatch_setting('ENABLED'):
+        return
+    # bulk_create não dispara post_save
+    waiting = list(
+        Atendimento.objects.db_manager(router.db_for_write(Atendimento))
+        .filter(chat_id__in=[atendimento.chat_id for atendimento in atendimentos],
+                status=Atendimento.Status.AGUARDANDO)
+        .values_list('id', 'iniciado_em')
+    )
+
+    def enqueue():
+        dispatcher = get_dispatcher()
+        for atendimento_id, iniciado_em in waiting:
+            dispatcher.enqueue(atendimento_id, iniciado_em)
+        wake_dispatcher()
+
+    transaction.on_commit(enqueue)
+
+
+def persist_messages(batch):
+    """
+    Grava o lote ignorando ids já gravados; retorna as mensagens criadas.
+
+    As mensagens e os atendimentos das suas conversas entram na mesma
+    transação: se a abertura falha, nenhuma mensagem fica gravada e a nova
+    tentativa (ou o replay do dead letter) refaz as duas coisas, em vez de
+    achar as mensagens já gravadas e pular as conversas.
+    """
+    unique = {}
+    for message in batch:
+        unique.setdefault(message.provider_id, message)
+    using = router.db_for_write(Message)
+    existing = set(
+        Message.objects.db_manager(using)
+        .filter(provider_id__in=list(unique))
+        .values_list('provider_id', flat=True)
+    )
+    pending = sorted(
+        (message for provider_id, message in unique.items() if provider_id not in existing),
+        key=lambda message: message.created_at,
+    )
+    if not pending:
+        return []
+
+    chats = resolve_chats(pending)
+    atendimentos = new_atendimentos(dict(chats.values()))
+    messages = [
+        Message(
+            chat_id=chats[message.telefone][0],
+            provider_id=message.provider_id,
+            entrada=True,
+            tipo=message.tipo,
+            conteudo=message.conteudo,
+            midia_url=message.midia_url,
+            created_at=message.created_at,
+        )
+        for message in pending
+    ]
+    with transaction.atomic(using=using):
+        try:
+            with transaction.atomic(using=using):
+                created = append_messages(messages)
+        except IntegrityError:
+            # Corrida com outro worker no índice único: grava uma a uma o que sobrou
+            created = []
+            for message in messages:
+                try:
+                    with transaction.atomic(using=using):
+                        created.extend(append_messages([message]))
+                except IntegrityError:
+                    continue
+        if created:
+            # Protocolos de um lote todo duplicado ficam sem uso, como o resto de um bloco
+            open_atendimentos(atendimentos)
+    return created
+
+
+def replay_dead_letter(batch_size=None):
+    """
+    Grava de novo as mensagens do arquivo de dead letter, com as mesmas
+    novas tentativas do pipeline. Retorna ``(gravadas, com erro)``; as que
+    falham de novo voltam para o arquivo. Mensagens já gravadas são
+    ignoradas pelo ``provider_id``.
+    """
+    pipeline = get_pipeline()
+    dead_letter = get_dead_letter()
+    batch_size = batch_size or whatsapp_setting('BATCH_SIZE')
+    messages = dead_letter.claim()
+    created = failed = 0
+    for start in range(0, len(messages), batch_size):
+        batch = messages[start:start + batch_size]
+        try:
+            saved = pipeline.persist(batch)
+        except Exception as exc:
+            logger.exception('Erro ao regravar lote de %d mensagens do WhatsApp', len(batch))
+            dead_letter.write(batch, repr(exc))
+            failed += len(batch)
+            continue
+        created += len(saved)
+        try:
+            publish_messages(saved)
+        except Exception:
+            logger.exception('Erro ao publicar mensagens do WhatsApp')
+    dead_letter.release()
+    return created, failed
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+_dead_letters = {}
+
+
+def get_pipeline():
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = IngestionPipeline()
+    return _pipeline
+
+
+def get_dead_letter():
+    path = str(whatsapp_setting('DEAD_LETTER'))
+    with _pipeline_lock:
+        if path not in _dead_letters:
+            _dead_letters[path] = MessageDeadLetterFile(path)
+        return _dead_letters[path]
+
+
+@registry.add_collector
+def collect_ingestion_stats():
+    if _pipeline is None:
+        return []
+    stats = [('whatsapp_queue_depth', 'Mensagens do WhatsApp aguardando gravação', _pipeline.queue.qsize())]
+    stats.extend(
+        (f'whatsapp_ingestion_{name}', f'Ingestão do WhatsApp: {name} (acumulado)', value)
+        for name, value in _pipeline.stats.items()
+    )
+    return stats
@@ -0,0 +1,118 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.accounts.benchmarks import QueryCounter, bench_database, compare_baseline, summarize
+from apps.chats.dispatch import Dispatcher
+from apps.chats.models import Atendimento, Chat
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark do dispatcher de atendimentos: enfileira N atendimentos, '
+        'coloca M atendentes online e mede atribuição (p50/p99) e gravação em lote'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contacts', type=int, default=5000, help='Atendimentos aguardando')
+        parser.add_argument('--agents', type=int, default=500, help='Atendentes online')
+        parser.add_argument('--max-load', type=int, default=None, help='Padrão: o suficiente para atender todos')
+        parser.add_argument('--churn', type=int, default=10, help='A cada N atribuições um atendente cai e volta')
+        parser.add_argument('--save-baseline', action='store_true')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Regressão tolerada (fração)')
+
+    def handle(self, *args, **options):
+        contacts, agents = options['contacts'], options['agents']
+        max_load = options['max_load'] or -(-contacts // agents)
+
+        with bench_database():
+            agent_ids = self.create_agents(agents)
+            self.create_atendimentos(contacts)
+            results = self.run(agent_ids, max_load, options['churn'])
+
+        results.update({'contacts': contacts, 'agents': agents, 'max_load': max_load})
+        self.stdout.write(json.dumps(results, indent=2))
+        regressions = compare_baseline(
+            f'dispatch_{contacts}_{agents}',
+            {'assign': results['assign']},
+            options['tolerance'],
+            save=options['save_baseline'],
+        )
+        if regressions:
+            raise CommandError('Regressões em relação ao baseline:\n' + '\n'.join(regressions))
+
+    @staticmethod
+    def create_agents(count):
+        users = []
+        for i in range(count):
+            user = User(email=f'agent{i}@bench.local', nome=f'Atendente {i}')
+            user.set_unusable_password()
+            users.append(user)
+        User.objects.bulk_create(users, batch_size=500)
+        return list(User.objects.order_by('id').values_list('id', flat=True))
+
+    @staticmethod
+    def create_atendimentos(count):
+        Chat.objects.bulk_create([Chat(nome=f'Contato {i}') for i in range(count)], batch_size=500)
+        now = timezone.now()
+        Atendimento.objects.bulk_create(
+            [Atendimento(chat_id=chat_id, iniciado_em=now) for chat_id in Chat.objects.values_list('id', flat=True)],
+            batch_size=500,
+        )
+
+    @staticmethod
+    def run(agent_ids, max_load, churn):
+        dispatcher = Dispatcher(max_load=max_load)
+
+        started = time.perf_counter()
+        dispatcher.load()
+        load_seconds = time.perf_counter() - started
+        for agent_id in agent_ids:
+            dispatcher.set_online(agent_id, True)
+
+        # Uma atribuição por vez para medir a latência individual
+        samples = []
+        started_all = time.perf_counter()
+        while True:
+            started = time.perf_counter()
+            if not dispatcher.assign(limit=1):
+                break
+            samples.append(time.perf_counter() - started)
+            if churn and len(samples) % churn == 0:
+                # Presença mudando durante a distribuição (entradas antigas no heap)
+                agent_id = agent_ids[len(samples) % len(agent_ids)]
+                dispatcher.set_online(agent_id, False)
+                dispatcher.set_online(agent_id, True)
+        assign_seconds = time.perf_counter() - started_all
+
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with counter:
+            persisted = dispatcher.flush()
+        flush_seconds = time.perf_counter() - started
+
+        now = timezone.now()
+        waits = [
+            (now - iniciado_em).total_seconds()
+            for iniciado_em in Atendimento.objects.filter(
+                status=Atendimento.Status.EM_ANDAMENTO
+            ).values_list('iniciado_em', flat=True)
+        ]
+        return {
+            'load_ms': round(load_seconds * 1000, 3),
+            'assign': summarize(samples),
+            'assign_per_s': round(len(samples) / assign_seconds, 1) if assign_seconds else 0.0,
+            'waiting_left': dispatcher.waiting_count(),
+            'flush': {
+                'persisted': persisted,
+                'seconds': round(flush_seconds, 3),
+                'queries': dict(counter.counts),
+            },
+            'queue_wait': summarize(waits),
+            'dispatcher': dict(dispatcher.stats),
+        }
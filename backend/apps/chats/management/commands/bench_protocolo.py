@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.accounts.benchmarks import bench_database, compare_baseline
+from apps.chats.bench_workers import create_atendimentos, init_worker
+from apps.chats.models import Atendimento, Chat
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark da geração de protocolos: cria atendimentos em N processos '
+        '(workers) com blocos de números e com um contador por número (block=1)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', default='1,2,4', help='Quantidades de workers, separadas por vírgula')
+        parser.add_argument('--per-worker', type=int, default=500, help='Atendimentos criados por worker')
+        parser.add_argument('--block-size', type=int, default=100)
+        parser.add_argument('--save-baseline', action='store_true')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Regressão tolerada (fração)')
+
+    def handle(self, *args, **options):
+        workers = [int(value) for value in options['workers'].split(',') if value]
+        per_worker = options['per_worker']
+
+        with tempfile.TemporaryDirectory() as tmp:
+            if connection.vendor == 'sqlite':
+                # Os workers são outros processos: o banco de teste precisa ser um arquivo
+                connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(tmp, 'bench.sqlite3')
+            with bench_database():
+                db_name = connection.settings_dict['NAME']
+                chat_id = Chat.objects.create(nome='Benchmark').pk
+                connection.close()
+                results = {}
+                for block_size in (1, options['block_size']):
+                    for count in workers:
+                        results[f'block{block_size}_workers{count}'] = self.run(
+                            db_name, chat_id, count, per_worker, block_size)
+
+        self.stdout.write(json.dumps(results, indent=2))
+        regressions = compare_baseline(
+            f'protocolo_{per_worker}',
+            {key: {'ms_per_atendimento': value['ms_per_atendimento']} for key, value in results.items()},
+            options['tolerance'],
+            save=options['save_baseline'],
+            metrics=('ms_per_atendimento',),
+        )
+        if regressions:
+            raise CommandError('Regressões em relação ao baseline:\n' + '\n'.join(regressions))
+
+    @staticmethod
+    def run(db_name, chat_id, workers, per_worker, block_size):
+        Atendimento.objects.all().delete()
+        protocolo_settings = {'BACKEND': 'db', 'BLOCK_SIZE': block_size}
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context('spawn'),
+            initializer=init_worker,
+            initargs=(db_name, protocolo_settings),
+        ) as pool:
+            # Aquece os processos (setup do Django) fora da medição
+            list(pool.map(time.sleep, [0.1] * workers))
+            started = time.perf_counter()
+            outcomes = list(pool.map(create_atendimentos, [per_worker] * workers, [chat_id] * workers))
+            elapsed = time.perf_counter() - started
+
+        total = workers * per_worker
+        created = Atendimento.objects.count()
+        unique = Atendimento.objects.values('protocolo').distinct().count()
+        if created != total or unique != total:
+            raise CommandError(f'Protocolos duplicados ou faltando: {created} criados, {unique} únicos')
+        return {
+            'atendimentos': total,
+            'seconds': round(elapsed, 3),
+            'per_s': round(total / elapsed, 1),
+            'ms_per_atendimento': round(elapsed / total * 1000, 4),
+            'blocks': sum(blocks for _, blocks in outcomes),
+        }
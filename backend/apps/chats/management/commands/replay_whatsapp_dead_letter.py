@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.chats.ingestion import get_dead_letter, replay_dead_letter
+
+
+class Command(BaseCommand):
+    help = 'Grava de novo as mensagens do WhatsApp que foram para o arquivo de dead letter'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Mensagens por lote')
+
+    def handle(self, *args, **options):
+        created, failed = replay_dead_letter(batch_size=options['batch_size'])
+        self.stdout.write(f'{created} mensagens gravadas de {get_dead_letter().path}')
+        if failed:
+            raise CommandError(f'{failed} mensagens falharam de novo e continuam no arquivo')
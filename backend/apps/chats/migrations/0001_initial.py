@@ -0,0 +1,52 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:16
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Chat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(blank=True, max_length=255, verbose_name='nome')),
+                ('last_message_id', models.BigIntegerField(blank=True, null=True, verbose_name='última mensagem')),
+                ('last_message_at', models.DateTimeField(blank=True, null=True, verbose_name='última mensagem em')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='atualizado em')),
+            ],
+            options={
+                'verbose_name': 'conversa',
+                'verbose_name_plural': 'conversas',
+                'indexes': [models.Index(fields=['-last_message_at', '-id'], name='chat_last_message_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Message',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('entrada', models.BooleanField(default=True, help_text='Recebida do contato.', verbose_name='entrada')),
+                ('tipo', models.PositiveSmallIntegerField(choices=[(1, 'texto'), (2, 'imagem'), (3, 'audio'), (4, 'video'), (5, 'documento')], default=1, verbose_name='tipo')),
+                ('conteudo', models.TextField(blank=True, verbose_name='conteúdo')),
+                ('midia_url', models.CharField(blank=True, max_length=500, verbose_name='URL da mídia')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='criado em')),
+                ('atendente', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('chat', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='chats.chat')),
+            ],
+            options={
+                'verbose_name': 'mensagem',
+                'verbose_name_plural': 'mensagens',
+                'indexes': [models.Index(fields=['chat', 'id'], name='message_chat_id_idx')],
+            },
+        ),
+    ]
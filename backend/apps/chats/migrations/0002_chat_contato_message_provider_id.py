@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0001_initial'),
+        ('contacts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='contato',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='chat', to='contacts.contact'),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='provider_id',
+            field=models.CharField(blank=True, max_length=128, null=True, unique=True, verbose_name='id no provedor'),
+        ),
+    ]
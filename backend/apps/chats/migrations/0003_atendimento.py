@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:21
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0002_chat_contato_message_provider_id'),
+        ('contacts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Atendimento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('aguardando', 'Aguardando'), ('em_andamento', 'Em andamento'), ('finalizado', 'Finalizado')], default='aguardando', max_length=20, verbose_name='status')),
+                ('iniciado_em', models.DateTimeField(default=django.utils.timezone.now, verbose_name='iniciado em')),
+                ('atendido_em', models.DateTimeField(blank=True, null=True, verbose_name='atendido em')),
+                ('finalizado_em', models.DateTimeField(blank=True, null=True, verbose_name='finalizado em')),
+                ('atendente', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='atendimentos', to=settings.AUTH_USER_MODEL)),
+                ('chat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='atendimentos', to='chats.chat')),
+                ('contato', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='atendimentos', to='contacts.contact')),
+            ],
+            options={
+                'verbose_name': 'atendimento',
+                'verbose_name_plural': 'atendimentos',
+                'indexes': [models.Index(fields=['status', 'id'], name='atendimento_status_id_idx'), models.Index(fields=['atendente', 'status'], name='atendimento_atendente_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'finalizado'), _negated=True), fields=('chat',), name='unique_open_atendimento_per_chat')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0003_atendimento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProtocoloSequence',
+            fields=[
+                ('name', models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name='nome')),
+                ('value', models.BigIntegerField(default=0, verbose_name='valor')),
+            ],
+            options={
+                'verbose_name': 'sequência de protocolo',
+                'verbose_name_plural': 'sequências de protocolo',
+            },
+        ),
+        migrations.AddField(
+            model_name='atendimento',
+            name='protocolo',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True, unique=True, verbose_name='protocolo'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:09
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0004_protocolo'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='chat',
+            name='chat_last_message_idx',
+        ),
+    ]
@@ -1,3 +1,176 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, router, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+
+class ChatQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """Conversas que o usuário pode ler: todas para a equipe; para os demais, as do seu atendimento aberto."""
+        if user.is_staff:
+            return self
+        return self.filter(pk__in=Atendimento.objects.filter(
+            atendente_id=user.pk,
+        ).exclude(status=Atendimento.Status.FINALIZADO).values('chat_id'))
+
+
+class Chat(models.Model):
+    """
+    Conversa. A última mensagem fica desnormalizada na própria linha para
+    listar conversas e abrir o histórico sem agregar sobre ``Message``.
+    """
+    nome = models.CharField(_('nome'), max_length=255, blank=True)
+    contato = models.OneToOneField(
+        'contacts.Contact',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='chat',
+    )
+
+    # Última mensagem (mantida por ``apps.chats.history.append_messages``)
+    last_message_id = models.BigIntegerField(_('última mensagem'), null=True, blank=True)
+    last_message_at = models.DateTimeField(_('última mensagem em'), null=True, blank=True)
+
+    # Campos de auditoria
+    created_at = models.DateTimeField(_('criado em'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('atualizado em'), auto_now=True)
+
+    objects = ChatQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('conversa')
+        verbose_name_plural = _('conversas')
+
+    def __str__(self):
+        return self.nome or f'Chat {self.pk}'
+
+
+class Message(models.Model):
+    """
+    Mensagem de uma conversa. Só é inserida, nunca alterada: o ``id``
+    crescente define a ordem e o índice ``(chat, id)`` atende a paginação
+    do histórico.
+    """
+    class Tipo(models.IntegerChoices):
+        TEXTO = 1, 'texto'
+        IMAGEM = 2, 'imagem'
+        AUDIO = 3, 'audio'
+        VIDEO = 4, 'video'
+        DOCUMENTO = 5, 'documento'
+
+    id = models.BigAutoField(primary_key=True)
+    chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='messages', db_index=False)
+    atendente = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
+    entrada = models.BooleanField(_('entrada'), default=True, help_text=_('Recebida do contato.'))
+    tipo = models.PositiveSmallIntegerField(_('tipo'), choices=Tipo.choices, default=Tipo.TEXTO)
+    conteudo = models.TextField(_('conteúdo'), blank=True)
+    midia_url = models.CharField(_('URL da mídia'), max_length=500, blank=True)
+    # Id da mensagem no provedor (WhatsApp); o índice único barra duplicatas
+    provider_id = models.CharField(_('id no provedor'), max_length=128, unique=True, null=True, blank=True)
+    created_at = models.DateTimeField(_('criado em'), default=timezone.now)
+
+    class Meta:
+        verbose_name = _('mensagem')
+        verbose_name_plural = _('mensagens')
+        indexes = [
+            # Histórico: chat_id = X AND id < cursor ORDER BY id DESC
+            models.Index(fields=['chat', 'id'], name='message_chat_id_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.chat_id}:{self.pk}'
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Mensagens não podem ser alteradas.')
+        using = kwargs.get('using') or router.db_for_write(Message, instance=self)
+        # A mensagem e o ponteiro da conversa entram juntos ou nenhum dos dois
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            Chat.objects.using(using).filter(
+                models.Q(last_message_id__isnull=True) | models.Q(last_message_id__lt=self.pk),
+                pk=self.chat_id,
+            ).update(last_message_id=self.pk, last_message_at=self.created_at)
+
+
+class Atendimento(models.Model):
+    """
+    Atendimento de uma conversa: aguarda na fila até o dispatcher
+    (``apps.chats.dispatch``) atribuí-lo a um atendente.
+    """
+    class Status(models.TextChoices):
+        AGUARDANDO = 'aguardando', _('Aguardando')
+        EM_ANDAMENTO = 'em_andamento', _('Em andamento')
+        FINALIZADO = 'finalizado', _('Finalizado')
+
+    chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='atendimentos')
+    contato = models.ForeignKey(
+        'contacts.Contact',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='atendimentos',
+    )
+    atendente = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='atendimentos',
+    )
+    status = models.CharField(_('status'), max_length=20, choices=Status.choices, default=Status.AGUARDANDO)
+    protocolo = models.CharField(_('protocolo'), max_length=32, unique=True, null=True, blank=True, editable=False)
+    iniciado_em = models.DateTimeField(_('iniciado em'), default=timezone.now)
+    atendido_em = models.DateTimeField(_('atendido em'), null=True, blank=True)
+    finalizado_em = models.DateTimeField(_('finalizado em'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('atendimento')
+        verbose_name_plural = _('atendimentos')
+        constraints = [
+            # No máximo um atendimento aberto por conversa
+            models.UniqueConstraint(
+                fields=['chat'],
+                condition=~models.Q(status='finalizado'),
+                name='unique_open_atendimento_per_chat',
+            ),
+        ]
+        indexes = [
+            # Fila: status = 'aguardando' ORDER BY id
+            models.Index(fields=['status', 'id'], name='atendimento_status_id_idx'),
+            # Carga por atendente: atendente = X AND status = 'em_andamento'
+            models.Index(fields=['atendente', 'status'], name='atendimento_atendente_idx'),
+        ]
+
+    def __str__(self):
+        return f'Atendimento {self.protocolo or self.pk} ({self.status})'
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.protocolo:
+            from .protocolo import next_protocolo
+            self.protocolo = next_protocolo()
+        super().save(*args, **kwargs)
+
+
+class ProtocoloSequence(models.Model):
+    """
+    Contador de protocolos por dia. Cada worker reserva um bloco de números
+    por vez (``apps.chats.protocolo``), então a linha só é tocada uma vez
+    por bloco.
+    """
+    name = models.CharField(_('nome'), max_length=32, primary_key=True)
+    value = models.BigIntegerField(_('valor'), default=0)
+
+    class Meta:
+        verbose_name = _('sequência de protocolo')
+        verbose_name_plural = _('sequências de protocolo')
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
@@ -0,0 +1,36 @@
+from rest_framework.exceptions import NotFound
+
+from apps.accounts.pagination import KeysetPagination
+
+
+class BeforeIdPagination(KeysetPagination):
+    """
+    Paginação por cursor em ``id`` (``?before=<id>&limit=``).
+
+    Cada página é ``id < before ORDER BY id DESC LIMIT n`` sobre o índice,
+    com custo independente da posição no histórico. Com ``chronological``
+    a página é devolvida da mais antiga para a mais recente.
+    """
+    ordering = ('-id',)
+    cursor_query_param = 'before'
+    chronological = False
+
+    @staticmethod
+    def encode_cursor(instance):
+        return instance.pk
+
+    def filter_after(self, queryset, cursor):
+        try:
+            return queryset.filter(id__lt=int(cursor))
+        except ValueError:
+            raise NotFound('Cursor inválido')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = super().paginate_queryset(queryset, request, view)
+        if self.chronological:
+            return page[::-1]
+        return page
+
+
+class MessageHistoryPagination(BeforeIdPagination):
+    chronological = True
@@ -0,0 +1,157 @@
+"""
+Geração dos números de protocolo dos atendimentos.
+
+Em vez de ``MAX() + 1`` ou de um contador travado por atendimento, cada
+worker reserva um bloco de ``BLOCK_SIZE`` números de uma vez (na tabela
+``ProtocoloSequence`` ou com ``INCRBY`` no Redis) e emite os números do
+bloco localmente. A unicidade vale entre workers e reinícios: um bloco
+nunca é entregue duas vezes, e o que sobra de um bloco ao reiniciar vira
+apenas uma lacuna na numeração.
+
+O contador é diário e o número é formatado com a data (``FORMAT``), por
+exemplo ``20261018000042``. O número do dia vai até ``MAX_NUMBER``
+(999999, o que cabe nos seis dígitos do ``FORMAT`` padrão); acima disso
+``take`` levanta ``ProtocoloExhausted`` em vez de gerar um protocolo mais
+longo. Quem precisar de mais atendimentos por dia deve alargar o
+``FORMAT`` e o ``MAX_NUMBER`` juntos.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+DEFAULTS = {
+    'BACKEND': 'db',  # 'db' (tabela de sequência) ou 'redis' (INCRBY)
+    'REDIS_URL': 'redis://127.0.0.1:6379/0',
+    'KEY_PREFIX': 'protocolo',
+    'BLOCK_SIZE': 100,
+    'FORMAT': '{date:%Y%m%d}{number:06d}',
+    'MAX_NUMBER': 999999,  # maior número do dia que cabe no FORMAT
+}
+
+
+def protocolo_setting(name):
+    return getattr(settings, 'PROTOCOLO', {}).get(name, DEFAULTS[name])
+
+
+class ProtocoloExhausted(Exception):
+    pass
+
+
+class DatabaseBlockSource:
+    """
+    Reserva blocos com um UPDATE atômico na linha do dia.
+
+    A reserva roda em uma thread própria, com conexão e transação
+    independentes: dentro da transação de quem cria o atendimento a linha
+    ficaria travada até o commit e um rollback devolveria um bloco que o
+    worker continuaria usando.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='protocolo')
+
+    def allocate(self, day, size):
+        return self._executor.submit(self._allocate, day, size).result()
+
+    @staticmethod
+    def _allocate(day, size):
+        from .models import ProtocoloSequence
+
+        db = router.db_for_write(ProtocoloSequence)
+        objects = ProtocoloSequence.objects.db_manager(db)
+        name = day.strftime('%Y%m%d')
+        with transaction.atomic(using=db):
+            if not objects.filter(name=name).update(value=F('value') + size):
+                objects.get_or_create(name=name)
+                objects.filter(name=name).update(value=F('value') + size)
+            end = objects.filter(name=name).values_list('value', flat=True).get()
+        return end - size + 1
+
+
+class RedisBlockSource:
+    """Reserva blocos com ``INCRBY`` na chave do dia."""
+
+    def __init__(self, url, prefix):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def allocate(self, day, size):
+        key = f'{self._prefix}:{day:%Y%m%d}'
+        pipe = self._redis.pipeline()
+        pipe.incrby(key, size)
+        pipe.expire(key, 3 * 24 * 3600)
+        end = pipe.execute()[0]
+        return end - size + 1
+
+
+class ProtocoloAllocator:
+    def __init__(self, source=None, block_size=None, fmt=None, max_number=None):
+        self.source = source or self.default_source()
+        self.block_size = block_size or protocolo_setting('BLOCK_SIZE')
+        self.format = fmt or protocolo_setting('FORMAT')
+        self.max_number = max_number or protocolo_setting('MAX_NUMBER')
+        self._lock = threading.Lock()
+        self._day = None
+        self._next = 1
+        self._end = 0
+        self.blocks = 0
+
+    @staticmethod
+    def default_source():
+        if protocolo_setting('BACKEND') == 'redis':
+            return RedisBlockSource(protocolo_setting('REDIS_URL'), protocolo_setting('KEY_PREFIX'))
+        return DatabaseBlockSource()
+
+    def next(self):
+        return self.take(1)[0]
+
+    def take(self, count):
+        """
+        Retorna ``count`` protocolos, reservando novos blocos quando preciso.
+        Levanta ``ProtocoloExhausted`` se o dia passou de ``MAX_NUMBER``.
+        """
+        today = timezone.localdate()
+        numbers = []
+        with self._lock:
+            if self._day != today:
+                # Virada do dia: o resto do bloco anterior é descartado
+                self._day, self._next, self._end = today, 1, 0
+            while len(numbers) < count:
+                if self._next > self._end:
+                    size = max(self.block_size, count - len(numbers))
+                    self._next = self.source.allocate(today, size)
+                    self._end = min(self._next + size - 1, self.max_number)
+                    self.blocks += 1
+                    if self._next > self._end:
+                        raise ProtocoloExhausted(
+                            f'Limite de {self.max_number} protocolos em {today:%d/%m/%Y} atingido')
+                stop = min(self._end + 1, self._next + count - len(numbers))
+                numbers.extend(range(self._next, stop))
+                self._next = stop
+        return [self.format.format(date=today, number=number) for number in numbers]
+
+
+_allocator = None
+_allocator_lock = threading.Lock()
+
+
+def get_allocator():
+    global _allocator
+    if _allocator is None:
+        with _allocator_lock:
+            if _allocator is None:
+                _allocator = ProtocoloAllocator()
+    return _allocator
+
+
+def next_protocolo():
+    return get_allocator().next()
+
+
+def take_protocolos(count):
+    return get_allocator().take(count)
@@ -0,0 +1,80 @@
+from rest_framework import serializers
+
+from .models import Atendimento, Chat, Message
+
+
+class TipoField(serializers.ChoiceField):
+    """Guarda o tipo como inteiro e o expõe pelo nome (``'texto'``)."""
+
+    def __init__(self, **kwargs):
+        super().__init__(choices=Message.Tipo.choices, **kwargs)
+        self.by_label = {label: value for value, label in Message.Tipo.choices}
+
+    def to_internal_value(self, data):
+        if data in self.by_label:
+            return self.by_label[data]
+        return super().to_internal_value(data)
+
+    def to_representation(self, value):
+        return Message.Tipo(value).label
+
+
+class ChatSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Chat
+        fields = ['id', 'nome', 'last_message_id', 'last_message_at', 'created_at']
+        read_only_fields = ['id', 'last_message_id', 'last_message_at', 'created_at']
+
+
+class MessageSerializer(serializers.ModelSerializer):
+    tipo = TipoField(required=False)
+
+    class Meta:
+        model = Message
+        fields = ['id', 'chat_id', 'atendente_id', 'entrada', 'tipo', 'conteudo', 'midia_url', 'created_at']
+        read_only_fields = ['id', 'chat_id', 'atendente_id', 'created_at']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Payload compacto: omite campos vazios
+        for field in ('atendente_id', 'midia_url'):
+            if not data[field]:
+                del data[field]
+        return data
+
+
+class AtendimentoSerializer(serializers.ModelSerializer):
+    chat_id = serializers.PrimaryKeyRelatedField(source='chat', queryset=Chat.objects.all())
+
+    class Meta:
+        model = Atendimento
+        fields = [
+            'id',
+            'chat_id',
+            'contato_id',
+            'atendente_id',
+            'status',
+            'protocolo',
+            'iniciado_em',
+            'atendido_em',
+            'finalizado_em',
+        ]
+        read_only_fields = [
+            'id',
+            'contato_id',
+            'atendente_id',
+            'status',
+            'protocolo',
+            'iniciado_em',
+            'atendido_em',
+            'finalizado_em',
+        ]
+
+    def validate_chat_id(self, chat):
+        if chat.atendimentos.exclude(status=Atendimento.Status.FINALIZADO).exists():
+            raise serializers.ValidationError('A conversa já tem um atendimento aberto.')
+        return chat
+
+    def create(self, validated_data):
+        validated_data['contato_id'] = validated_data['chat'].contato_id
+        return super().create(validated_data)
@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.accounts.presence import presence_changed
+
+from .dispatch import dispatch_setting, get_dispatcher, wake_dispatcher
+from .models import Atendimento
+
+
+@receiver(presence_changed)
+def update_dispatcher_presence(sender, user_id, state, **kwargs):
+    """Mantém o heap de atendentes disponíveis em dia com a presença."""
+    if not dispatch_setting('ENABLED'):
+        return
+    get_dispatcher().set_online(user_id, state.is_online)
+    if state.is_online:
+        wake_dispatcher()
+
+
+@receiver(post_save, sender=Atendimento)
+def enqueue_atendimento(sender, instance, created, raw=False, **kwargs):
+    """Coloca na fila do dispatcher os atendimentos criados aguardando."""
+    if raw or not created or not dispatch_setting('ENABLED'):
+        return
+    if instance.status != Atendimento.Status.AGUARDANDO or instance.atendente_id is not None:
+        return
+
+    def enqueue():
+        get_dispatcher().enqueue(instance.pk, instance.iniciado_em)
+        wake_dispatcher()
+
+    transaction.on_commit(enqueue)
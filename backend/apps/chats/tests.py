@@ -1,3 +1,376 @@
-from django.test import TestCase
+import tempfile
+from datetime import date
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.accounts.presence import MemoryPresenceStore
+from apps.contacts.models import Contact
+
+from . import ingestion
+from .broadcast import chat_group
+from .consumers import ChatConsumer
+from .dispatch import Dispatcher
+from .fake_provider import FakeWhatsAppProvider
+from .models import Atendimento, Chat, Message
+from .protocolo import ProtocoloAllocator, ProtocoloExhausted
+
+User = get_user_model()
+
+APP_SECRET = 'test-secret'
+
+
+class MessageHistoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='historico@teste.local', password='x', nome='Histórico')
+        cls.other = User.objects.create_user(email='alheio@teste.local', password='x', nome='Alheio')
+        cls.chat = Chat.objects.create(nome='Histórico')
+        Atendimento.objects.create(
+            chat=cls.chat, atendente=cls.user, status=Atendimento.Status.EM_ANDAMENTO, protocolo='H1')
+        cls.messages = [Message.objects.create(chat=cls.chat, conteudo=str(i)) for i in range(5)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_chat_points_at_the_last_message(self):
+        self.chat.refresh_from_db()
+        self.assertEqual(self.chat.last_message_id, self.messages[-1].id)
+        self.assertEqual(self.chat.last_message_at, self.messages[-1].created_at)
+
+    def test_history_pages_backwards_each_page_in_chronological_order(self):
+        pages = []
+        url = f'/api/v1/chats/{self.chat.id}/messages/?limit=2'
+        while url:
+            page = self.client.get(url).json()
+            pages.append([message['conteudo'] for message in page['results']])
+            url = page['next']
+        self.assertEqual(pages, [['3', '4'], ['1', '2'], ['0']])
+        self.assertEqual(self.client.get(f'/api/v1/chats/{self.chat.id}/messages/?before=x').status_code, 404)
+        self.assertEqual(self.client.get('/api/v1/chats/0/messages/').status_code, 404)
+
+    def test_only_the_assigned_agent_or_staff_see_the_chat(self):
+        Chat.objects.create(nome='Sem atendimento')
+        self.assertEqual([chat['id'] for chat in self.client.get('/api/v1/chats/').json()['results']], [self.chat.id])
+
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get('/api/v1/chats/').json()['results'], [])
+        self.assertEqual(self.client.get(f'/api/v1/chats/{self.chat.id}/').status_code, 404)
+        url = f'/api/v1/chats/{self.chat.id}/messages/'
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.post(url, {'conteudo': 'intrusa'}, format='json').status_code, 404)
+        self.assertFalse(Message.objects.filter(conteudo='intrusa').exists())
+
+        self.other.is_staff = True
+        self.assertEqual(len(self.client.get('/api/v1/chats/').json()['results']), 2)
+
+    def test_message_is_rolled_back_if_the_chat_pointer_fails(self):
+        with mock.patch('django.db.models.query.QuerySet.update', side_effect=DatabaseError('falha')):
+            with self.assertRaises(DatabaseError):
+                Message.objects.create(chat=self.chat, conteudo='perdida')
+        self.assertFalse(Message.objects.filter(conteudo='perdida').exists())
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    CHAT_WS={'BATCH_WINDOW': 0.01, 'MAX_QUEUE': 3},
+)
+class ChatConsumerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = User.objects.create_user(email='agente@teste.local', password='x', nome='Agente')
+        cls.other = User.objects.create_user(email='outro@teste.local', password='x', nome='Outro')
+        cls.staff = User.objects.create_user(email='equipe@teste.local', password='x', nome='Equipe', is_staff=True)
+        cls.chat = Chat.objects.create(nome='Consumer')
+        Atendimento.objects.create(
+            chat=cls.chat, atendente=cls.agent, status=Atendimento.Status.EM_ANDAMENTO, protocolo='T1')
+
+    async def connect(self, user):
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), '/ws/chats/')
+        communicator.scope['user'] = user
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def subscribe(self, user):
+        communicator = await self.connect(user)
+        await communicator.send_json_to({'type': 'subscribe', 'chat_id': self.chat.id})
+        return communicator, await communicator.receive_json_from()
+
+    async def test_only_the_assigned_agent_or_staff_can_subscribe(self):
+        cases = ((self.agent, 'chat.subscribed'), (self.staff, 'chat.subscribed'), (self.other, 'chat.error'))
+        for user, expected in cases:
+            communicator, reply = await self.subscribe(user)
+            self.assertEqual(reply['type'], expected, user.email)
+            await communicator.disconnect()
+
+    async def test_burst_above_max_queue_becomes_a_resync(self):
+        communicator, _ = await self.subscribe(self.agent)
+        layer = get_channel_layer()
+        event = {'type': 'chat.messages', 'chat_id': self.chat.id}
+        burst = ['{"id":1}', '{"id":2}', '{"id":3}', '{"id":4}']
+        await layer.group_send(chat_group(self.chat.id), {**event, 'encoded': burst})
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'chat.resync', 'chat_ids': [self.chat.id]})
+
+        await layer.group_send(chat_group(self.chat.id), {**event, 'encoded': ['{"id":5}']})
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'chat.batch', 'messages': [{'id': 5}]})
+        await communicator.disconnect()
+
+
+class CounterBlockSource:
+    """Contador por dia em memória, compartilhado entre alocadores como a tabela ou o Redis."""
+
+    def __init__(self):
+        self.values = {}
+
+    def allocate(self, day, size):
+        self.values[day] = self.values.get(day, 0) + size
+        return self.values[day] - size + 1
+
+
+@mock.patch('apps.chats.protocolo.timezone.localdate', return_value=date(2026, 10, 18))
+class ProtocoloAllocatorTests(SimpleTestCase):
+    def test_workers_take_disjoint_blocks(self, localdate):
+        source = CounterBlockSource()
+        first = ProtocoloAllocator(source, block_size=100)
+        second = ProtocoloAllocator(source, block_size=100)
+        numbers = first.take(3) + second.take(2) + first.take(150)
+        self.assertEqual(len(set(numbers)), len(numbers))
+        self.assertEqual(numbers[:4], ['20261018000001', '20261018000002', '20261018000003', '20261018000101'])
+        self.assertEqual(first.blocks, 2)
+
+    def test_counter_restarts_every_day(self, localdate):
+        allocator = ProtocoloAllocator(CounterBlockSource(), block_size=10)
+        self.assertEqual(allocator.take(2), ['20261018000001', '20261018000002'])
+        localdate.return_value = date(2026, 10, 19)
+        self.assertEqual(allocator.next(), '20261019000001')
+
+    def test_numbers_past_the_daily_limit_are_rejected(self, localdate):
+        source = CounterBlockSource()
+        source.values[date(2026, 10, 18)] = 999998
+        allocator = ProtocoloAllocator(source, block_size=100)
+        self.assertEqual(allocator.next(), '20261018999999')
+        with self.assertRaises(ProtocoloExhausted):
+            allocator.next()
+
+
+class AtendimentoCreateTests(TestCase):
+    @mock.patch('apps.chats.protocolo._allocator', ProtocoloAllocator(CounterBlockSource(), max_number=1))
+    def test_create_past_the_daily_limit_is_unavailable(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(email='cria@teste.local', password='x', nome='Cria'))
+        first, second = Chat.objects.create(nome='1'), Chat.objects.create(nome='2')
+        response = client.post('/api/v1/chats/atendimentos/', {'chat_id': first.id}, format='json')
+        self.assertEqual(response.status_code, 201)
+        response = client.post('/api/v1/chats/atendimentos/', {'chat_id': second.id}, format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(Atendimento.objects.count(), 1)
+
+
+class DispatcherTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = User.objects.create_user(email='fila@teste.local', password='x', nome='Fila')
+        cls.away = User.objects.create_user(email='ausente@teste.local', password='x', nome='Ausente')
+
+    def setUp(self):
+        self.store = MemoryPresenceStore()
+        patcher = mock.patch('apps.accounts.presence._store', self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store.set(self.agent.id, True)
+        self.store.set(self.away.id, False)
+
+    def waiting(self, count):
+        return [
+            Atendimento.objects.create(chat=Chat.objects.create(nome=str(i)), protocolo=f'D{i}')
+            for i in range(count)
+        ]
+
+    def test_load_takes_online_agents_from_the_presence_store(self):
+        atendimentos = self.waiting(2)
+        dispatcher = Dispatcher(max_load=5)
+        dispatcher.load()
+        self.assertEqual(dispatcher.assign(), 2)
+        self.assertEqual(dispatcher.flush(), 2)
+        self.assertEqual(
+            set(Atendimento.objects.filter(pk__in=[a.pk for a in atendimentos]).values_list('status', 'atendente')),
+            {(Atendimento.Status.EM_ANDAMENTO, self.agent.id)},
+        )
+
+    def test_reload_sees_what_other_processes_assigned_or_finalized(self):
+        taken, finished, left = self.waiting(3)
+        dispatcher = Dispatcher(max_load=2)
+        dispatcher.load()
+
+        # Outro processo atribui um e finaliza outro
+        Atendimento.objects.filter(pk=taken.pk).update(
+            status=Atendimento.Status.EM_ANDAMENTO, atendente=self.agent)
+        Atendimento.objects.filter(pk=finished.pk).update(status=Atendimento.Status.FINALIZADO)
+        dispatcher.load()
+
+        self.assertEqual(dispatcher.waiting_count(), 1)
+        self.assertEqual(dispatcher.assign(), 1)
+        self.assertEqual(dispatcher.flush(), 1)
+        self.assertEqual(dispatcher.stats['conflicts'], 0)
+        self.assertEqual(Atendimento.objects.get(pk=left.pk).atendente_id, self.agent.id)
+        self.assertEqual(dispatcher.available_count(), 0)
+
+    def test_finalizar_releases_the_agent_it_took_the_atendimento_from(self):
+        [atendimento] = self.waiting(1)
+        Atendimento.objects.filter(pk=atendimento.pk).update(
+            status=Atendimento.Status.EM_ANDAMENTO, atendente=self.agent)
+        client = APIClient()
+        client.force_authenticate(self.agent)
+        url = f'/api/v1/chats/atendimentos/{atendimento.pk}/finalizar/'
+        dispatcher = mock.Mock()
+        with mock.patch('apps.chats.views.get_dispatcher', return_value=dispatcher):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.post(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['status'], Atendimento.Status.FINALIZADO)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(client.post(url).status_code, 400)
+        dispatcher.release.assert_called_once_with(self.agent.id)
+
+    def test_only_staff_or_the_agent_can_finalizar(self):
+        [atendimento] = self.waiting(1)
+        Atendimento.objects.filter(pk=atendimento.pk).update(
+            status=Atendimento.Status.EM_ANDAMENTO, atendente=self.agent)
+        client = APIClient()
+        client.force_authenticate(self.away)
+        url = f'/api/v1/chats/atendimentos/{atendimento.pk}/finalizar/'
+        dispatcher = mock.Mock()
+        with mock.patch('apps.chats.views.get_dispatcher', return_value=dispatcher):
+            self.assertEqual(client.post(url).status_code, 403)
+            self.assertEqual(Atendimento.objects.get(pk=atendimento.pk).status, Atendimento.Status.EM_ANDAMENTO)
+
+            # Um UPDATE que nunca casa não prende a requisição
+            with mock.patch('django.db.models.query.QuerySet.update', return_value=0):
+                client.force_authenticate(self.agent)
+                self.assertEqual(client.post(url).status_code, 409)
+        dispatcher.release.assert_not_called()
+
+
+@override_settings(
+    WHATSAPP={'APP_SECRET': APP_SECRET, 'WORKERS': 0, 'QUEUE_SIZE': 100, 'SEEN_SIZE': 10},
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+)
+class WhatsAppWebhookTests(TestCase):
+    def setUp(self):
+        ingestion._pipeline = None
+        self.provider = FakeWhatsAppProvider(APP_SECRET, client=self.client)
+        # A reserva no banco usa outra conexão, que a transação do teste trava
+        self.allocator = ProtocoloAllocator(CounterBlockSource(), block_size=10)
+        patcher = mock.patch('apps.chats.protocolo._allocator', self.allocator)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        ingestion._pipeline = None
+
+    def test_invalid_signature_is_rejected(self):
+        message = self.provider.message('5511999990000', 'oi')
+        [response] = self.provider.deliver([message], secret='outro')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(ingestion.get_pipeline().queue.qsize(), 0)
+
+    def test_retries_do_not_duplicate(self):
+        messages = [
+            self.provider.message('5511999990000', 'oi', name='Ana'),
+            self.provider.message('5511999990000', 'tudo bem?', name='Ana'),
+            self.provider.message('5521988880000', 'bom dia', name='Bruno'),
+        ]
+        responses = self.provider.deliver(messages, retries=2)
+        self.assertEqual([r.status_code for r in responses], [200, 200, 200])
+
+        ingestion.get_pipeline().flush()
+
+        self.assertEqual(Message.objects.count(), 3)
+        self.assertEqual(Contact.objects.count(), 2)
+        self.assertEqual(Chat.objects.count(), 2)
+        chat = Chat.objects.get(contato__telefone='+5511999990000')
+        self.assertEqual(chat.nome, 'Ana')
+        self.assertEqual(chat.last_message_id, Message.objects.filter(chat=chat).latest('id').id)
+        self.assertEqual(Atendimento.objects.filter(status=Atendimento.Status.AGUARDANDO).count(), 2)
+
+    def test_unique_index_catches_ids_evicted_from_seen_set(self):
+        first = self.provider.message('5511999990000', 'oi')
+        self.provider.deliver([first])
+        ingestion.get_pipeline().flush()
+
+        # Empurra o id para fora do conjunto em memória e reenvia
+        self.provider.deliver([self.provider.message('5511999990000', str(i)) for i in range(10)])
+        self.provider.deliver([first])
+        ingestion.get_pipeline().flush()
+
+        self.assertEqual(Message.objects.filter(provider_id=first['raw']['id']).count(), 1)
+        self.assertEqual(Message.objects.count(), 11)
+
+    @override_settings(WHATSAPP={'APP_SECRET': APP_SECRET, 'WORKERS': 0, 'QUEUE_SIZE': 2})
+    def test_full_queue_asks_for_retry(self):
+        messages = [self.provider.message('5511999990000', str(i)) for i in range(3)]
+        [response] = self.provider.deliver(messages)
+        self.assertEqual(response.status_code, 503)
+
+        # Os ids não enfileirados continuam aceitos no reenvio
+        ingestion.get_pipeline().flush()
+        [response] = self.provider.deliver(messages)
+        self.assertEqual(response.status_code, 200)
+        ingestion.get_pipeline().flush()
+        self.assertEqual(Message.objects.count(), 3)
+
+    def test_messages_are_rolled_back_when_the_atendimento_cannot_be_opened(self):
+        open_atendimentos = ingestion.open_atendimentos
+        calls = []
+
+        def flaky(atendimentos):
+            calls.append(len(atendimentos))
+            if len(calls) == 1:
+                raise DatabaseError('fora do ar')
+            open_atendimentos(atendimentos)
+
+        self.provider.deliver([self.provider.message('5511999990000', 'oi')])
+        with mock.patch.object(ingestion, 'open_atendimentos', flaky), self.assertLogs('apps.chats.ingestion'):
+            ingestion.get_pipeline().flush()
+        # A nova tentativa não acha a mensagem gravada e abre o atendimento
+        self.assertEqual(calls, [1, 1])
+        self.assertEqual(Message.objects.count(), 1)
+        self.assertEqual(Atendimento.objects.get().chat_id, Message.objects.get().chat_id)
+        self.assertEqual(ingestion.get_pipeline().stats['dead_letter'], 0)
+
+    def test_messages_are_kept_when_protocolos_run_out(self):
+        self.allocator.max_number = 0
+        self.provider.deliver([self.provider.message('5511999990000', 'oi')])
+        with self.assertLogs('apps.chats.ingestion', 'ERROR'):
+            ingestion.get_pipeline().flush()
+        self.assertEqual(Message.objects.count(), 1)
+        self.assertFalse(Atendimento.objects.exists())
+        self.assertEqual(ingestion.get_pipeline().stats['dead_letter'], 0)
+
+    def test_batch_that_keeps_failing_goes_to_the_dead_letter_and_is_replayed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'dead-letter.jsonl'
+            with self.settings(WHATSAPP={'APP_SECRET': APP_SECRET, 'WORKERS': 0, 'RETRIES': 1, 'DEAD_LETTER': path}):
+                messages = [self.provider.message('5511999990000', str(i), name='Ana') for i in range(3)]
+                [response] = self.provider.deliver(messages)
+                self.assertEqual(response.status_code, 200)
+                with mock.patch.object(ingestion, 'persist_messages', side_effect=DatabaseError('fora do ar')):
+                    ingestion.get_pipeline().flush()
+                self.assertEqual(Message.objects.count(), 0)
+                self.assertEqual(len(path.read_text().splitlines()), 3)
+
+                call_command('replay_whatsapp_dead_letter', stdout=mock.Mock())
+
+                self.assertFalse(path.exists())
+                self.assertEqual(
+                    list(Message.objects.order_by('id').values_list('conteudo', flat=True)), ['0', '1', '2'])
+                self.assertEqual(Chat.objects.get().nome, 'Ana')
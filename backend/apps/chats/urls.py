@@ -1,6 +1,20 @@
 from django.urls import path
-from . import views
+from .views import (
+    AtendimentoListCreateAPIView,
+    ChatListCreateAPIView,
+    ChatRetrieveAPIView,
+    MessageListCreateAPIView,
+    finalizar_atendimento,
+    whatsapp_webhook,
+)
 
 app_name = 'chats'
 
-urlpatterns = []
\ No newline at end of file
+urlpatterns = [
+    path('', ChatListCreateAPIView.as_view(), name='list'),
+    path('<int:pk>/', ChatRetrieveAPIView.as_view(), name='detail'),
+    path('<int:pk>/messages/', MessageListCreateAPIView.as_view(), name='messages'),
+    path('atendimentos/', AtendimentoListCreateAPIView.as_view(), name='atendimentos'),
+    path('atendimentos/<int:pk>/finalizar/', finalizar_atendimento, name='finalizar_atendimento'),
+    path('webhooks/whatsapp/', whatsapp_webhook, name='whatsapp_webhook'),
+]
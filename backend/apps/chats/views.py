@@ -1,3 +1,190 @@
-from django.shortcuts import render
+from django.db import transaction
+from django.utils import timezone
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden
+from django.shortcuts import get_object_or_404
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from rest_framework import generics, permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
 
-# Create your views here.
+from apps.accounts.jsoncodec import loads
+from apps.accounts.metrics import registry
+
+from .broadcast import publish_messages
+from .dispatch import dispatch_setting, get_dispatcher, wake_dispatcher
+from .ingestion import get_pipeline
+from .models import Atendimento, Chat, Message
+from .pagination import BeforeIdPagination, MessageHistoryPagination
+from .protocolo import ProtocoloExhausted
+from .serializers import AtendimentoSerializer, ChatSerializer, MessageSerializer
+from .whatsapp import SIGNATURE_HEADER, parse_webhook, verify_signature, whatsapp_setting
+
+whatsapp_webhook_total = registry.counter(
+    'whatsapp_webhook_total', 'Requisições ao webhook do WhatsApp por resultado', ['result'])
+
+
+class ChatListCreateAPIView(generics.ListCreateAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ChatSerializer
+    pagination_class = BeforeIdPagination
+
+    def get_queryset(self):
+        return Chat.objects.visible_to(self.request.user)
+
+
+class ChatRetrieveAPIView(generics.RetrieveAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ChatSerializer
+
+    def get_queryset(self):
+        return Chat.objects.visible_to(self.request.user)
+
+
+class MessageListCreateAPIView(generics.ListCreateAPIView):
+    """
+    Histórico da conversa (``?before=<id>&limit=``) e envio de mensagens,
+    para quem pode ver a conversa (``Chat.objects.visible_to``).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = MessageSerializer
+    pagination_class = MessageHistoryPagination
+
+    def get_chat(self):
+        return get_object_or_404(Chat.objects.visible_to(self.request.user).only('id'), pk=self.kwargs['pk'])
+
+    def get_queryset(self):
+        # Não busca o Chat: o filtro por chat_id usa direto o índice (chat, id)
+        return Message.objects.filter(chat_id=self.kwargs['pk'])
+
+    def list(self, request, *args, **kwargs):
+        self.get_chat()
+        return super().list(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        message = serializer.save(chat=self.get_chat(), atendente=self.request.user, entrada=False)
+        transaction.on_commit(lambda: publish_messages([message]))
+
+
+class ProtocoloUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Limite diário de protocolos atingido'
+    default_code = 'protocolo_exhausted'
+
+
+class AtendimentoListCreateAPIView(generics.ListCreateAPIView):
+    """
+    Atendimentos (``?status=`` e ``?atendente=me``). Os criados entram
+    aguardando na fila do dispatcher; passado o limite diário de protocolos
+    a criação responde 503.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = AtendimentoSerializer
+    pagination_class = BeforeIdPagination
+
+    def get_queryset(self):
+        queryset = Atendimento.objects.all()
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        if self.request.query_params.get('atendente') == 'me':
+            queryset = queryset.filter(atendente=self.request.user)
+        return queryset
+
+    def perform_create(self, serializer):
+        try:
+            serializer.save()
+        except ProtocoloExhausted:
+            raise ProtocoloUnavailable()
+
+
+# Releituras quando o UPDATE condicional não casa antes de desistir com 409
+FINALIZAR_ATTEMPTS = 3
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def finalizar_atendimento(request, pk):
+    """
+    Finaliza o atendimento e libera a capacidade do atendente no dispatcher.
+    Só a equipe ou o próprio atendente podem finalizar.
+
+    A liberação sai do mesmo estado que o UPDATE troca: a linha é travada
+    (``select_for_update``) e o UPDATE ainda filtra pelo status e pelo
+    atendente lidos, então uma atribuição do dispatcher entre a leitura e a
+    escrita (bancos sem trava de linha, como o SQLite) faz reler em vez de
+    deixar o atendente com a carga presa. Se o estado continua mudando após
+    ``FINALIZAR_ATTEMPTS`` leituras, responde 409.
+    """
+    for _ in range(FINALIZAR_ATTEMPTS):
+        with transaction.atomic():
+            atendimento = get_object_or_404(Atendimento.objects.select_for_update(), pk=pk)
+            if not request.user.is_staff and atendimento.atendente_id != request.user.pk:
+                return Response(
+                    {'detail': 'Atendimento de outro atendente'}, status=status.HTTP_403_FORBIDDEN)
+            if atendimento.status == Atendimento.Status.FINALIZADO:
+                return Response({'detail': 'Atendimento já finalizado'}, status=status.HTTP_400_BAD_REQUEST)
+            updated = Atendimento.objects.filter(
+                pk=pk, status=atendimento.status, atendente_id=atendimento.atendente_id,
+            ).update(
+                status=Atendimento.Status.FINALIZADO,
+                finalizado_em=timezone.now(),
+            )
+            if not updated:
+                continue
+            if atendimento.status == Atendimento.Status.EM_ANDAMENTO and dispatch_setting('ENABLED'):
+                agent_id = atendimento.atendente_id
+
+                def release():
+                    get_dispatcher().release(agent_id)
+                    wake_dispatcher()
+
+                transaction.on_commit(release)
+            break
+    else:
+        return Response(
+            {'detail': 'Atendimento alterado durante a finalização; tente novamente'},
+            status=status.HTTP_409_CONFLICT,
+        )
+    atendimento.refresh_from_db()
+    return Response(AtendimentoSerializer(atendimento).data)
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+def whatsapp_webhook(request):
+    """
+    Webhook do WhatsApp. O GET confirma a assinatura do webhook; o POST
+    valida a assinatura, enfileira as mensagens e responde imediatamente.
+    """
+    if request.method == 'GET':
+        verify_token = whatsapp_setting('VERIFY_TOKEN')
+        if (
+            verify_token
+            and request.GET.get('hub.mode') == 'subscribe'
+            and request.GET.get('hub.verify_token') == verify_token
+        ):
+            return HttpResponse(request.GET.get('hub.challenge', ''), content_type='text/plain')
+        return HttpResponseForbidden()
+
+    body = request.body
+    if not verify_signature(body, request.META.get(SIGNATURE_HEADER), whatsapp_setting('APP_SECRET')):
+        whatsapp_webhook_total.inc(result='invalid_signature')
+        return HttpResponseForbidden()
+    try:
+        payload = loads(body)
+    except ValueError:
+        whatsapp_webhook_total.inc(result='invalid_payload')
+        return HttpResponseBadRequest()
+
+    messages = parse_webhook(payload) if isinstance(payload, dict) else []
+    if messages and not get_pipeline().enqueue(messages):
+        # Fila cheia: o provedor reenvia e a deduplicação descarta o que já entrou
+        whatsapp_webhook_total.inc(result='queue_full')
+        response = HttpResponse(status=503)
+        response['Retry-After'] = '5'
+        return response
+
+    whatsapp_webhook_total.inc(result='accepted')
+    return HttpResponse(status=200)
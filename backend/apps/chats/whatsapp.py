@@ -0,0 +1,118 @@
+"""
+Webhook do WhatsApp (Cloud API): assinatura e conversão do payload.
+
+O provedor assina o corpo com HMAC-SHA256 usando o app secret
+(``X-Hub-Signature-256: sha256=<hex>``) e reenvia o evento enquanto não
+recebe 200, então o mesmo ``id`` de mensagem pode chegar várias vezes.
+"""
+import hashlib
+import hmac
+from datetime import datetime, timezone as dt_timezone
+from typing import NamedTuple
+
+from django.conf import settings
+
+from apps.contacts.phones import normalize_phone
+
+from .models import Message
+
+DEFAULTS = {
+    'APP_SECRET': '',
+    'VERIFY_TOKEN': '',
+    'QUEUE_SIZE': 10000,  # eventos pendentes; acima disso responde 503
+    'BATCH_SIZE': 200,  # mensagens por lote gravado
+    'BATCH_WINDOW': 0.1,  # segundos esperando o lote encher
+    'SEEN_SIZE': 100000,  # ids recentes mantidos em memória para descartar reenvios
+    'WORKERS': 1,  # threads consumidoras; 0 = só processa em ``flush()``
+    'RETRIES': 3,  # novas tentativas de gravação de um lote com erro de banco
+    'DEAD_LETTER': 'whatsapp-dead-letter.jsonl',  # lotes que esgotaram as tentativas
+}
+
+SIGNATURE_HEADER = 'HTTP_X_HUB_SIGNATURE_256'
+
+MEDIA_TYPES = {
+    'image': Message.Tipo.IMAGEM,
+    'audio': Message.Tipo.AUDIO,
+    'voice': Message.Tipo.AUDIO,
+    'video': Message.Tipo.VIDEO,
+    'document': Message.Tipo.DOCUMENTO,
+}
+
+
+def whatsapp_setting(name):
+    return getattr(settings, 'WHATSAPP', {}).get(name, DEFAULTS[name])
+
+
+class InboundMessage(NamedTuple):
+    provider_id: str
+    telefone: str
+    nome: str
+    tipo: int
+    conteudo: str
+    midia_url: str
+    created_at: datetime
+
+
+def sign(body, secret):
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return f'sha256={digest}'
+
+
+def verify_signature(body, header, secret):
+    if not secret or not header:
+        return False
+    return hmac.compare_digest(sign(body, secret), header)
+
+
+def parse_webhook(payload):
+    """Extrai as mensagens recebidas; status de entrega e outros eventos são ignorados."""
+    messages = []
+    for entry in payload.get('entry') or ():
+        for change in entry.get('changes') or ():
+            value = change.get('value') or {}
+            names = {
+                contact.get('wa_id'): (contact.get('profile') or {}).get('name', '')
+                for contact in value.get('contacts') or ()
+            }
+            for raw in value.get('messages') or ():
+                message = parse_message(raw, names)
+                if message is not None:
+                    messages.append(message)
+    return messages
+
+
+def parse_message(raw, names):
+    provider_id = raw.get('id')
+    # O wa_id já vem com o código do país
+    telefone = normalize_phone(f'+{raw.get("from") or ""}')
+    if not provider_id or telefone is None:
+        return None
+
+    kind = raw.get('type', 'text')
+    if kind == 'text':
+        tipo = Message.Tipo.TEXTO
+        conteudo = (raw.get('text') or {}).get('body', '')
+        midia_url = ''
+    elif kind in MEDIA_TYPES:
+        tipo = MEDIA_TYPES[kind]
+        media = raw.get(kind) or {}
+        conteudo = media.get('caption', '')
+        # A Cloud API entrega o id da mídia; o download é feito sob demanda
+        midia_url = media.get('link') or media.get('id', '')
+    else:
+        return None
+
+    try:
+        created_at = datetime.fromtimestamp(int(raw['timestamp']), tz=dt_timezone.utc)
+    except (KeyError, TypeError, ValueError):
+        created_at = datetime.now(tz=dt_timezone.utc)
+
+    return InboundMessage(
+        provider_id=provider_id,
+        telefone=telefone,
+        nome=names.get(raw['from'], ''),
+        tipo=tipo,
+        conteudo=conteudo,
+        midia_url=midia_url,
+        created_at=created_at,
+    )
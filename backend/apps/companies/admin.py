@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import Company
 
-# Register your models here.
+
+@admin.register(Company)
+class CompanyAdmin(admin.ModelAdmin):
+    list_display = ('nome', 'cnpj', 'grupo', 'created_at')
+    list_select_related = ('grupo',)
+    search_fields = ('nome', 'cnpj')
@@ -0,0 +1,64 @@
+"""
+Normalização e validação de CNPJ.
+
+O CNPJ é guardado só com os 14 caracteres, sem pontuação. Aceita o
+formato alfanumérico (os 12 primeiros caracteres podem ser letras; os
+dígitos verificadores continuam numéricos): cada caractere vale
+``ord(c) - 48``, o que para dígitos é o próprio valor.
+
+A validação é feita em lote: a soma ponderada de cada CNPJ é um
+``sum(map(mul, pesos, bytes))``, que roda inteira em C, e a correção do
+``- 48`` é aplicada uma vez por soma.
+"""
+import re
+from operator import mul
+
+CNPJ_LENGTH = 14
+
+_STRIP = re.compile(r'[^0-9A-Z]')
+_FORMAT = re.compile(r'^[0-9A-Z]{12}[0-9]{2}$')
+
+_WEIGHTS_1 = (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+_WEIGHTS_2 = (6,) + _WEIGHTS_1
+_OFFSET_1 = 48 * sum(_WEIGHTS_1)
+_OFFSET_2 = 48 * sum(_WEIGHTS_2)
+
+
+def normalize_cnpj(value):
+    """Remove pontuação e espaços; letras ficam maiúsculas."""
+    return _STRIP.sub('', str(value or '').upper())
+
+
+def _check_digit(total):
+    remainder = total % 11
+    return 0 if remainder < 2 else 11 - remainder
+
+
+def _is_valid(cnpj):
+    if not _FORMAT.match(cnpj) or cnpj == cnpj[0] * CNPJ_LENGTH:
+        return False
+    data = cnpj.encode('ascii')
+    first = _check_digit(sum(map(mul, _WEIGHTS_1, data)) - _OFFSET_1)
+    if data[12] - 48 != first:
+        return False
+    second = _check_digit(sum(map(mul, _WEIGHTS_2, data)) - _OFFSET_2)
+    return data[13] - 48 == second
+
+
+def validate_cnpjs(values):
+    """
+    Normaliza e valida um lote; retorna uma lista na mesma ordem com o CNPJ
+    normalizado ou ``None`` quando inválido.
+    """
+    normalized = [normalize_cnpj(value) for value in values]
+    return [cnpj if _is_valid(cnpj) else None for cnpj in normalized]
+
+
+def validate_cnpj(value):
+    [cnpj] = validate_cnpjs([value])
+    return cnpj
+
+
+def format_cnpj(cnpj):
+    """``12345678000195`` -> ``12.345.678/0001-95``."""
+    return f'{cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:8]}/{cnpj[8:12]}-{cnpj[12:]}'
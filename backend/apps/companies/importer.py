@@ -0,0 +1,161 @@
+"""
+Importação de empresas em streaming.
+
+O arquivo (CSV com cabeçalho ``nome,cnpj,grupo_id`` ou NDJSON) é
+processado em blocos de ``CHUNK_SIZE`` (``apps.accounts.imports``): o bloco é
+validado (CNPJs em lote, grupos com uma consulta), os CNPJs já
+cadastrados são consultados pelo índice único para separar criações,
+atualizações e linhas sem mudança, e o que mudou é gravado com um
+``INSERT ... ON CONFLICT (cnpj) DO UPDATE`` por bloco, com uma entrada de
+auditoria por empresa.
+"""
+import time
+from functools import partial
+
+from django.conf import settings
+from django.db import router, transaction
+
+from apps.accounts.audit import audit_entry, diff, log_changes
+from apps.accounts.imports import import_in_chunks
+from apps.accounts.metrics import registry
+from apps.accounts.models import AuditLog
+from apps.groups.models import Group
+
+from .cnpj import validate_cnpjs
+from .models import Company
+
+DEFAULTS = {
+    'CHUNK_SIZE': 1000,  # linhas por bloco gravado
+    'MAX_ERRORS': 100,  # erros detalhados na resposta; os demais só são contados
+}
+
+NOME_MAX_LENGTH = Company._meta.get_field('nome').max_length
+
+# grupo_id ausente (ou coluna vazia no CSV): mantém o grupo atual
+UNCHANGED = object()
+
+companies_import_rows_total = registry.counter(
+    'companies_import_rows_total', 'Linhas importadas de empresas por resultado', ['result'])
+companies_import_chunk_seconds = registry.histogram(
+    'companies_import_chunk_seconds', 'Tempo de validação e gravação de um bloco de empresas')
+
+
+def import_setting(name):
+    return getattr(settings, 'COMPANIES_IMPORT', {}).get(name, DEFAULTS[name])
+
+
+def parse_row(row):
+    """Retorna ``(nome, cnpj_bruto, grupo_id, erros)``."""
+    if not isinstance(row, dict):
+        return None, None, UNCHANGED, {'detail': ['A linha deve ser um objeto.']}
+    errors = {}
+    nome = str(row.get('nome') or '').strip()
+    if not nome:
+        errors['nome'] = ['Este campo é obrigatório.']
+    elif len(nome) > NOME_MAX_LENGTH:
+        errors['nome'] = [f'Máximo de {NOME_MAX_LENGTH} caracteres.']
+    grupo_id = row.get('grupo_id', UNCHANGED)
+    if grupo_id == '':
+        grupo_id = UNCHANGED
+    elif grupo_id is not None and grupo_id is not UNCHANGED:
+        try:
+            grupo_id = int(grupo_id)
+        except (TypeError, ValueError):
+            errors['grupo_id'] = ['Informe um número inteiro.']
+    return nome, row.get('cnpj'), grupo_id, errors
+
+
+def upsert_chunk(chunk, user=None):
+    """Valida e grava um bloco ``[(linha, row)]``; retorna ``(contagens, erros)``."""
+    started = time.perf_counter()
+    counts, errors = _upsert_chunk(chunk, user)
+    companies_import_chunk_seconds.observe(time.perf_counter() - started)
+    for result, value in counts.items():
+        companies_import_rows_total.inc(value, result=result)
+    companies_import_rows_total.inc(len(errors), result='invalid')
+    return counts, errors
+
+
+def _upsert_chunk(chunk, user):
+    parsed = [(line, *parse_row(row)) for line, row in chunk]
+    cnpjs = validate_cnpjs([raw_cnpj for _, _, raw_cnpj, _, _ in parsed])
+
+    errors = []
+    by_cnpj = {}
+    for (line, nome, _, grupo_id, row_errors), cnpj in zip(parsed, cnpjs):
+        if cnpj is None and 'detail' not in row_errors:
+            row_errors['cnpj'] = ['CNPJ inválido.']
+        if row_errors:
+            errors.append({'row': line, 'errors': row_errors})
+            continue
+        # Repetido no bloco: a última ocorrência vence (o upsert não aceita
+        # a mesma chave duas vezes no mesmo comando)
+        by_cnpj.pop(cnpj, None)
+        by_cnpj[cnpj] = (line, nome, grupo_id)
+
+    grupo_ids = {grupo_id for _, _, grupo_id in by_cnpj.values() if isinstance(grupo_id, int)}
+    if grupo_ids:
+        existing_groups = set(Group.objects.filter(pk__in=grupo_ids).values_list('pk', flat=True))
+        for cnpj, (line, _, grupo_id) in list(by_cnpj.items()):
+            if isinstance(grupo_id, int) and grupo_id not in existing_groups:
+                errors.append({'row': line, 'errors': {'grupo_id': ['Grupo não encontrado.']}})
+                del by_cnpj[cnpj]
+
+    counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+    if not by_cnpj:
+        return counts, errors
+
+    # Lê do primário: blocos anteriores desta importação podem não estar na réplica
+    using = router.db_for_write(Company)
+    existing = {
+        cnpj: {'nome': nome, 'grupo_id': grupo_id}
+        for cnpj, nome, grupo_id in Company.objects.db_manager(using)
+        .filter(cnpj__in=list(by_cnpj))
+        .values_list('cnpj', 'nome', 'grupo_id')
+    }
+    companies = []
+    changes = []
+    for cnpj, (_, nome, grupo_id) in by_cnpj.items():
+        before = existing.get(cnpj, {})
+        if grupo_id is UNCHANGED:
+            grupo_id = before.get('grupo_id')
+        after = {'nome': nome, 'grupo_id': grupo_id}
+        if cnpj not in existing:
+            after['cnpj'] = cnpj
+            counts['created'] += 1
+        elif after == before:
+            counts['unchanged'] += 1
+            continue
+        else:
+            counts['updated'] += 1
+        companies.append(Company(
+            cnpj=cnpj, nome=nome, grupo_id=grupo_id, usuario_cadastro=user, usuario_alteracao=user))
+        changes.append(diff(before, after))
+
+    if companies:
+        with transaction.atomic(using=using):
+            Company.objects.db_manager(using).bulk_create(
+                companies,
+                update_conflicts=True,
+                unique_fields=['cnpj'],
+                update_fields=['nome', 'grupo', 'usuario_alteracao', 'updated_at'],
+            )
+            log_changes(
+                [
+                    audit_entry(company, AuditLog.Action.IMPORT, user, company_changes)
+                    for company, company_changes in zip(companies, changes)
+                    if company.pk is not None
+                ],
+                using=using,
+            )
+    return counts, errors
+
+
+def import_companies(rows, user=None, chunk_size=None):
+    """Importa as linhas em blocos; gera os dicts de progresso (ver ``import_in_chunks``)."""
+    return import_in_chunks(
+        rows,
+        partial(upsert_chunk, user=user),
+        chunk_size or import_setting('CHUNK_SIZE'),
+        import_setting('MAX_ERRORS'),
+    )
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('groups', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Company',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=255, verbose_name='nome')),
+                ('cnpj', models.CharField(max_length=14, unique=True, verbose_name='CNPJ')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='atualizado em')),
+                ('grupo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='empresas', to='groups.group', verbose_name='grupo')),
+            ],
+            options={
+                'verbose_name': 'empresa',
+                'verbose_name_plural': 'empresas',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_company_usuario_alteracao_company_usuario_cadastro'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['nome', 'id'], name='company_nome_id_idx'),
+        ),
+    ]
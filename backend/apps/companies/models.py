@@ -1,3 +1,39 @@
 from django.db import models
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+from apps.accounts.models import AuditModel
+
+from .cnpj import normalize_cnpj
+
+
+class Company(AuditModel):
+    nome = models.CharField(_('nome'), max_length=255)
+    # Só os 14 caracteres, sem pontuação (ver ``cnpj.normalize_cnpj``)
+    cnpj = models.CharField(_('CNPJ'), max_length=14, unique=True)
+    grupo = models.ForeignKey(
+        'groups.Group',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='empresas',
+        verbose_name=_('grupo'),
+    )
+
+    # Campos de auditoria
+    created_at = models.DateTimeField(_('criado em'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('atualizado em'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('empresa')
+        verbose_name_plural = _('empresas')
+        indexes = [
+            # Listagem: ORDER BY nome, id com cursor (NameKeysetPagination)
+            models.Index(fields=['nome', 'id'], name='company_nome_id_idx'),
+        ]
+
+    def __str__(self):
+        return self.nome
+
+    def save(self, *args, **kwargs):
+        self.cnpj = normalize_cnpj(self.cnpj)
+        super().save(*args, **kwargs)
@@ -0,0 +1,36 @@
+from rest_framework import serializers
+
+from apps.accounts.serializers import AUDIT_FIELDS, AuditSerializerMixin
+from apps.groups.models import Group
+
+from .cnpj import validate_cnpj
+from .models import Company
+
+
+class CNPJField(serializers.CharField):
+    """Normaliza antes das validações do modelo (o índice único é sobre o valor normalizado)."""
+
+    def to_internal_value(self, data):
+        cnpj = validate_cnpj(super().to_internal_value(data))
+        if cnpj is None:
+            raise serializers.ValidationError('CNPJ inválido.')
+        return cnpj
+
+
+class CompanySerializer(AuditSerializerMixin, serializers.ModelSerializer):
+    cnpj = CNPJField(max_length=18)
+    grupo_id = serializers.PrimaryKeyRelatedField(
+        source='grupo', queryset=Group.objects.all(), required=False, allow_null=True)
+
+    class Meta(AuditSerializerMixin.Meta):
+        model = Company
+        fields = ['id', 'nome', 'cnpj', 'grupo_id', 'created_at', 'updated_at'] + AUDIT_FIELDS
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def validate_cnpj(self, value):
+        queryset = Company.objects.filter(cnpj=value)
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+        if queryset.exists():
+            raise serializers.ValidationError('Já existe uma empresa com este CNPJ.')
+        return value
@@ -1,3 +1,109 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.accounts.models import AuditLog
+
+from .cnpj import format_cnpj, validate_cnpj, validate_cnpjs
+from .importer import import_companies
+from .models import Company
+
+User = get_user_model()
+
+
+class CNPJTests(SimpleTestCase):
+    def test_numeric_and_alphanumeric_cnpjs_are_normalized(self):
+        self.assertEqual(
+            validate_cnpjs(['11.222.333/0001-81', '12.abc.345/01de-35', ' 11222333000181 ']),
+            ['11222333000181', '12ABC34501DE35', '11222333000181'],
+        )
+
+    def test_invalid_cnpjs_are_rejected(self):
+        for value in ('11.222.333/0001-80', '00000000000000', '1122233300018', '', None, '12ABC34501DEAB'):
+            self.assertIsNone(validate_cnpj(value), value)
+
+    def test_format(self):
+        self.assertEqual(format_cnpj('11222333000181'), '11.222.333/0001-81')
+
+
+@override_settings(AUDIT={'FLUSH_INTERVAL': 0})
+class CompanyImportTests(TestCase):
+    def test_import_creates_updates_and_reports_invalid_rows(self):
+        user = User.objects.create_user(email='importa@teste.local', password='x', nome='Importa')
+        Company.objects.create(nome='Antiga', cnpj='11222333000181')
+        rows = [
+            {'nome': 'Nova', 'cnpj': '12.ABC.345/01DE-35'},
+            {'nome': 'Renomeada', 'cnpj': '11.222.333/0001-81'},
+            {'nome': 'Inválida', 'cnpj': '11222333000180'},
+            {'nome': '', 'cnpj': '11222333000181'},
+            {'nome': 'Sem grupo', 'cnpj': '12ABC34501DE35', 'grupo_id': 999},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            *progress, done = import_companies(rows, user=user, chunk_size=2)
+
+        self.assertEqual(len(progress), 3)
+        self.assertEqual(done, {'done': True, 'rows': 5, 'invalid': 3, 'created': 1, 'updated': 1, 'unchanged': 0})
+        self.assertEqual([error['row'] for chunk in progress for error in chunk['errors']], [3, 4, 5])
+        self.assertEqual(
+            dict(Company.objects.values_list('cnpj', 'nome')),
+            {'11222333000181': 'Renomeada', '12ABC34501DE35': 'Nova'},
+        )
+        self.assertEqual(AuditLog.objects.filter(action=AuditLog.Action.IMPORT).count(), 2)
+
+        # Reimportar o mesmo arquivo não muda nada
+        *_, done = import_companies(rows[:2], user=user)
+        self.assertEqual(done['unchanged'], 2)
+
+
+class CompanyImportAPITests(TestCase):
+    url = '/api/v1/empresas/import/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='admin@teste.local', password='x', nome='Admin', is_staff=True))
+
+    def test_csv_import_streams_progress_as_ndjson(self):
+        body = 'nome,cnpj\nNova,12.ABC.345/01DE-35\nInválida,11222333000180\n'
+        response = self.client.post(self.url, body.encode(), content_type='text/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        progress, done = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(progress['errors'][0]['row'], 2)
+        self.assertEqual(done, {'done': True, 'rows': 2, 'invalid': 1, 'created': 1, 'updated': 0, 'unchanged': 0})
+        self.assertEqual(Company.objects.get().nome, 'Nova')
+
+    def test_other_formats_are_unsupported(self):
+        response = self.client.post(self.url, {'nome': 'Nova'}, format='json')
+        self.assertEqual(response.status_code, 415)
+        self.assertFalse(Company.objects.exists())
+
+    def test_only_staff_can_import(self):
+        self.client.force_authenticate(User.objects.create_user(email='comum@teste.local', password='x', nome='Comum'))
+        self.assertEqual(self.client.post(self.url, b'nome,cnpj\n', content_type='text/csv').status_code, 403)
+
+
+class CompanyListPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='empresas@teste.local', password='x', nome='Empresas')
+        # Um CNPJ válido por raiz: os dígitos verificadores são procurados
+        roots = (f'{root}0001' for root in range(11222333, 11222338))
+        cnpjs = [next(filter(validate_cnpj, (f'{root}{dv:02d}' for dv in range(100)))) for root in roots]
+        for nome, cnpj in zip(['Beta', 'Alfa', 'Gama', 'Alfa', 'Delta'], cnpjs):
+            Company.objects.create(nome=nome, cnpj=cnpj)
+
+    def test_pages_follow_name_order_without_repeats(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        pages = []
+        url = '/api/v1/empresas/?limit=2'
+        while url:
+            page = client.get(url).json()
+            pages.append([company['nome'] for company in page['results']])
+            url = page['next']
+        self.assertEqual(pages, [['Alfa', 'Alfa'], ['Beta', 'Delta'], ['Gama']])
+        self.assertEqual(client.get('/api/v1/empresas/?cursor=x').status_code, 404)
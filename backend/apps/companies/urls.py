@@ -1,6 +1,10 @@
 from django.urls import path
-from . import views
+from .views import CompanyDetailAPIView, CompanyImportAPIView, CompanyListCreateAPIView
 
 app_name = 'companies'
 
-urlpatterns = []
\ No newline at end of file
+urlpatterns = [
+    path('', CompanyListCreateAPIView.as_view(), name='list'),
+    path('import/', CompanyImportAPIView.as_view(), name='import'),
+    path('<int:pk>/', CompanyDetailAPIView.as_view(), name='detail'),
+]
@@ -1,3 +1,45 @@
-from django.shortcuts import render
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
 
-# Create your views here.
+from apps.accounts.audit import AuditViewMixin
+from apps.accounts.imports import read_rows
+from apps.accounts.jsoncodec import dumps_text
+from apps.accounts.pagination import NameKeysetPagination
+from apps.accounts.streaming import streaming_response
+
+from .importer import import_companies
+from .models import Company
+from .serializers import CompanySerializer
+
+
+class CompanyListCreateAPIView(AuditViewMixin, generics.ListCreateAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = CompanySerializer
+    pagination_class = NameKeysetPagination
+    queryset = Company.objects.all()
+
+
+class CompanyDetailAPIView(AuditViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = CompanySerializer
+    queryset = Company.objects.all()
+
+
+class CompanyImportAPIView(generics.GenericAPIView):
+    """
+    Importa empresas de um CSV (``Content-Type: text/csv``, cabeçalho
+    ``nome,cnpj,grupo_id``) ou NDJSON (``application/x-ndjson``), criando
+    ou atualizando pelo CNPJ. Responde em NDJSON, uma linha de progresso
+    por bloco gravado e o resumo (``done``) no fim.
+    """
+    permission_classes = [permissions.IsAuthenticated, permissions.IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        rows = read_rows(request.content_type, request.stream)
+        if rows is None:
+            return Response(
+                {'detail': 'Envie um CSV (text/csv) ou NDJSON (application/x-ndjson)'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+        lines = (dumps_text(progress) + '\n' for progress in import_companies(rows, user=request.user))
+        return streaming_response(request, lines, content_type='application/x-ndjson')
@@ -1,3 +1,10 @@
 from django.contrib import admin
+from .models import Contact
 
-# Register your models here.
+
+@admin.register(Contact)
+class ContactAdmin(admin.ModelAdmin):
+    list_display = ('nome', 'telefone', 'empresa', 'created_at')
+    list_select_related = ('empresa',)
+    search_fields = ('nome', 'telefone')
+    raw_id_fields = ('empresa',)
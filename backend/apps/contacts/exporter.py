@@ -0,0 +1,47 @@
+"""
+Exportação de contatos em CSV com memória constante.
+
+As linhas vêm de ``values_list(...).iterator()``: no PostgreSQL é um
+cursor do lado do servidor, lido de ``EXPORT_CHUNK_SIZE`` em
+``EXPORT_CHUNK_SIZE`` linhas, sem instanciar modelos nem carregar o
+resultado inteiro. Cada leitura vira uma parte da resposta.
+"""
+import csv
+
+from apps.accounts.metrics import registry
+
+from .models import Contact
+from .phones import contacts_setting
+
+EXPORT_FIELDS = ('id', 'nome', 'telefone', 'empresa_id', 'created_at')
+
+contacts_export_rows_total = registry.counter(
+    'contacts_export_rows_total', 'Linhas de contatos exportadas')
+
+
+class _Echo:
+    """Arquivo de mentira: ``csv.writer`` devolve a linha formatada."""
+
+    def write(self, value):
+        return value
+
+
+def export_contacts(queryset=None, chunk_size=None):
+    """Gera o CSV (cabeçalho incluído) em partes de até ``chunk_size`` linhas."""
+    if queryset is None:
+        queryset = Contact.objects.all()
+    chunk_size = chunk_size or contacts_setting('EXPORT_CHUNK_SIZE')
+    writer = csv.writer(_Echo())
+    rows = queryset.order_by('id').values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+    yield writer.writerow(EXPORT_FIELDS)
+    part = []
+    for row in rows:
+        part.append(writer.writerow(row))
+        if len(part) >= chunk_size:
+            contacts_export_rows_total.inc(len(part))
+            yield ''.join(part)
+            part = []
+    if part:
+        contacts_export_rows_total.inc(len(part))
+        yield ''.join(part)
@@ -0,0 +1,162 @@
+"""
+Importação de contatos em streaming, mesclando duplicatas.
+
+O arquivo (CSV com cabeçalho ``nome,telefone,empresa_id`` ou NDJSON) é
+processado em blocos (``apps.accounts.imports``). Os telefones são
+normalizados em E.164, então formatos diferentes do mesmo número caem no
+mesmo contato. Dentro do bloco as linhas repetidas são mescladas (a
+última informação não vazia vence); contra o banco, o contato existente
+só tem sobrescritos os campos preenchidos no arquivo. Cada bloco é uma
+consulta pelo índice único e um ``INSERT ... ON CONFLICT (telefone) DO
+UPDATE`` só com os contatos novos ou alterados, com uma entrada de
+auditoria por contato.
+"""
+import time
+from functools import partial
+
+from django.db import router, transaction
+
+from apps.accounts.audit import audit_entry, diff, log_changes
+from apps.accounts.imports import import_in_chunks
+from apps.accounts.metrics import registry
+from apps.accounts.models import AuditLog
+from apps.companies.models import Company
+
+from .models import Contact
+from .phones import contacts_setting, normalize_phone
+
+NOME_MAX_LENGTH = Contact._meta.get_field('nome').max_length
+
+# empresa_id ausente (ou coluna vazia no CSV): mantém a empresa atual
+UNCHANGED = object()
+
+contacts_import_rows_total = registry.counter(
+    'contacts_import_rows_total', 'Linhas importadas de contatos por resultado', ['result'])
+contacts_import_chunk_seconds = registry.histogram(
+    'contacts_import_chunk_seconds', 'Tempo de validação e gravação de um bloco de contatos')
+
+
+def parse_row(row):
+    """Retorna ``(telefone, nome, empresa_id, erros)``."""
+    if not isinstance(row, dict):
+        return None, '', UNCHANGED, {'detail': ['A linha deve ser um objeto.']}
+    errors = {}
+    telefone = normalize_phone(row.get('telefone'))
+    if telefone is None:
+        errors['telefone'] = ['Telefone inválido.']
+    nome = str(row.get('nome') or '').strip()
+    if len(nome) > NOME_MAX_LENGTH:
+        errors['nome'] = [f'Máximo de {NOME_MAX_LENGTH} caracteres.']
+    empresa_id = row.get('empresa_id', UNCHANGED)
+    if empresa_id == '':
+        empresa_id = UNCHANGED
+    elif empresa_id is not None and empresa_id is not UNCHANGED:
+        try:
+            empresa_id = int(empresa_id)
+        except (TypeError, ValueError):
+            errors['empresa_id'] = ['Informe um número inteiro.']
+    return telefone, nome, empresa_id, errors
+
+
+def upsert_chunk(chunk, user=None):
+    """Valida, mescla e grava um bloco ``[(linha, row)]``; retorna ``(contagens, erros)``."""
+    started = time.perf_counter()
+    counts, errors = _upsert_chunk(chunk, user)
+    contacts_import_chunk_seconds.observe(time.perf_counter() - started)
+    for result, value in counts.items():
+        contacts_import_rows_total.inc(value, result=result)
+    contacts_import_rows_total.inc(len(errors), result='invalid')
+    return counts, errors
+
+
+def _upsert_chunk(chunk, user):
+    errors = []
+    merged = {}  # telefone -> [linha, nome, empresa_id]
+    duplicates = 0
+    for line, row in chunk:
+        telefone, nome, empresa_id, row_errors = parse_row(row)
+        if row_errors:
+            errors.append({'row': line, 'errors': row_errors})
+            continue
+        current = merged.get(telefone)
+        if current is None:
+            merged[telefone] = [line, nome, empresa_id]
+            continue
+        duplicates += 1
+        current[0] = line
+        if nome:
+            current[1] = nome
+        if empresa_id is not UNCHANGED:
+            current[2] = empresa_id
+
+    empresa_ids = {empresa_id for _, _, empresa_id in merged.values() if isinstance(empresa_id, int)}
+    if empresa_ids:
+        existing_companies = set(Company.objects.filter(pk__in=empresa_ids).values_list('pk', flat=True))
+        for telefone, (line, _, empresa_id) in list(merged.items()):
+            if isinstance(empresa_id, int) and empresa_id not in existing_companies:
+                errors.append({'row': line, 'errors': {'empresa_id': ['Empresa não encontrada.']}})
+                del merged[telefone]
+
+    counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'duplicates': duplicates}
+    if not merged:
+        return counts, errors
+
+    # Lê do primário: blocos anteriores desta importação podem não estar na réplica
+    using = router.db_for_write(Contact)
+    existing = {
+        telefone: {'nome': nome, 'empresa_id': empresa_id}
+        for telefone, nome, empresa_id in Contact.objects.db_manager(using)
+        .filter(telefone__in=list(merged))
+        .values_list('telefone', 'nome', 'empresa_id')
+    }
+    contacts = []
+    changes = []
+    for telefone, (_, nome, empresa_id) in merged.items():
+        before = existing.get(telefone, {})
+        if empresa_id is UNCHANGED:
+            empresa_id = before.get('empresa_id')
+        after = {'nome': nome or before.get('nome', ''), 'empresa_id': empresa_id}
+        if telefone not in existing:
+            after['telefone'] = telefone
+            counts['created'] += 1
+        elif after == before:
+            counts['unchanged'] += 1
+            continue
+        else:
+            counts['updated'] += 1
+        contacts.append(Contact(
+            telefone=telefone,
+            nome=after['nome'],
+            empresa_id=empresa_id,
+            usuario_cadastro=user,
+            usuario_alteracao=user,
+        ))
+        changes.append(diff(before, after))
+
+    if contacts:
+        with transaction.atomic(using=using):
+            Contact.objects.db_manager(using).bulk_create(
+                contacts,
+                update_conflicts=True,
+                unique_fields=['telefone'],
+                update_fields=['nome', 'empresa', 'usuario_alteracao', 'updated_at'],
+            )
+            log_changes(
+                [
+                    audit_entry(contact, AuditLog.Action.IMPORT, user, contact_changes)
+                    for contact, contact_changes in zip(contacts, changes)
+                    if contact.pk is not None
+                ],
+                using=using,
+            )
+    return counts, errors
+
+
+def import_contacts(rows, user=None, chunk_size=None):
+    """Importa as linhas em blocos; gera os dicts de progresso (ver ``import_in_chunks``)."""
+    return import_in_chunks(
+        rows,
+        partial(upsert_chunk, user=user),
+        chunk_size or contacts_setting('IMPORT_CHUNK_SIZE'),
+        contacts_setting('IMPORT_MAX_ERRORS'),
+    )
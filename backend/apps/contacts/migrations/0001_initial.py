@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Contact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(blank=True, max_length=255, verbose_name='nome')),
+                ('telefone', models.CharField(max_length=20, unique=True, verbose_name='telefone')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='atualizado em')),
+            ],
+            options={
+                'verbose_name': 'contato',
+                'verbose_name_plural': 'contatos',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0003_contact_usuario_alteracao_contact_usuario_cadastro'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['nome', 'id'], name='contact_nome_id_idx'),
+        ),
+    ]
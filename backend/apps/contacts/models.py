@@ -1,3 +1,46 @@
 from django.db import models
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+from apps.accounts.models import AuditModel
+
+from .phones import normalize_phone
+
+
+class Contact(AuditModel):
+    nome = models.CharField(_('nome'), max_length=255, blank=True)
+    # E.164 (ver ``phones.normalize_phone``)
+    telefone = models.CharField(_('telefone'), max_length=20, unique=True)
+    empresa = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='contatos',
+        verbose_name=_('empresa'),
+    )
+
+    # Campos de auditoria
+    created_at = models.DateTimeField(_('criado em'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('atualizado em'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('contato')
+        verbose_name_plural = _('contatos')
+        indexes = [
+            # Listagem: ORDER BY nome, id com cursor (NameKeysetPagination)
+            models.Index(fields=['nome', 'id'], name='contact_nome_id_idx'),
+        ]
+
+    def __str__(self):
+        return self.nome or self.telefone
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Telefone carregado, para invalidar o cache da ingestão se mudar
+        instance._loaded_telefone = instance.__dict__.get('telefone')
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.telefone = normalize_phone(self.telefone) or self.telefone
+        super().save(*args, **kwargs)
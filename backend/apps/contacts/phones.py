@@ -0,0 +1,154 @@
+"""
+Telefones dos contatos.
+
+Os números são guardados em E.164 (``+5511999990000``) sob índice único,
+então a mesma pessoa digitada de formas diferentes (``(11) 99999-0000``,
+``011999990000``, ``5511999990000``) vira um único contato. Números no
+formato nacional recebem ``DEFAULT_COUNTRY_CODE``.
+
+``PhoneIndex`` guarda em memória (LRU, por processo) o id do contato de
+cada telefone para a ingestão do webhook, que resolve o remetente de
+toda mensagem recebida. Trocar o telefone de um contato ou apagá-lo
+incrementa uma geração no cache do Django (``CACHE``); ao ver a geração
+mudar, o índice de cada worker se esvazia, então um número antigo não
+continua apontando para o contato em outro processo. Isso exige um cache
+compartilhado (Redis) com mais de um worker.
+"""
+import re
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from apps.accounts.generations import bump_generation, get_generation
+from apps.accounts.metrics import registry
+
+DEFAULTS = {
+    'DEFAULT_COUNTRY_CODE': '55',
+    'NATIONAL_LENGTHS': (10, 11),  # DDD + número, sem o código do país
+    'PHONE_CACHE_SIZE': 100000,  # telefones no LRU da ingestão
+    'IMPORT_CHUNK_SIZE': 1000,  # linhas por bloco gravado
+    'IMPORT_MAX_ERRORS': 100,  # erros detalhados na resposta da importação
+    'EXPORT_CHUNK_SIZE': 2000,  # linhas por leitura do cursor e por parte da resposta
+    'CACHE': 'default',  # alias em CACHES da geração do índice de telefones
+}
+
+_NON_DIGITS = re.compile(r'\D')
+
+contacts_phone_cache_total = registry.counter(
+    'contacts_phone_cache_total', 'Consultas ao cache telefone -> contato por resultado', ['result'])
+
+
+def contacts_setting(name):
+    return getattr(settings, 'CONTACTS', {}).get(name, DEFAULTS[name])
+
+
+def normalize_phone(value):
+    """Retorna o número em E.164 ou ``None`` se não for um telefone válido."""
+    raw = str(value or '').strip()
+    digits = _NON_DIGITS.sub('', raw)
+    if not raw.startswith('+'):
+        if digits.startswith('00'):
+            # Prefixo de discagem internacional
+            digits = digits[2:]
+        else:
+            national = digits.lstrip('0')
+            if len(national) in contacts_setting('NATIONAL_LENGTHS'):
+                digits = contacts_setting('DEFAULT_COUNTRY_CODE') + national
+    if not 8 <= len(digits) <= 15 or digits[0] == '0':
+        return None
+    return f'+{digits}'
+
+
+PHONE_GENERATION_KEY = 'contacts:phones:gen'
+
+
+def phone_generation():
+    """Geração atual dos telefones no cache compartilhado."""
+    return get_generation(caches[contacts_setting('CACHE')], PHONE_GENERATION_KEY)
+
+
+def bump_phone_generation(using=None):
+    """Invalida em todos os workers, após o commit, os telefones em cache."""
+    transaction.on_commit(
+        lambda: bump_generation(caches[contacts_setting('CACHE')], PHONE_GENERATION_KEY), using=using)
+
+
+class PhoneIndex:
+    """
+    LRU telefone (E.164) -> id do contato, válido para uma geração.
+
+    Quem consulta lê a geração antes do banco e a passa para ``get_many``
+    e ``set_many``: ids lidos antes de uma troca de telefone em outro
+    worker não entram no índice.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._ids = OrderedDict()
+        self._generation = None
+
+    def __len__(self):
+        return len(self._ids)
+
+    def get_many(self, phones, generation):
+        """Retorna ``{telefone: id}`` dos que estão no cache na ``generation``."""
+        found = {}
+        with self._lock:
+            if generation != self._generation:
+                self._ids.clear()
+                self._generation = generation
+            for phone in phones:
+                contact_id = self._ids.get(phone)
+                if contact_id is not None:
+                    self._ids.move_to_end(phone)
+                    found[phone] = contact_id
+        contacts_phone_cache_total.inc(len(found), result='hit')
+        contacts_phone_cache_total.inc(len(phones) - len(found), result='miss')
+        return found
+
+    def set_many(self, mapping, generation):
+        if generation != phone_generation():
+            # Algum telefone mudou depois da leitura: os ids podem estar velhos
+            return
+        with self._lock:
+            if generation != self._generation:
+                self._ids.clear()
+                self._generation = generation
+            for phone, contact_id in mapping.items():
+                self._ids[phone] = contact_id
+                self._ids.move_to_end(phone)
+            while len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+
+    def discard(self, *phones):
+        with self._lock:
+            for phone in phones:
+                self._ids.pop(phone, None)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_phone_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = PhoneIndex(contacts_setting('PHONE_CACHE_SIZE'))
+    return _index
+
+
+@registry.add_collector
+def collect_phone_index_stats():
+    if _index is None:
+        return []
+    return [('contacts_phone_cache_size', 'Telefones no cache telefone -> contato', len(_index))]
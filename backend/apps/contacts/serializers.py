@@ -0,0 +1,36 @@
+from rest_framework import serializers
+
+from apps.accounts.serializers import AUDIT_FIELDS, AuditSerializerMixin
+from apps.companies.models import Company
+
+from .models import Contact
+from .phones import normalize_phone
+
+
+class PhoneField(serializers.CharField):
+    """Normaliza em E.164 antes das validações do modelo (o índice único é sobre o valor normalizado)."""
+
+    def to_internal_value(self, data):
+        telefone = normalize_phone(super().to_internal_value(data))
+        if telefone is None:
+            raise serializers.ValidationError('Telefone inválido.')
+        return telefone
+
+
+class ContactSerializer(AuditSerializerMixin, serializers.ModelSerializer):
+    telefone = PhoneField(max_length=30)
+    empresa_id = serializers.PrimaryKeyRelatedField(
+        source='empresa', queryset=Company.objects.all(), required=False, allow_null=True)
+
+    class Meta(AuditSerializerMixin.Meta):
+        model = Contact
+        fields = ['id', 'nome', 'telefone', 'empresa_id', 'created_at', 'updated_at'] + AUDIT_FIELDS
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def validate_telefone(self, value):
+        queryset = Contact.objects.filter(telefone=value)
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+        if queryset.exists():
+            raise serializers.ValidationError('Já existe um contato com este telefone.')
+        return value
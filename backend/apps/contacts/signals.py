@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Contact
+from .phones import bump_phone_generation, get_phone_index
+
+
+@receiver(post_save, sender=Contact)
+def forget_old_phone(sender, instance, created, raw=False, using=None, **kwargs):
+    old = getattr(instance, '_loaded_telefone', None)
+    if old and old != instance.telefone:
+        get_phone_index().discard(old)
+        bump_phone_generation(using)
+    instance._loaded_telefone = instance.telefone
+
+
+@receiver(post_delete, sender=Contact)
+def forget_deleted_phone(sender, instance, using=None, **kwargs):
+    get_phone_index().discard(instance.telefone)
+    bump_phone_generation(using)
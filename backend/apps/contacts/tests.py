@@ -1,3 +1,126 @@
-from django.test import TestCase
+import csv
+import json
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.companies.models import Company
+
+from .importer import import_contacts
+from .models import Contact
+from .phones import PhoneIndex, normalize_phone, phone_generation
+
+User = get_user_model()
+
+
+class NormalizePhoneTests(SimpleTestCase):
+    def test_formats_of_the_same_number_become_one(self):
+        for value in ('(11) 99999-0000', '011999990000', '5511999990000', '+55 11 99999-0000', '0055 11 99999 0000'):
+            self.assertEqual(normalize_phone(value), '+5511999990000', value)
+
+    def test_landlines_and_other_countries(self):
+        self.assertEqual(normalize_phone('(21) 3333-4444'), '+552133334444')
+        self.assertEqual(normalize_phone('+1 (415) 555-0100'), '+14155550100')
+
+    def test_invalid_numbers(self):
+        for value in ('', None, '123', '+0 11 99999-0000', '+1234567890123456'):
+            self.assertIsNone(normalize_phone(value), value)
+
+    @override_settings(CONTACTS={'DEFAULT_COUNTRY_CODE': '351', 'NATIONAL_LENGTHS': (9,)})
+    def test_default_country_is_configurable(self):
+        self.assertEqual(normalize_phone('912 345 678'), '+351912345678')
+
+
+class PhoneIndexTests(TestCase):
+    def test_phone_change_or_delete_in_one_worker_clears_the_others(self):
+        ana = Contact.objects.create(nome='Ana', telefone='+5511999990000')
+        bia = Contact.objects.create(nome='Bia', telefone='+5521988880000')
+        # Índice de outro worker: os sinais deste processo não o alcançam
+        other = PhoneIndex(10)
+        generation = phone_generation()
+        other.set_many({ana.telefone: ana.id, bia.telefone: bia.id}, generation)
+        self.assertEqual(len(other.get_many([ana.telefone, bia.telefone], generation)), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ana.telefone = '+5511977770000'
+            ana.save()
+        self.assertEqual(other.get_many(['+5511999990000', bia.telefone], phone_generation()), {})
+
+        generation = phone_generation()
+        other.set_many({bia.telefone: bia.id}, generation)
+        with self.captureOnCommitCallbacks(execute=True):
+            bia.delete()
+        self.assertEqual(other.get_many(['+5521988880000'], phone_generation()), {})
+
+    def test_ids_read_before_a_change_are_not_cached(self):
+        ana = Contact.objects.create(nome='Ana', telefone='+5511999990000')
+        index = PhoneIndex(10)
+        generation = phone_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            ana.telefone = '+5511977770000'
+            ana.save()
+        # O id lido sob a geração anterior chega depois da troca
+        index.set_many({'+5511999990000': ana.id}, generation)
+        self.assertEqual(len(index), 0)
+
+
+class ContactImportTests(TestCase):
+    def test_duplicates_are_merged_and_blank_fields_keep_the_current_value(self):
+        empresa = Company.objects.create(nome='Empresa', cnpj='11222333000181')
+        Contact.objects.create(nome='Ana', telefone='(11) 99999-0000', empresa=empresa)
+        rows = [
+            {'nome': '', 'telefone': '011 99999-0000', 'empresa_id': ''},
+            {'nome': 'Bruno', 'telefone': '21 98888-0000'},
+            {'nome': 'Bruno Souza', 'telefone': '+55 21 98888-0000', 'empresa_id': empresa.id},
+            {'nome': 'Sem número', 'telefone': '123'},
+            {'nome': 'Sem empresa', 'telefone': '31977770000', 'empresa_id': 999},
+        ]
+        *progress, done = import_contacts(rows)
+
+        self.assertEqual(done, {
+            'done': True, 'rows': 5, 'invalid': 2,
+            'created': 1, 'updated': 0, 'unchanged': 1, 'duplicates': 1,
+        })
+        self.assertEqual([error['row'] for error in progress[0]['errors']], [4, 5])
+        self.assertEqual(
+            set(Contact.objects.values_list('telefone', 'nome', 'empresa')),
+            {('+5511999990000', 'Ana', empresa.id), ('+5521988880000', 'Bruno Souza', empresa.id)},
+        )
+
+
+class ContactImportExportAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='admin@teste.local', password='x', nome='Admin', is_staff=True))
+
+    def test_ndjson_import_streams_progress_and_reports_bad_lines(self):
+        body = b'{"nome": "Ana", "telefone": "(11) 99999-0000"}\n{quebrado\n\n{"nome": "Bia", "telefone": "123"}\n'
+        response = self.client.post('/api/v1/contatos/import/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        progress, done = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([error['row'] for error in progress['errors']], [2, 3])
+        self.assertEqual((done['rows'], done['invalid'], done['created']), (3, 2, 1))
+        self.assertEqual(Contact.objects.get().telefone, '+5511999990000')
+
+        response = self.client.post('/api/v1/contatos/import/', b'<xml/>', content_type='application/xml')
+        self.assertEqual(response.status_code, 415)
+
+    @override_settings(CONTACTS={'EXPORT_CHUNK_SIZE': 2})
+    def test_export_streams_the_csv_in_parts(self):
+        for i in range(3):
+            Contact.objects.create(nome=f'Contato {i}', telefone=f'+55119{i:08d}')
+        response = self.client.get('/api/v1/contatos/export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('contatos.csv', response['Content-Disposition'])
+        parts = [part.decode() for part in response.streaming_content]
+        # Cabeçalho e uma parte por leitura de EXPORT_CHUNK_SIZE linhas
+        self.assertEqual(len(parts), 3)
+        rows = list(csv.DictReader(''.join(parts).splitlines()))
+        self.assertEqual([row['nome'] for row in rows], ['Contato 0', 'Contato 1', 'Contato 2'])
+
+        self.client.force_authenticate(User.objects.create_user(email='comum@teste.local', password='x', nome='Comum'))
+        self.assertEqual(self.client.get('/api/v1/contatos/export/').status_code, 403)
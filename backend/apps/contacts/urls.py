@@ -1,6 +1,11 @@
 from django.urls import path
-from . import views
+from .views import ContactDetailAPIView, ContactImportAPIView, ContactListCreateAPIView, export_contacts_csv
 
 app_name = 'contacts'
 
-urlpatterns = []
\ No newline at end of file
+urlpatterns = [
+    path('', ContactListCreateAPIView.as_view(), name='list'),
+    path('import/', ContactImportAPIView.as_view(), name='import'),
+    path('export/', export_contacts_csv, name='export'),
+    path('<int:pk>/', ContactDetailAPIView.as_view(), name='detail'),
+]
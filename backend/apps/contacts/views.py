@@ -1,3 +1,56 @@
-from django.shortcuts import render
+from rest_framework import generics, permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
 
-# Create your views here.
+from apps.accounts.audit import AuditViewMixin
+from apps.accounts.imports import read_rows
+from apps.accounts.jsoncodec import dumps_text
+from apps.accounts.pagination import NameKeysetPagination
+from apps.accounts.streaming import streaming_response
+
+from .exporter import export_contacts
+from .importer import import_contacts
+from .models import Contact
+from .serializers import ContactSerializer
+
+
+class ContactListCreateAPIView(AuditViewMixin, generics.ListCreateAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ContactSerializer
+    pagination_class = NameKeysetPagination
+    queryset = Contact.objects.all()
+
+
+class ContactDetailAPIView(AuditViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ContactSerializer
+    queryset = Contact.objects.all()
+
+
+class ContactImportAPIView(generics.GenericAPIView):
+    """
+    Importa contatos de um CSV (``Content-Type: text/csv``, cabeçalho
+    ``nome,telefone,empresa_id``) ou NDJSON (``application/x-ndjson``),
+    mesclando pelo telefone normalizado. Responde em NDJSON, uma linha de
+    progresso por bloco gravado e o resumo (``done``) no fim.
+    """
+    permission_classes = [permissions.IsAuthenticated, permissions.IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        rows = read_rows(request.content_type, request.stream)
+        if rows is None:
+            return Response(
+                {'detail': 'Envie um CSV (text/csv) ou NDJSON (application/x-ndjson)'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+        lines = (dumps_text(progress) + '\n' for progress in import_contacts(rows, user=request.user))
+        return streaming_response(request, lines, content_type='application/x-ndjson')
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated, permissions.IsAdminUser])
+def export_contacts_csv(request):
+    """Todos os contatos em CSV, lidos do banco em blocos enquanto a resposta é enviada."""
+    response = streaming_response(request, export_contacts(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="contatos.csv"'
+    return response
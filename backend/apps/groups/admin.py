@@ -1,3 +1,10 @@
 from django.contrib import admin
+from .models import Group
 
-# Register your models here.
+
+@admin.register(Group)
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('nome', 'pai', 'created_at')
+    list_select_related = ('pai',)
+    search_fields = ('nome',)
+    raw_id_fields = ('pai',)
@@ -0,0 +1,146 @@
+"""
+Tabela de fechamento (closure table) da hierarquia de grupos.
+
+``GroupClosure`` tem uma linha para cada par ancestral/descendente, com a
+distância entre eles; cada grupo também é ancestral de si mesmo
+(``depth`` 0). A subárvore de X é ``WHERE ancestor_id = X`` no índice
+único ``(ancestor, descendant)``, então "empresas abaixo do grupo" é um
+único join, com o mesmo custo na profundidade 2 ou 10.
+
+A tabela é mantida incrementalmente por ``Group.save``:
+
+* inserir: o grupo novo herda os ancestrais do pai (uma leitura e um
+  INSERT);
+* mover: os vínculos da subárvore com os ancestrais antigos são
+  apagados e o produto subárvore x novos ancestrais é inserido.
+
+Escritas que não passam por ``save`` (``bulk_create``, ``update``) não a
+atualizam; o comando ``check_group_closure`` compara a tabela com os
+ponteiros ``pai`` e a reconstrói com ``--fix``.
+"""
+from django.db import router, transaction
+
+from .models import Group, GroupClosure
+
+BATCH_SIZE = 1000
+
+
+def _closure():
+    return GroupClosure.objects.db_manager(router.db_for_write(GroupClosure))
+
+
+def subtree_ids(group_id):
+    """Subconsulta com os ids do grupo e de todos os descendentes."""
+    return GroupClosure.objects.filter(ancestor_id=group_id).values('descendant_id')
+
+
+def insert_node(group):
+    """Liga o grupo recém-criado a si mesmo e aos ancestrais do pai."""
+    links = [GroupClosure(ancestor_id=group.pk, descendant_id=group.pk, depth=0)]
+    if group.pai_id is not None:
+        links.extend(
+            GroupClosure(ancestor_id=ancestor_id, descendant_id=group.pk, depth=depth + 1)
+            for ancestor_id, depth in _closure()
+            .filter(descendant_id=group.pai_id)
+            .values_list('ancestor_id', 'depth')
+        )
+    _closure().bulk_create(links)
+
+
+def move_node(group, old_pai_id):
+    """
+    Move a subárvore de ``group`` de ``old_pai_id`` para ``group.pai_id``.
+    Levanta ``ValueError`` se o novo pai está na própria subárvore.
+    """
+    closure = _closure()
+    subtree = list(closure.filter(ancestor_id=group.pk).values_list('descendant_id', 'depth'))
+    if group.pai_id is not None and group.pai_id in {descendant_id for descendant_id, _ in subtree}:
+        raise ValueError('Um grupo não pode ficar abaixo de si mesmo ou de um descendente.')
+
+    if old_pai_id is not None:
+        old_ancestors = list(closure.filter(descendant_id=old_pai_id).values_list('ancestor_id', flat=True))
+        closure.filter(
+            descendant_id__in=closure.filter(ancestor_id=group.pk).values('descendant_id'),
+            ancestor_id__in=old_ancestors,
+        ).delete()
+
+    if group.pai_id is not None:
+        new_ancestors = list(closure.filter(descendant_id=group.pai_id).values_list('ancestor_id', 'depth'))
+        closure.bulk_create(
+            [
+                GroupClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+                for ancestor_id, up in new_ancestors
+                for descendant_id, down in subtree
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+
+class CycleError(Exception):
+    pass
+
+
+def expected_closure():
+    """
+    Calcula a tabela a partir dos ponteiros ``pai``:
+    ``{(ancestral, descendente): profundidade}``. Levanta ``CycleError``
+    com os grupos envolvidos se houver ciclo.
+    """
+    parents = dict(
+        Group.objects.db_manager(router.db_for_write(Group)).values_list('id', 'pai_id').iterator()
+    )
+    ancestors = {}  # grupo -> [(ancestral, profundidade)], memoizado
+
+    def resolve(group_id):
+        path = []
+        node = group_id
+        while node is not None and node not in ancestors:
+            if node in path:
+                raise CycleError(path[path.index(node):])
+            path.append(node)
+            node = parents.get(node)
+        # Desce o caminho preenchendo do mais alto para o mais baixo
+        for node in reversed(path):
+            parent = parents.get(node)
+            inherited = ancestors.get(parent, []) if parent is not None else []
+            ancestors[node] = [(node, 0)] + [(ancestor_id, depth + 1) for ancestor_id, depth in inherited]
+
+    expected = {}
+    for group_id in parents:
+        resolve(group_id)
+        for ancestor_id, depth in ancestors[group_id]:
+            expected[(ancestor_id, group_id)] = depth
+    return expected
+
+
+def check_closure():
+    """Retorna ``(faltando, sobrando, profundidade_errada)`` em relação aos ponteiros ``pai``."""
+    expected = expected_closure()
+    actual = {
+        (ancestor_id, descendant_id): depth
+        for ancestor_id, descendant_id, depth in _closure()
+        .values_list('ancestor_id', 'descendant_id', 'depth')
+        .iterator()
+    }
+    missing = sorted(pair for pair in expected if pair not in actual)
+    extra = sorted(pair for pair in actual if pair not in expected)
+    wrong_depth = sorted(
+        pair for pair, depth in expected.items() if pair in actual and actual[pair] != depth
+    )
+    return missing, extra, wrong_depth
+
+
+def rebuild_closure():
+    """Reconstrói a tabela inteira a partir dos ponteiros ``pai``; retorna o número de linhas."""
+    expected = expected_closure()
+    closure = _closure()
+    with transaction.atomic(using=closure.db):
+        closure.all().delete()
+        closure.bulk_create(
+            [
+                GroupClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth)
+                for (ancestor_id, descendant_id), depth in expected.items()
+            ],
+            batch_size=BATCH_SIZE,
+        )
+    return len(expected)
@@ -0,0 +1,94 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.benchmarks import QueryCounter, bench_database, compare_baseline, summarize
+from apps.companies.models import Company
+from apps.groups.closure import subtree_ids
+from apps.groups.models import Group
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark das consultas de subárvore de grupos: monta uma cadeia de '
+        'grupos com empresas em cada nível e mede "empresas abaixo do grupo" '
+        'a partir de profundidades diferentes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--depth', type=int, default=10, help='Níveis da hierarquia')
+        parser.add_argument('--fanout', type=int, default=3, help='Subgrupos por grupo no último nível')
+        parser.add_argument('--companies', type=int, default=20, help='Empresas por grupo')
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--save-baseline', action='store_true')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Regressão tolerada (fração)')
+
+    def handle(self, *args, **options):
+        depth = options['depth']
+        with bench_database():
+            chain = self.create_tree(depth, options['fanout'], options['companies'])
+            results = {
+                'insert': self.bench_insert(chain[-1], options['repeat']),
+                'subtree': {
+                    # Mesmo volume abaixo de cada ponto: compara só o custo da profundidade
+                    f'depth_{level}': self.bench_subtree(chain[level - 1], options['repeat'])
+                    for level in sorted({2, depth})
+                },
+            }
+
+        results.update({'depth': depth, 'fanout': options['fanout'], 'companies': options['companies']})
+        self.stdout.write(json.dumps(results, indent=2))
+        regressions = compare_baseline(
+            f'groups_{depth}',
+            {name: result['latency'] for name, result in results['subtree'].items()},
+            options['tolerance'],
+            save=options['save_baseline'],
+        )
+        if regressions:
+            raise CommandError('Regressões em relação ao baseline:\n' + '\n'.join(regressions))
+
+    @staticmethod
+    def create_tree(depth, fanout, companies):
+        """Cadeia de ``depth`` grupos; o último tem ``fanout`` filhos; empresas só nas folhas."""
+        chain = []
+        parent = None
+        for level in range(1, depth + 1):
+            parent = Group.objects.create(nome=f'Nível {level}', pai=parent)
+            chain.append(parent)
+        leaves = [Group.objects.create(nome=f'Folha {i}', pai=parent) for i in range(fanout)]
+        Company.objects.bulk_create(
+            [
+                Company(nome=f'Empresa {leaf.pk}-{i}', cnpj=f'{leaf.pk:06d}{i:08d}', grupo=leaf)
+                for leaf in leaves
+                for i in range(companies)
+            ],
+            batch_size=500,
+        )
+        return chain
+
+    @staticmethod
+    def bench_subtree(group, repeat):
+        counter = QueryCounter()
+        samples = []
+        with counter:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                total = len(Company.objects.filter(grupo_id__in=subtree_ids(group.pk)).values_list('id'))
+                samples.append(time.perf_counter() - started)
+        return {
+            'companies': total,
+            'latency': summarize(samples),
+            'queries_per_lookup': sum(counter.counts.values()) / repeat,
+        }
+
+    @staticmethod
+    def bench_insert(parent, repeat):
+        counter = QueryCounter()
+        samples = []
+        with counter:
+            for i in range(repeat):
+                started = time.perf_counter()
+                Group.objects.create(nome=f'Novo {i}', pai=parent)
+                samples.append(time.perf_counter() - started)
+        return {'latency': summarize(samples), 'queries_per_insert': sum(counter.counts.values()) / repeat}
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.groups.closure import CycleError, check_closure, rebuild_closure
+
+
+class Command(BaseCommand):
+    help = 'Confere a tabela de fechamento dos grupos com os ponteiros "pai" (e a reconstrói com --fix)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Reconstrói a tabela se houver divergência')
+        parser.add_argument('--show', type=int, default=20, help='Divergências listadas de cada tipo')
+
+    def handle(self, *args, **options):
+        try:
+            missing, extra, wrong_depth = check_closure()
+        except CycleError as e:
+            raise CommandError(f'Ciclo nos ponteiros "pai": {" -> ".join(map(str, e.args[0]))}')
+
+        if not (missing or extra or wrong_depth):
+            self.stdout.write(self.style.SUCCESS('Tabela de fechamento consistente'))
+            return
+
+        for label, pairs in (('faltando', missing), ('sobrando', extra), ('profundidade errada', wrong_depth)):
+            if pairs:
+                shown = ', '.join(f'{a}->{d}' for a, d in pairs[:options['show']])
+                self.stdout.write(f'{len(pairs)} vínculos {label}: {shown}')
+
+        if not options['fix']:
+            raise CommandError('Tabela de fechamento inconsistente; rode com --fix para reconstruir')
+        rows = rebuild_closure()
+        self.stdout.write(self.style.SUCCESS(f'Tabela reconstruída com {rows} vínculos'))
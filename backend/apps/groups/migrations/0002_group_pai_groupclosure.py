@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='pai',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='filhos', to='groups.group', verbose_name='grupo pai'),
+        ),
+        migrations.CreateModel(
+            name='GroupClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='groups.group')),
+                ('descendant', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='groups.group')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='group_closure_ancestors_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='group_closure_pair')],
+            },
+        ),
+    ]
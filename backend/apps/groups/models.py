@@ -1,3 +1,99 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+from apps.accounts.models import AuditModel
+
+
+class GroupQuerySet(models.QuerySet):
+    def subtree(self, group_id):
+        """O grupo e todos os seus descendentes, em qualquer profundidade."""
+        return self.filter(ancestor_links__ancestor_id=group_id)
+
+
+class Group(AuditModel):
+    """
+    Grupo de empresas, aninhado (holding -> regional -> filial).
+
+    A hierarquia é mantida também em ``GroupClosure`` (todos os pares
+    ancestral/descendente), atualizada incrementalmente ao criar e ao
+    mover um grupo, para que consultas de subárvore sejam um único join
+    indexado, qualquer que seja a profundidade.
+    """
+    nome = models.CharField(_('nome'), max_length=255)
+    descricao = models.TextField(_('descrição'), blank=True)
+    pai = models.ForeignKey(
+        'self',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='filhos',
+        verbose_name=_('grupo pai'),
+    )
+
+    # Campos de auditoria
+    created_at = models.DateTimeField(_('criado em'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('atualizado em'), auto_now=True)
+
+    objects = GroupQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('grupo')
+        verbose_name_plural = _('grupos')
+
+    def __str__(self):
+        return self.nome
+
+    def locked_pai_id(self, using):
+        """
+        Relê o pai gravado travando o grupo e a cadeia do pai novo (em ordem
+        de id, para dois movimentos concorrentes não se cruzarem). O pai
+        carregado na instância pode estar velho: outro processo pode ter
+        movido o grupo depois da leitura.
+        """
+        lock = models.Q(pk=self.pk)
+        if self.pai_id is not None:
+            ancestors = GroupClosure.objects.db_manager(using).filter(descendant_id=self.pai_id)
+            lock |= models.Q(pk__in=ancestors.values('ancestor_id'))
+        rows = dict(
+            Group.objects.db_manager(using).select_for_update()
+            .filter(lock).order_by('pk').values_list('pk', 'pai_id')
+        )
+        return rows.get(self.pk)
+
+    def save(self, *args, **kwargs):
+        from .closure import insert_node, move_node
+
+        adding = self._state.adding
+        using = kwargs.get('using') or router.db_for_write(Group, instance=self)
+        with transaction.atomic(using=using):
+            old_pai_id = None if adding else self.locked_pai_id(using)
+            if not adding and self.pai_id != old_pai_id:
+                # Valida antes de gravar: o pai novo não pode estar na subárvore
+                move_node(self, old_pai_id)
+                super().save(*args, **kwargs)
+            else:
+                super().save(*args, **kwargs)
+                if adding:
+                    insert_node(self)
+
+
+class GroupClosure(models.Model):
+    """Par ancestral/descendente (o próprio grupo incluído, com ``depth`` 0)."""
+    # Índices pelos compostos abaixo
+    ancestor = models.ForeignKey(
+        Group, on_delete=models.CASCADE, related_name='descendant_links', db_index=False)
+    descendant = models.ForeignKey(
+        Group, on_delete=models.CASCADE, related_name='ancestor_links', db_index=False)
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            # Também é o índice da subárvore: ancestor = X -> descendentes
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='group_closure_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='group_closure_ancestors_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.ancestor_id} -> {self.descendant_id} ({self.depth})'
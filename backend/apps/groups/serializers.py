@@ -0,0 +1,23 @@
+from rest_framework import serializers
+
+from apps.accounts.serializers import AUDIT_FIELDS, AuditSerializerMixin
+
+from .models import Group, GroupClosure
+
+
+class GroupSerializer(AuditSerializerMixin, serializers.ModelSerializer):
+    pai_id = serializers.PrimaryKeyRelatedField(
+        source='pai', queryset=Group.objects.all(), required=False, allow_null=True)
+
+    class Meta(AuditSerializerMixin.Meta):
+        model = Group
+        fields = ['id', 'nome', 'descricao', 'pai_id', 'created_at', 'updated_at'] + AUDIT_FIELDS
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def validate_pai_id(self, value):
+        if value is not None and self.instance is not None:
+            # Consulta a tabela de fechamento: o novo pai não pode estar na subárvore
+            if GroupClosure.objects.filter(ancestor=self.instance, descendant=value).exists():
+                raise serializers.ValidationError(
+                    'Um grupo não pode ficar abaixo de si mesmo ou de um descendente.')
+        return value
@@ -1,3 +1,101 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from apps.companies.cnpj import validate_cnpj
+from apps.companies.models import Company
+
+from .closure import check_closure, rebuild_closure
+from .models import Group, GroupClosure
+
+
+class GroupClosureTests(TestCase):
+    def setUp(self):
+        # holding -> regional -> filial; outra holding separada
+        self.holding = Group.objects.create(nome='Holding')
+        self.regional = Group.objects.create(nome='Regional', pai=self.holding)
+        self.filial = Group.objects.create(nome='Filial', pai=self.regional)
+        self.outra = Group.objects.create(nome='Outra')
+
+    def subtree(self, group):
+        return set(Group.objects.subtree(group.pk).values_list('nome', flat=True))
+
+    def assertClosureConsistent(self):
+        self.assertEqual(check_closure(), ([], [], []))
+
+    def test_insert_links_every_ancestor(self):
+        self.assertEqual(self.subtree(self.holding), {'Holding', 'Regional', 'Filial'})
+        self.assertEqual(GroupClosure.objects.get(ancestor=self.holding, descendant=self.filial).depth, 2)
+        self.assertClosureConsistent()
+
+    def test_move_carries_the_subtree(self):
+        self.regional.pai = self.outra
+        self.regional.save()
+        self.assertEqual(self.subtree(self.holding), {'Holding'})
+        self.assertEqual(self.subtree(self.outra), {'Outra', 'Regional', 'Filial'})
+        self.assertClosureConsistent()
+
+    def test_group_cannot_move_below_itself_or_a_descendant(self):
+        for new_pai in (self.holding, self.filial):
+            self.holding.pai = new_pai
+            with self.assertRaises(ValueError):
+                self.holding.save()
+        self.holding.refresh_from_db()
+        self.assertIsNone(self.holding.pai_id)
+        self.assertClosureConsistent()
+
+    def test_move_from_a_stale_instance_uses_the_saved_parent(self):
+        stale = Group.objects.get(pk=self.filial.pk)
+        # Outro processo move a filial depois da leitura acima
+        self.filial.pai = self.outra
+        self.filial.save()
+
+        stale.pai = self.holding
+        stale.save()
+        self.assertEqual(self.subtree(self.outra), {'Outra'})
+        self.assertEqual(self.subtree(self.holding), {'Holding', 'Regional', 'Filial'})
+        self.assertClosureConsistent()
+
+    def test_cycle_check_uses_the_saved_parent(self):
+        stale = Group.objects.get(pk=self.outra.pk)
+        # A outra holding passa para baixo da filial depois da leitura acima
+        self.outra.pai = self.filial
+        self.outra.save()
+
+        # A holding não pode ir para baixo da outra, que agora é sua descendente
+        stale_holding = Group.objects.get(pk=self.holding.pk)
+        stale_holding.pai = stale
+        with self.assertRaises(ValueError):
+            stale_holding.save()
+        self.assertClosureConsistent()
+
+    def test_rebuild_restores_links_written_around_save(self):
+        Group.objects.filter(pk=self.filial.pk).update(pai=self.outra)
+        missing, extra, _ = check_closure()
+        self.assertTrue(missing and extra)
+        rebuild_closure()
+        self.assertClosureConsistent()
+
+
+class GroupCompanyListTests(TestCase):
+    def test_subtree_companies_are_paged_by_name(self):
+        holding = Group.objects.create(nome='Holding')
+        filial = Group.objects.create(nome='Filial', pai=Group.objects.create(nome='Regional', pai=holding))
+        outra = Group.objects.create(nome='Outra')
+        roots = (f'{root}0001' for root in range(11222333, 11222338))
+        cnpjs = (next(filter(validate_cnpj, (f'{root}{dv:02d}' for dv in range(100)))) for root in roots)
+        for (nome, grupo), cnpj in zip(
+            [('Delta', filial), ('Alfa', holding), ('Gama', outra), ('Beta', filial), ('Alfa', filial)], cnpjs,
+        ):
+            Company.objects.create(nome=nome, cnpj=cnpj, grupo=grupo)
+
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(
+            email='grupos@teste.local', password='x', nome='Grupos'))
+        pages = []
+        url = f'/api/v1/grupos/{holding.id}/empresas/?limit=2'
+        while url:
+            page = client.get(url).json()
+            pages.append([company['nome'] for company in page['results']])
+            url = page['next']
+        self.assertEqual(pages, [['Alfa', 'Alfa'], ['Beta', 'Delta']])
@@ -1,6 +1,11 @@
 from django.urls import path
-from . import views
+from .views import GroupCompanyListAPIView, GroupDetailAPIView, GroupListCreateAPIView, group_summary
 
 app_name = 'groups'
 
-urlpatterns = []
\ No newline at end of file
+urlpatterns = [
+    path('', GroupListCreateAPIView.as_view(), name='list'),
+    path('<int:pk>/', GroupDetailAPIView.as_view(), name='detail'),
+    path('<int:pk>/empresas/', GroupCompanyListAPIView.as_view(), name='empresas'),
+    path('<int:pk>/resumo/', group_summary, name='resumo'),
+]
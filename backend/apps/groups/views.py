@@ -1,3 +1,67 @@
-from django.shortcuts import render
+from django.db.models import Count, ProtectedError
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
 
-# Create your views here.
+from apps.accounts.audit import AuditViewMixin
+from apps.accounts.pagination import NameKeysetPagination
+from apps.chats.models import Atendimento
+from apps.companies.models import Company
+from apps.companies.serializers import CompanySerializer
+
+from .closure import subtree_ids
+from .models import Group
+from .serializers import GroupSerializer
+
+
+class GroupListCreateAPIView(AuditViewMixin, generics.ListCreateAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = GroupSerializer
+    pagination_class = NameKeysetPagination
+    queryset = Group.objects.order_by('nome', 'id')
+
+
+class GroupDetailAPIView(AuditViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = GroupSerializer
+    queryset = Group.objects.all()
+
+    def destroy(self, request, *args, **kwargs):
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except ProtectedError:
+            return Response(
+                {'detail': 'O grupo tem subgrupos; mova-os ou remova-os antes.'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+
+class GroupCompanyListAPIView(generics.ListAPIView):
+    """Empresas do grupo e de todos os subgrupos (um join na tabela de fechamento)."""
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = CompanySerializer
+    pagination_class = NameKeysetPagination
+
+    def get_queryset(self):
+        get_object_or_404(Group.objects.only('id'), pk=self.kwargs['pk'])
+        return Company.objects.filter(grupo_id__in=subtree_ids(self.kwargs['pk'])).order_by('nome', 'id')
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def group_summary(request, pk):
+    """Totais da subárvore do grupo para o dashboard."""
+    get_object_or_404(Group.objects.only('id'), pk=pk)
+    groups = subtree_ids(pk)
+    atendimentos = (
+        Atendimento.objects.filter(contato__empresa__grupo_id__in=groups)
+        .values('status')
+        .annotate(total=Count('id'))
+        .values_list('status', 'total')
+    )
+    return Response({
+        'grupos': Group.objects.subtree(pk).count(),
+        'empresas': Company.objects.filter(grupo_id__in=groups).count(),
+        'atendimentos': dict(atendimentos),
+    })
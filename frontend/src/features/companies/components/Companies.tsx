@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { Snackbar, Alert, IconButton, Tooltip } from '@mui/material';
+import { Snackbar, Alert, IconButton, Tooltip, Box, Button } from '@mui/material';
 import InfoIcon from '@mui/icons-material/Info';
 import DataTable from '../../../features/admin/components/DataTable';
 import DeleteDialog from '../../../features/admin/components/DeleteDialog';
@@ -10,6 +10,7 @@ import PageContainer from '../../../components/layout/PageContainer';
 import { useAppDispatch, useAppSelector } from '../../../hooks/store';
 import { 
   fetchCompanies, 
+  fetchMoreCompanies,
   removeCompany, 
   setSelectedCompany 
 } from '../../../store/slices/companiesSlice';
@@ -31,9 +32,11 @@ const Companies = () => {
   // Redux state e dispatch
   const dispatch = useAppDispatch();
   const companies = useAppSelector((state) => state.companies.list);
+  const hasMore = useAppSelector((state) => state.companies.next !== null);
   const selectedCompany = useAppSelector((state) => state.companies.selected);
   const { message: alertMessage, type: alertType } = useAppSelector((state) => state.ui.alert);
   const loading = useAppSelector((state) => state.ui.loading.fetchCompanies);
+  const loadingMore = useAppSelector((state) => state.ui.loading.fetchMoreCompanies);
   const deleteLoading = useAppSelector((state) => state.ui.loading.removeCompany);
 
   // Carregar empresas ao montar o componente
@@ -109,6 +112,18 @@ const Companies = () => {
         loading={loading}
       />
 
+      {hasMore && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+          <Button
+            variant="outlined"
+            onClick={() => dispatch(fetchMoreCompanies())}
+            disabled={loadingMore}
+          >
+            {loadingMore ? 'Carregando...' : 'Carregar mais'}
+          </Button>
+        </Box>
+      )}
+
       <CompanyForm
         open={openForm}
         onClose={handleCompanyFormClose}
@@ -16,7 +16,7 @@ import {
 } from '@mui/material';
 import { useAppDispatch, useAppSelector } from '../../../hooks/store';
 import { addCompany, editCompany } from '../../../store/slices/companiesSlice';
-import { fetchGroups } from '../../../store/slices/groupsSlice';
+import { fetchGroups, fetchMoreGroups } from '../../../store/slices/groupsSlice';
 import { CompanyCreate, CompanyUpdate } from './types';
 
 interface CompanyFormProps {
@@ -36,9 +36,11 @@ const CompanyForm = ({ open, onClose }: CompanyFormProps) => {
   const dispatch = useAppDispatch();
   const selectedCompany = useAppSelector((state) => state.companies.selected);
   const groups = useAppSelector((state) => state.groups.list);
+  const hasMoreGroups = useAppSelector((state) => state.groups.next !== null);
   const loading = useAppSelector((state) => 
     state.ui.loading.addCompany || state.ui.loading.editCompany);
-  const gruposLoading = useAppSelector((state) => state.ui.loading.fetchGroups);
+  const gruposLoading = useAppSelector((state) =>
+    state.ui.loading.fetchGroups || state.ui.loading.fetchMoreGroups);
   const error = useAppSelector((state) => 
     state.ui.alert.type === 'error' ? state.ui.alert.message : null);
 
@@ -169,6 +171,15 @@ const CompanyForm = ({ open, onClose }: CompanyFormProps) => {
                   ))}
                 </Select>
               </FormControl>
+              {hasMoreGroups && (
+                <Button
+                  size="small"
+                  onClick={() => dispatch(fetchMoreGroups())}
+                  disabled={gruposLoading}
+                >
+                  Carregar mais grupos
+                </Button>
+              )}
             </Grid>
           </Grid>
         </DialogContent>
@@ -1,8 +1,17 @@
 import api from '../../../services/api';
 import { Company, CompanyCreate, CompanyUpdate } from '../types';
 
-export const getCompanies = async (): Promise<Company[]> => {
-  const response = await api.get('/empresas/');
+export interface CompanyPage {
+  next: string | null;
+  results: Company[];
+}
+
+const PAGE_SIZE = 50;
+
+// A listagem é paginada por cursor, em ordem de nome: busca uma página por
+// vez, a primeira sem cursor e as seguintes pelo link next da anterior
+export const getCompanies = async (next?: string | null): Promise<CompanyPage> => {
+  const response = await api.get<CompanyPage>(next ?? `/empresas/?limit=${PAGE_SIZE}`);
   return response.data;
 };
 
@@ -16,7 +16,7 @@ import {
 } from '@mui/material';
 import { useAppDispatch, useAppSelector } from '../../../hooks/store';
 import { addContact, editContact } from '../../../store/slices/contactsSlice';
-import { fetchCompanies } from '../../../store/slices/companiesSlice';
+import { fetchCompanies, fetchMoreCompanies } from '../../../store/slices/companiesSlice';
 import { ContactCreate, ContactUpdate } from './types';
 
 interface ContactFormProps {
@@ -36,9 +36,11 @@ const ContactForm = ({ open, onClose }: ContactFormProps) => {
   const dispatch = useAppDispatch();
   const selectedContact = useAppSelector((state) => state.contacts.selected);
   const companies = useAppSelector((state) => state.companies.list);
+  const hasMoreCompanies = useAppSelector((state) => state.companies.next !== null);
   const loading = useAppSelector((state) => 
     state.ui.loading.addContact || state.ui.loading.editContact);
-  const companiesLoading = useAppSelector((state) => state.ui.loading.fetchCompanies);
+  const companiesLoading = useAppSelector((state) =>
+    state.ui.loading.fetchCompanies || state.ui.loading.fetchMoreCompanies);
   const error = useAppSelector((state) => 
     state.ui.alert.type === 'error' ? state.ui.alert.message : null);
 
@@ -167,6 +169,15 @@ const ContactForm = ({ open, onClose }: ContactFormProps) => {
                   ))}
                 </Select>
               </FormControl>
+              {hasMoreCompanies && (
+                <Button
+                  size="small"
+                  onClick={() => dispatch(fetchMoreCompanies())}
+                  disabled={companiesLoading}
+                >
+                  Carregar mais empresas
+                </Button>
+              )}
             </Grid>
           </Grid>
         </DialogContent>
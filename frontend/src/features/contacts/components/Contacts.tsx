@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { Snackbar, Alert, IconButton, Tooltip } from '@mui/material';
+import { Snackbar, Alert, IconButton, Tooltip, Box, Button } from '@mui/material';
 import InfoIcon from '@mui/icons-material/Info';
 import DataTable from '../../../features/admin/components/DataTable';
 import DeleteDialog from '../../../features/admin/components/DeleteDialog';
@@ -10,6 +10,7 @@ import PageContainer from '../../../components/layout/PageContainer';
 import { useAppDispatch, useAppSelector } from '../../../hooks/store';
 import { 
   fetchContacts, 
+  fetchMoreContacts,
   removeContact, 
   setSelectedContact 
 } from '../../../store/slices/contactsSlice';
@@ -37,9 +38,11 @@ const Contacts = () => {
   // Redux state e dispatch
   const dispatch = useAppDispatch();
   const contacts = useAppSelector((state) => state.contacts.list);
+  const hasMore = useAppSelector((state) => state.contacts.next !== null);
   const selectedContact = useAppSelector((state) => state.contacts.selected);
   const { message: alertMessage, type: alertType } = useAppSelector((state) => state.ui.alert);
   const loading = useAppSelector((state) => state.ui.loading.fetchContacts);
+  const loadingMore = useAppSelector((state) => state.ui.loading.fetchMoreContacts);
   const deleteLoading = useAppSelector((state) => state.ui.loading.removeContact);
 
   useEffect(() => {
@@ -113,6 +116,18 @@ const Contacts = () => {
         loading={loading}
       />
 
+      {hasMore && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+          <Button
+            variant="outlined"
+            onClick={() => dispatch(fetchMoreContacts())}
+            disabled={loadingMore}
+          >
+            {loadingMore ? 'Carregando...' : 'Carregar mais'}
+          </Button>
+        </Box>
+      )}
+
       <ContactForm
         open={openForm}
         onClose={handleContactFormClose}
@@ -1,8 +1,17 @@
 import api from '../../../services/api';
 import { Contact, ContactCreate, ContactUpdate } from '../types';
 
-export const getContacts = async (): Promise<Contact[]> => {
-  const response = await api.get('/contatos/');
+export interface ContactPage {
+  next: string | null;
+  results: Contact[];
+}
+
+const PAGE_SIZE = 50;
+
+// A listagem é paginada por cursor, em ordem de nome: busca uma página por
+// vez, a primeira sem cursor e as seguintes pelo link next da anterior
+export const getContacts = async (next?: string | null): Promise<ContactPage> => {
+  const response = await api.get<ContactPage>(next ?? `/contatos/?limit=${PAGE_SIZE}`);
   return response.data;
 };
 
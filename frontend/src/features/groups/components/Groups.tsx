@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { Box, Snackbar, Alert, IconButton, Tooltip } from '@mui/material';
+import { Box, Snackbar, Alert, IconButton, Tooltip, Button } from '@mui/material';
 import InfoIcon from '@mui/icons-material/Info';
 import DataTable from '../../../features/admin/components/DataTable';
 import DeleteDialog from '../../../features/admin/components/DeleteDialog';
@@ -9,6 +9,7 @@ import AuditInfo from '../../../features/admin/components/AuditInfo';
 import { useAppDispatch, useAppSelector } from '../../../hooks/store';
 import { 
   fetchGroups, 
+  fetchMoreGroups,
   removeGroup, 
   setSelectedGroup 
 } from '../../../store/slices/groupsSlice';
@@ -26,9 +27,11 @@ const Groups = () => {
   const { token } = useAuth();
   const dispatch = useAppDispatch();
   const groups = useAppSelector((state) => state.groups.list);
+  const hasMore = useAppSelector((state) => state.groups.next !== null);
   const selectedGroup = useAppSelector((state) => state.groups.selected);
   const { message: alertMessage, type: alertType } = useAppSelector((state) => state.ui.alert);
   const loading = useAppSelector((state) => state.ui.loading.fetchGroups);
+  const loadingMore = useAppSelector((state) => state.ui.loading.fetchMoreGroups);
   const deleteLoading = useAppSelector((state) => state.ui.loading.removeGroup);
 
   const [openForm, setOpenForm] = useState(false);
@@ -109,6 +112,18 @@ const Groups = () => {
         loading={loading}
       />
 
+      {hasMore && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+          <Button
+            variant="outlined"
+            onClick={() => dispatch(fetchMoreGroups())}
+            disabled={loadingMore}
+          >
+            {loadingMore ? 'Carregando...' : 'Carregar mais'}
+          </Button>
+        </Box>
+      )}
+
       <GroupForm
         open={openForm}
         onClose={handleGroupFormClose}
@@ -1,15 +1,23 @@
 import api from '../../../services/api';
 import { Group, GroupCreate, GroupUpdate } from '../types';
 
-// Obter lista de grupos
-export const getGrupos = async (): Promise<Group[]> => {
+export interface GroupPage {
+  next: string | null;
+  results: Group[];
+}
+
+const PAGE_SIZE = 50;
+
+// Obter lista de grupos: paginada por cursor, em ordem de nome; a primeira
+// página sem cursor e as seguintes pelo link next da anterior
+export const getGrupos = async (next?: string | null): Promise<GroupPage> => {
   try {
     const token = localStorage.getItem('token');
     if (!token) {
       throw new Error('Token não encontrado');
     }
     
-    const response = await api.get('/grupos/', {
+    const response = await api.get<GroupPage>(next ?? `/grupos/?limit=${PAGE_SIZE}`, {
       headers: {
         'Authorization': `Bearer ${token}`
       }
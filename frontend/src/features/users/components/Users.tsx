@@ -6,6 +6,7 @@ import {
   Chip,
   Snackbar,
   Alert,
+  Button,
   Typography 
 } from '@mui/material';
 import InfoIcon from '@mui/icons-material/Info';
@@ -16,7 +17,7 @@ import { User } from '../types';
 import AuditInfo from '../../../features/admin/components/AuditInfo';
 import PageContainer from '../../../components/layout/PageContainer';
 import { useAppDispatch, useAppSelector } from '../../../hooks/store';
-import { fetchUsers, removeUser, setSelectedUser } from '../../../store/slices/usersSlice';
+import { fetchMoreUsers, fetchUsers, removeUser, setSelectedUser } from '../../../store/slices/usersSlice';
 import { clearAlert } from '../../../store/slices/uiSlice';
 import OnlineStatus from '../../../features/online-status/components/OnlineStatus';
 import FiberManualRecordIcon from '@mui/icons-material/FiberManualRecord';
@@ -31,9 +32,11 @@ const Users = () => {
 
   const dispatch = useAppDispatch();
   const users = useAppSelector((state) => state.users.list);
+  const hasMore = useAppSelector((state) => state.users.next !== null);
   const selectedUser = useAppSelector((state) => state.users.selected);
   const { message: alertMessage, type: alertType } = useAppSelector((state) => state.ui.alert);
   const loading = useAppSelector((state) => state.ui.loading.fetchUsers);
+  const loadingMore = useAppSelector((state) => state.ui.loading.fetchMoreUsers);
   const deleteLoading = useAppSelector((state) => state.ui.loading.removeUser);
 
   // Definição das colunas movida para dentro do componente
@@ -176,6 +179,18 @@ const Users = () => {
         )}
       />
 
+      {hasMore && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+          <Button
+            variant="outlined"
+            onClick={() => dispatch(fetchMoreUsers())}
+            disabled={loadingMore}
+          >
+            {loadingMore ? 'Carregando...' : 'Carregar mais'}
+          </Button>
+        </Box>
+      )}
+
       <UserForm
         open={formOpen}
         onClose={() => setFormOpen(false)}
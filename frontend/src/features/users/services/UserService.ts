@@ -1,8 +1,17 @@
 import api from '../../../services/api';
 import { User, UserCreate, UserUpdate } from '../types';
 
-export const getUsers = async (): Promise<User[]> => {
-  const response = await api.get('/accounts/');
+export interface UserPage {
+  next: string | null;
+  results: User[];
+}
+
+const PAGE_SIZE = 50;
+
+// A listagem é paginada por cursor: busca uma página por vez, a primeira
+// sem cursor e as seguintes pelo link next da anterior
+export const getUsers = async (next?: string | null): Promise<UserPage> => {
+  const response = await api.get<UserPage>(next ?? `/accounts/?limit=${PAGE_SIZE}`);
   return response.data;
 };
 
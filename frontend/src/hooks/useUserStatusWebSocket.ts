@@ -12,6 +12,15 @@ export function useUserStatusWebSocket(url: string) {
         isOnline: data.is_online,
         lastActivity: data.last_activity,
       }));
+    } else if (data.type === 'status.batch') {
+      // Frame agregado: um item por usuário cujo status mudou no tick
+      for (const user of data.users) {
+        dispatch(updateUserStatus({
+          userId: user.user_id,
+          isOnline: user.is_online,
+          lastActivity: user.last_activity,
+        }));
+      }
     }
   });
 }
\ No newline at end of file
@@ -10,11 +10,13 @@ import { Company, CompanyCreate, CompanyUpdate } from "../../features/companies/
 
 interface CompaniesState {
   list: Company[];
+  next: string | null;
   selected: Company | null;
 }
 
 const initialState: CompaniesState = {
   list: [],
+  next: null,
   selected: null,
 };
 
@@ -38,6 +40,29 @@ export const fetchCompanies = createAsyncThunk(
   }
 );
 
+// Próxima página da listagem (link next da última carregada)
+export const fetchMoreCompanies = createAsyncThunk(
+  'companies/fetchMoreCompanies',
+  async (_, { dispatch, getState }) => {
+    const { next } = (getState() as { companies: CompaniesState }).companies;
+    try {
+      dispatch(setLoading({ key: 'fetchMoreCompanies', value: true }));
+      return await getCompanies(next);
+    } catch (error: any) {
+      dispatch(setAlert({
+        message: 'Não foi possível carregar mais empresas',
+        type: 'error',
+      }));
+      throw error;
+    } finally {
+      dispatch(setLoading({ key: 'fetchMoreCompanies', value: false }));
+    }
+  },
+  {
+    condition: (_, { getState }) => Boolean((getState() as { companies: CompaniesState }).companies.next),
+  }
+);
+
 export const addCompany = createAsyncThunk(
   'companies/addCompany',
   async (company: CompanyCreate, { dispatch }) => {
@@ -119,7 +144,14 @@ const companiesSlice = createSlice({
   extraReducers: (builder) => {
     builder
       .addCase(fetchCompanies.fulfilled, (state, action) => {
-        state.list = action.payload;
+        state.list = action.payload.results;
+        state.next = action.payload.next;
+      })
+      .addCase(fetchMoreCompanies.fulfilled, (state, action) => {
+        // Empresas criadas nesta sessão já podem estar na lista
+        const loaded = new Set(state.list.map((c) => c.id));
+        state.list.push(...action.payload.results.filter((c) => !loaded.has(c.id)));
+        state.next = action.payload.next;
       })
       .addCase(addCompany.fulfilled, (state, action) => {
         state.list.push(action.payload);
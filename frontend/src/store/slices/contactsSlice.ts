@@ -10,11 +10,13 @@ import { Contact, ContactCreate, ContactUpdate } from "../../features/contacts/t
 
 interface ContactsState {
   list: Contact[];
+  next: string | null;
   selected: Contact | null;
 }
 
 const initialState: ContactsState = {
   list: [],
+  next: null,
   selected: null,
 };
 
@@ -38,6 +40,29 @@ export const fetchContacts = createAsyncThunk(
   }
 );
 
+// Próxima página da listagem (link next da última carregada)
+export const fetchMoreContacts = createAsyncThunk(
+  'contacts/fetchMoreContacts',
+  async (_, { dispatch, getState }) => {
+    const { next } = (getState() as { contacts: ContactsState }).contacts;
+    try {
+      dispatch(setLoading({ key: 'fetchMoreContacts', value: true }));
+      return await getContacts(next);
+    } catch (error: any) {
+      dispatch(setAlert({
+        message: 'Não foi possível carregar mais contatos',
+        type: 'error',
+      }));
+      throw error;
+    } finally {
+      dispatch(setLoading({ key: 'fetchMoreContacts', value: false }));
+    }
+  },
+  {
+    condition: (_, { getState }) => Boolean((getState() as { contacts: ContactsState }).contacts.next),
+  }
+);
+
 export const addContact = createAsyncThunk(
   'contacts/addContact',
   async (contact: ContactCreate, { dispatch }) => {
@@ -119,7 +144,14 @@ const contactsSlice = createSlice({
   extraReducers: (builder) => {
     builder
       .addCase(fetchContacts.fulfilled, (state, action) => {
-        state.list = action.payload;
+        state.list = action.payload.results;
+        state.next = action.payload.next;
+      })
+      .addCase(fetchMoreContacts.fulfilled, (state, action) => {
+        // Contatos criados nesta sessão já podem estar na lista
+        const loaded = new Set(state.list.map((c) => c.id));
+        state.list.push(...action.payload.results.filter((c) => !loaded.has(c.id)));
+        state.next = action.payload.next;
       })
       .addCase(addContact.fulfilled, (state, action) => {
         state.list.push(action.payload);
@@ -6,11 +6,13 @@ import { Group, GroupCreate, GroupUpdate } from '../../features/groups/types';
 
 interface GroupsState {
   list: Group[];
+  next: string | null;
   selected: Group | null;
 }
 
 const initialState: GroupsState = {
   list: [],
+  next: null,
   selected: null,
 };
 
@@ -34,6 +36,29 @@ export const fetchGroups = createAsyncThunk(
   }
 );
 
+// Próxima página da listagem (link next da última carregada)
+export const fetchMoreGroups = createAsyncThunk(
+  'groups/fetchMoreGroups',
+  async (_, { dispatch, getState }) => {
+    const { next } = (getState() as { groups: GroupsState }).groups;
+    try {
+      dispatch(setLoading({ key: 'fetchMoreGroups', value: true }));
+      return await getGrupos(next);
+    } catch (error: any) {
+      dispatch(setAlert({
+        message: 'Não foi possível carregar mais grupos',
+        type: 'error',
+      }));
+      throw error;
+    } finally {
+      dispatch(setLoading({ key: 'fetchMoreGroups', value: false }));
+    }
+  },
+  {
+    condition: (_, { getState }) => Boolean((getState() as { groups: GroupsState }).groups.next),
+  }
+);
+
 export const addGroup = createAsyncThunk(
   'groups/addGroup',
   async (group: GroupCreate, { dispatch }) => {
@@ -115,7 +140,14 @@ const groupsSlice = createSlice({
   extraReducers: (builder) => {
     builder
       .addCase(fetchGroups.fulfilled, (state, action) => {
-        state.list = action.payload;
+        state.list = action.payload.results;
+        state.next = action.payload.next;
+      })
+      .addCase(fetchMoreGroups.fulfilled, (state, action) => {
+        // Grupos criados nesta sessão já podem estar na lista
+        const loaded = new Set(state.list.map((g) => g.id));
+        state.list.push(...action.payload.results.filter((g) => !loaded.has(g.id)));
+        state.next = action.payload.next;
       })
       .addCase(addGroup.fulfilled, (state, action) => {
         state.list.push(action.payload);
@@ -30,6 +30,29 @@ export const fetchUsers = createAsyncThunk(
   }
 );
 
+// Próxima página da listagem (link next da última carregada)
+export const fetchMoreUsers = createAsyncThunk(
+  'users/fetchMoreUsers',
+  async (_, { dispatch, getState }) => {
+    const { next } = (getState() as { users: { next: string | null } }).users;
+    try {
+      dispatch(setLoading({ key: 'fetchMoreUsers', value: true }));
+      return await userService.getUsers(next);
+    } catch (error: any) {
+      dispatch(setAlert({
+        message: 'Não foi possível carregar mais usuários',
+        type: 'error',
+      }));
+      throw error;
+    } finally {
+      dispatch(setLoading({ key: 'fetchMoreUsers', value: false }));
+    }
+  },
+  {
+    condition: (_, { getState }) => Boolean((getState() as { users: { next: string | null } }).users.next),
+  }
+);
+
 export const addUser = createAsyncThunk(
   'users/addUser',
   async (user: UserCreate, { dispatch }) => {
@@ -102,6 +125,7 @@ export const removeUser = createAsyncThunk(
 // Slice
 const initialState = {
   list: [] as User[],
+  next: null as string | null,
   selected: null as User | null,
 };
 
@@ -124,7 +148,14 @@ const usersSlice = createSlice({
   extraReducers: (builder) => {
     builder
       .addCase(fetchUsers.fulfilled, (state, action) => {
-        state.list = action.payload;
+        state.list = action.payload.results;
+        state.next = action.payload.next;
+      })
+      .addCase(fetchMoreUsers.fulfilled, (state, action) => {
+        // Usuários criados nesta sessão já podem estar na lista
+        const loaded = new Set(state.list.map(user => user.id));
+        state.list.push(...action.payload.results.filter(user => !loaded.has(user.id)));
+        state.next = action.payload.next;
       })
       .addCase(addUser.fulfilled, (state, action) => {
         state.list.push(action.payload);